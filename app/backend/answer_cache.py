@@ -0,0 +1,234 @@
+"""
+Answer cache for the /chat endpoint.
+
+Answers are cached per normalized question, role and data version so that
+RBAC is preserved and entries stop matching as soon as the RAG corpus or the
+DuckDB tables change. An optional near-duplicate tier matches questions by
+embedding similarity within the same role and data version; each role and
+version keeps its embeddings in one matrix, so a lookup is a single
+matrix-vector product.
+
+The cache and the data version it is keyed on (``get_corpus_version()`` and
+``DatabaseManager.get_table_version()``) are process-local counters. That
+matches the deployment: one uvicorn process, which DuckDB requires anyway since
+only one process can open the database file read-write. Running several
+workers would need versions derived from persisted state instead.
+"""
+
+import logging
+import re
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Callable, Dict, Optional, Tuple
+
+import numpy as np
+
+from app.config import (
+    ANSWER_CACHE_ENABLED,
+    ANSWER_CACHE_MAX_BYTES,
+    ANSWER_CACHE_TTL_SECONDS,
+    ANSWER_CACHE_SEMANTIC_THRESHOLD,
+)
+
+logger = logging.getLogger(__name__)
+
+# Rough fixed cost of an entry's bookkeeping, added to its payload size
+_ENTRY_OVERHEAD_BYTES = 256
+# Initial rows of a role/version embedding matrix; it doubles when full
+_INITIAL_MATRIX_ROWS = 64
+
+
+def normalize_question(question: str) -> str:
+    """Lowercase, collapse whitespace and drop trailing punctuation."""
+    normalized = re.sub(r"\s+", " ", (question or "").strip().lower())
+    return normalized.rstrip(" ?!.")
+
+
+class AnswerCache:
+    """
+    LRU/TTL cache of chat answers bounded by an approximate size in bytes.
+    """
+
+    def __init__(
+        self,
+        max_bytes: int = ANSWER_CACHE_MAX_BYTES,
+        ttl_seconds: float = ANSWER_CACHE_TTL_SECONDS,
+        semantic_threshold: Optional[float] = ANSWER_CACHE_SEMANTIC_THRESHOLD,
+        embed_query: Optional[Callable] = None,
+    ):
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self.semantic_threshold = semantic_threshold
+        self.embed_query = embed_query
+        self._entries: "OrderedDict[Tuple[str, str, str], Dict[str, Any]]" = OrderedDict()
+        self._size_bytes = 0
+        # (role, version) -> {"matrix", "keys" (row -> key or None), "rows" (key -> row), "free"}
+        self._semantic_groups: Dict[Tuple[str, str], Dict[str, Any]] = {}
+        self._lock = threading.Lock()
+        self._stats = {"hits": 0, "semantic_hits": 0, "misses": 0, "evictions": 0, "expirations": 0}
+
+    @property
+    def semantic_enabled(self) -> bool:
+        return self.semantic_threshold is not None and self.embed_query is not None
+
+    async def embed(self, question: str) -> Optional[np.ndarray]:
+        """
+        Embed a normalized question for the near-duplicate tier, or None when it is disabled.
+        """
+        if not self.semantic_enabled:
+            return None
+        try:
+            vector = np.asarray(await self.embed_query(normalize_question(question)), dtype=np.float32)
+            norm = np.linalg.norm(vector)
+            return vector / norm if norm else None
+        except Exception as e:
+            logger.warning("Answer cache embedding failed, using exact tier only: %s", e)
+            return None
+
+    async def lookup(self, question: str, role: str, version: str) -> Tuple[Optional[Dict[str, Any]], Optional[np.ndarray]]:
+        """
+        Look up a cached answer, first by exact key and then by embedding similarity.
+
+        Returns the cached value (or None) and the question embedding, if one was
+        computed, so a subsequent ``put`` does not embed the question again.
+        """
+        key = (normalize_question(question), role, version)
+        value = self._get_exact(key)
+        if value is not None:
+            return value, None
+
+        embedding = await self.embed(question)
+        if embedding is not None:
+            value = self._get_similar(key, embedding)
+            if value is not None:
+                return value, embedding
+
+        with self._lock:
+            self._stats["misses"] += 1
+        return None, embedding
+
+    def _get_exact(self, key) -> Optional[Dict[str, Any]]:
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry["expires_at"] < time.monotonic():
+                self._remove(key)
+                self._stats["expirations"] += 1
+                return None
+            self._entries.move_to_end(key)
+            self._stats["hits"] += 1
+            return entry["value"]
+
+    def _get_similar(self, key, embedding: np.ndarray) -> Optional[Dict[str, Any]]:
+        now = time.monotonic()
+        with self._lock:
+            # Near-duplicates must share the role and data version
+            group = self._semantic_groups.get(key[1:])
+            if group is None:
+                return None
+            keys = group["keys"]
+            scores = group["matrix"][:len(keys)] @ embedding
+            candidates = np.flatnonzero(scores >= self.semantic_threshold)
+            for row in candidates[np.argsort(-scores[candidates])]:
+                other_key = keys[row]
+                if other_key is None:
+                    continue
+                if self._entries[other_key]["expires_at"] < now:
+                    continue
+                self._entries.move_to_end(other_key)
+                self._stats["semantic_hits"] += 1
+                return self._entries[other_key]["value"]
+            return None
+
+    def _add_embedding(self, key, embedding: np.ndarray):
+        group = self._semantic_groups.get(key[1:])
+        if group is None:
+            group = {"matrix": np.zeros((_INITIAL_MATRIX_ROWS, embedding.shape[0]), dtype=np.float32),
+                     "keys": [], "rows": {}, "free": []}
+            self._semantic_groups[key[1:]] = group
+        if group["free"]:
+            row = group["free"].pop()
+            group["keys"][row] = key
+        else:
+            row = len(group["keys"])
+            if row == group["matrix"].shape[0]:
+                group["matrix"] = np.concatenate([group["matrix"], np.zeros_like(group["matrix"])])
+            group["keys"].append(key)
+        group["matrix"][row] = embedding
+        group["rows"][key] = row
+
+    def _remove_embedding(self, key):
+        group = self._semantic_groups[key[1:]]
+        row = group["rows"].pop(key)
+        if not group["rows"]:
+            del self._semantic_groups[key[1:]]
+            return
+        group["matrix"][row] = 0.0
+        group["keys"][row] = None
+        group["free"].append(row)
+
+    def put(self, question: str, role: str, version: str, value: Dict[str, Any], embedding: Optional[np.ndarray] = None):
+        """
+        Store an answer, evicting least recently used entries to stay within the byte bound.
+        """
+        key = (normalize_question(question), role, version)
+        size = _ENTRY_OVERHEAD_BYTES + len(key[0].encode("utf-8")) + sum(
+            len(str(v).encode("utf-8")) for v in value.values()
+        )
+        if embedding is not None:
+            size += embedding.nbytes
+        if size > self.max_bytes:
+            return
+
+        with self._lock:
+            if key in self._entries:
+                self._remove(key)
+            self._entries[key] = {
+                "value": value,
+                "semantic": embedding is not None,
+                "expires_at": time.monotonic() + self.ttl_seconds,
+                "size": size,
+            }
+            if embedding is not None:
+                self._add_embedding(key, embedding)
+            self._size_bytes += size
+            while self._size_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats["evictions"] += 1
+
+    def _remove(self, key):
+        entry = self._entries.pop(key)
+        self._size_bytes -= entry["size"]
+        if entry["semantic"]:
+            self._remove_embedding(key)
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self._semantic_groups.clear()
+            self._size_bytes = 0
+
+    def stats(self) -> Dict[str, Any]:
+        with self._lock:
+            lookups = self._stats["hits"] + self._stats["semantic_hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "entries": len(self._entries),
+                "size_bytes": self._size_bytes,
+                "max_bytes": self.max_bytes,
+                "hit_rate": (self._stats["hits"] + self._stats["semantic_hits"]) / lookups if lookups else 0.0,
+            }
+
+
+async def _embed_with_rag_embeddings(text: str):
+    from app.backend.rag_utils.rag_module import openai_embeddings
+    return await openai_embeddings.aembed_query(text)
+
+
+# Global answer cache instance - None when disabled by configuration
+answer_cache: Optional[AnswerCache] = (
+    AnswerCache(embed_query=_embed_with_rag_embeddings) if ANSWER_CACHE_ENABLED else None
+)
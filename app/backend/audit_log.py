@@ -0,0 +1,197 @@
+"""
+Background writer for the query_log audit table.
+
+``DatabaseManager.log_query`` only enqueues a row; a daemon thread drains the
+queue and inserts rows in bulk on the writer cursor (one vectorized
+``INSERT ... SELECT UNNEST`` per batch) when the batch is full or the flush
+interval has elapsed. The request path never waits on DuckDB, except for a
+short bounded wait when the queue is full. When the writer cursor stays busy
+past its checkout timeout (e.g. during a long CSV load) the batch is kept and
+retried rather than dropped.
+"""
+
+import logging
+import queue
+import threading
+import time
+from datetime import datetime
+from typing import Callable, Optional
+
+from app.backend.db_pool import PoolTimeoutError
+from app.config import (
+    AUDIT_LOG_BATCH_SIZE,
+    AUDIT_LOG_FLUSH_INTERVAL_SECONDS,
+    AUDIT_LOG_QUEUE_MAX_SIZE,
+    AUDIT_LOG_ENQUEUE_TIMEOUT_SECONDS,
+)
+
+logger = logging.getLogger(__name__)
+
+_INSERT_BATCH_SQL = """
+    INSERT INTO query_log (username, role, query_type, query_text, timestamp, success, error_message)
+    SELECT UNNEST(?::TEXT[]), UNNEST(?::TEXT[]), UNNEST(?::TEXT[]), UNNEST(?::TEXT[]),
+           UNNEST(?::TIMESTAMP[]), UNNEST(?::BOOLEAN[]), UNNEST(?::TEXT[])
+"""
+
+# Attempts to write the final batch on close while the writer stays busy
+_CLOSE_WRITE_ATTEMPTS = 3
+
+# Queue markers; rows are tuples
+_FLUSH = object()
+_STOP = object()
+
+
+def _fallback_log(row):
+    username, role, query_type, query_text, _, success, error_message = row
+    logger.info("FALLBACK LOG: %s (%s) - %s: %s - Success: %s - Error: %s", username, role, query_type, query_text, success, error_message)
+
+
+class QueryLogWriter:
+    """
+    Queue of audit rows flushed to query_log in batches by a background thread.
+    """
+
+    def __init__(
+        self,
+        cursor_factory: Callable,
+        batch_size: int = AUDIT_LOG_BATCH_SIZE,
+        flush_interval: float = AUDIT_LOG_FLUSH_INTERVAL_SECONDS,
+        max_queue_size: int = AUDIT_LOG_QUEUE_MAX_SIZE,
+        enqueue_timeout: float = AUDIT_LOG_ENQUEUE_TIMEOUT_SECONDS,
+    ):
+        self.cursor_factory = cursor_factory
+        self.batch_size = max(1, batch_size)
+        self.flush_interval = flush_interval
+        self.enqueue_timeout = enqueue_timeout
+        self.max_pending = max(1, max_queue_size)
+        self._queue: "queue.Queue" = queue.Queue(maxsize=max_queue_size)
+        self._thread: Optional[threading.Thread] = None
+        self._start_lock = threading.Lock()
+        self._closed = False
+        self.stats = {"enqueued": 0, "written": 0, "dropped": 0, "failed": 0, "batches": 0, "retries": 0}
+
+    def _ensure_started(self):
+        if self._thread is None:
+            with self._start_lock:
+                if self._thread is None:
+                    self._thread = threading.Thread(target=self._run, name="query-log-writer", daemon=True)
+                    self._thread.start()
+
+    def enqueue(self, username: str, role: str, query_type: str, query_text: str,
+                success: bool, error_message: Optional[str] = None) -> bool:
+        """
+        Queue an audit row; returns False when it had to be dropped.
+
+        When the queue is full the caller waits up to ``enqueue_timeout``
+        seconds for space, then the row is written to the application log instead.
+        """
+        row = (username, role, query_type, query_text, datetime.now(), success, error_message)
+        if self._closed:
+            _fallback_log(row)
+            return False
+        self._ensure_started()
+        try:
+            self._queue.put(row, timeout=self.enqueue_timeout)
+        except queue.Full:
+            self.stats["dropped"] += 1
+            logger.warning("Audit log queue full, writing entry to application log instead")
+            _fallback_log(row)
+            return False
+        self.stats["enqueued"] += 1
+        return True
+
+    def flush(self, timeout: Optional[float] = None) -> bool:
+        """
+        Write everything queued so far; returns False if it did not finish in time.
+        """
+        if self._thread is None:
+            return True
+        done = threading.Event()
+        start = time.monotonic()
+        try:
+            self._queue.put((_FLUSH, done), timeout=timeout)
+        except queue.Full:
+            return False
+        return done.wait(None if timeout is None else max(0.0, timeout - (time.monotonic() - start)))
+
+    def close(self, timeout: float = 10.0):
+        """Flush remaining rows and stop the writer thread."""
+        self._closed = True
+        if self._thread is None:
+            return
+        start = time.monotonic()
+        try:
+            self._queue.put(_STOP, timeout=timeout)
+        except queue.Full:
+            logger.warning("Audit log queue full on close; some entries may be lost")
+            return
+        self._thread.join(max(0.0, timeout - (time.monotonic() - start)))
+        if self._thread.is_alive():
+            logger.warning("Audit log writer did not stop in time; some entries may be lost")
+
+    def _run(self):
+        batch = []
+        deadline = None
+        while True:
+            timeout = None if deadline is None else max(0.0, deadline - time.monotonic())
+            try:
+                item = self._queue.get(timeout=timeout)
+            except queue.Empty:
+                item = None
+
+            if isinstance(item, tuple) and item and item[0] is _FLUSH:
+                # Each attempt waits out the writer's checkout timeout; the caller bounds the wait
+                while not self._write(batch):
+                    pass
+                batch, deadline = [], None
+                item[1].set()
+                continue
+            if item is _STOP:
+                for _ in range(_CLOSE_WRITE_ATTEMPTS):
+                    if self._write(batch):
+                        return
+                self._give_up(batch)
+                return
+
+            if item is not None:
+                batch.append(item)
+                if deadline is None:
+                    deadline = time.monotonic() + self.flush_interval
+            if batch and (len(batch) >= self.batch_size or time.monotonic() >= deadline):
+                if self._write(batch):
+                    batch, deadline = [], None
+                else:
+                    # Keep the rows and retry after another interval, within the queue's bound
+                    if len(batch) > self.max_pending:
+                        self._give_up(batch[:-self.max_pending])
+                        batch = batch[-self.max_pending:]
+                    deadline = time.monotonic() + self.flush_interval
+
+    def _write(self, batch) -> bool:
+        """
+        Insert a batch with one statement on a cursor from ``cursor_factory``.
+
+        Returns False, keeping the rows for a retry, only when the writer could
+        not be checked out in time; other errors send the rows to the
+        application log.
+        """
+        if not batch:
+            return True
+        try:
+            with self.cursor_factory() as cursor:
+                cursor.execute(_INSERT_BATCH_SQL, [list(column) for column in zip(*batch)])
+            self.stats["written"] += len(batch)
+            self.stats["batches"] += 1
+        except PoolTimeoutError as e:
+            self.stats["retries"] += 1
+            logger.warning("Audit log writer busy, keeping %s entries for retry: %s", len(batch), e)
+            return False
+        except Exception as e:
+            logger.error("Failed to write %s audit log entries: %s", len(batch), e)
+            self._give_up(batch)
+        return True
+
+    def _give_up(self, rows):
+        self.stats["failed"] += len(rows)
+        for row in rows:
+            _fallback_log(row)
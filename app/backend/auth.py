@@ -5,15 +5,92 @@ Authentication
 from fastapi import HTTPException, Depends, status
 from fastapi.security import HTTPBasic, HTTPBasicCredentials
 from passlib.hash import bcrypt
-from typing import Dict, Optional
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+import hashlib
 import secrets
+import threading
+import time
 
-from app.config import STATIC_USERS, ROLE_DOCS_MAPPING
+from app.config import STATIC_USERS, ROLE_DOCS_MAPPING, AUTH_CACHE_TTL_SECONDS, AUTH_CACHE_MAX_ENTRIES
+from app.backend.metrics import stage
 from app.backend.models import UserInfo
 
 # Security scheme
 security = HTTPBasic()
 
+class VerifiedCredentialCache:
+    """
+    Bounded, TTL-expiring cache of successful bcrypt verifications.
+    
+    Entries are keyed by a keyed BLAKE2b digest of (username, password) using a
+    per-process random key, so plain-text passwords are never held in memory.
+    An entry is only valid while the user's stored hash is unchanged.
+    """
+    
+    def __init__(self, max_entries: int = AUTH_CACHE_MAX_ENTRIES, ttl_seconds: float = AUTH_CACHE_TTL_SECONDS):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self._secret = secrets.token_bytes(32)
+        self._entries: "OrderedDict[bytes, Tuple[str, str, float]]" = OrderedDict()
+        self._lock = threading.Lock()
+    
+    def _digest(self, username: str, password: str) -> bytes:
+        return hashlib.blake2b(
+            username.encode("utf-8") + b"\x00" + password.encode("utf-8"),
+            key=self._secret,
+            digest_size=32,
+        ).digest()
+    
+    def is_verified(self, username: str, password: str, password_hash: str) -> bool:
+        """
+        Return True if this exact credential pair was verified recently against the current hash.
+        """
+        if self.max_entries <= 0:
+            return False
+        key = self._digest(username, password)
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return False
+            _, cached_hash, expires_at = entry
+            if expires_at < time.monotonic() or not secrets.compare_digest(cached_hash, password_hash):
+                del self._entries[key]
+                return False
+            self._entries.move_to_end(key)
+            return True
+    
+    def add(self, username: str, password: str, password_hash: str):
+        """
+        Record a successful verification, evicting the least recently used entries.
+        """
+        if self.max_entries <= 0:
+            return
+        key = self._digest(username, password)
+        with self._lock:
+            self._entries[key] = (username, password_hash, time.monotonic() + self.ttl_seconds)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+    
+    def invalidate_user(self, username: str):
+        """
+        Drop all cached verifications for a user, e.g. after a password change.
+        """
+        with self._lock:
+            for key in [k for k, entry in self._entries.items() if entry[0] == username]:
+                del self._entries[key]
+    
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+    
+    def __len__(self) -> int:
+        return len(self._entries)
+
+# Process-wide cache used by authenticate_user
+credential_cache = VerifiedCredentialCache()
+
 def get_user_info(username: str) -> Optional[UserInfo]:
     """
     Get user information from static users configuration.
@@ -37,6 +114,10 @@ def authenticate_user(credentials: HTTPBasicCredentials = Depends(security)) ->
     """
     Authenticate a user based on HTTP Basic Auth credentials.
     """
+    with stage("auth"):
+        return _authenticate(credentials)
+
+def _authenticate(credentials: HTTPBasicCredentials) -> UserInfo:
     username = credentials.username
     password = credentials.password
     
@@ -49,6 +130,10 @@ def authenticate_user(credentials: HTTPBasicCredentials = Depends(security)) ->
             headers={"WWW-Authenticate": "Basic"},
         )
     
+    # Skip bcrypt when these credentials were verified recently; failures are never cached
+    if credential_cache.is_verified(username, password, user_info.password_hash):
+        return user_info
+    
     # Verify password
     if not verify_password(password, user_info.password_hash):
         raise HTTPException(
@@ -57,6 +142,7 @@ def authenticate_user(credentials: HTTPBasicCredentials = Depends(security)) ->
             headers={"WWW-Authenticate": "Basic"},
         )
     
+    credential_cache.add(username, password, user_info.password_hash)
     return user_info
 
 #  Dependency to require a specific role for access.
@@ -0,0 +1,196 @@
+"""
+Startup sync of the role CSVs shipped in resources_2 into DuckDB.
+
+Uploaded CSVs become tables in ``/upload-docs``, but the CSVs that ship with
+the project (e.g. ``hr/chennai_agriculture_hr.csv``) were never loaded, so SQL
+questions about them fell back to RAG. ``sync_resource_csvs()`` loads every
+CSV under a role folder of ``ROLE_FOLDER_MAPPING`` and registers it in
+tables_metadata for that role.
+
+What was loaded is recorded in ``csv_sources``. On restart a file with the same
+size and mtime is skipped without being read, and one whose content hash is
+unchanged only has its stat refreshed. Changed files are converted to Parquet
+by a thread pool, each worker on its own cursor; only the final, cheap
+``CREATE OR REPLACE`` goes through the single writer cursor. With
+CSV_BOOTSTRAP_PARQUET the files stay in the Parquet storage tier behind a view;
+otherwise the staged Parquet is loaded into a native table and deleted.
+"""
+
+import hashlib
+import logging
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Dict, Iterator, Optional
+
+from app.config import CSV_BOOTSTRAP_PARQUET, CSV_BOOTSTRAP_WORKERS, PARQUET_DIR, RESOURCES_DIR
+from app.backend.constants import ROLE_FOLDER_MAPPING
+from app.backend.database import DatabaseManager, csv_table_name, get_db_manager
+
+logger = logging.getLogger(__name__)
+
+_HASH_CHUNK_BYTES = 1024 * 1024
+
+
+def _file_hash(path: Path) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(_HASH_CHUNK_BYTES), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def iter_resource_csvs(resources_dir: Path = RESOURCES_DIR) -> Iterator[dict]:
+    """Yield a source dict (table_name, path, role) for every CSV in a role folder."""
+    for role, folder in ROLE_FOLDER_MAPPING.items():
+        folder_path = Path(resources_dir) / folder
+        if not folder_path.is_dir():
+            continue
+        for path in sorted(folder_path.iterdir()):
+            if path.is_file() and path.suffix.lower() == ".csv":
+                yield {"table_name": csv_table_name(path.name), "path": path.resolve(), "role": role}
+
+
+def _load_known_sources(db_manager: DatabaseManager) -> Dict[str, dict]:
+    rows = db_manager.execute_query(
+        "SELECT table_name, source_path, role, file_size, mtime, content_hash, storage FROM csv_sources"
+    )
+    keys = ("table_name", "source_path", "role", "file_size", "mtime", "content_hash", "storage")
+    return {row[0]: dict(zip(keys, row)) for row in rows}
+
+
+def _record_source(db_manager: DatabaseManager, source: dict, storage: str):
+    db_manager.execute_write("""
+        INSERT INTO csv_sources (table_name, source_path, role, file_size, mtime, content_hash, storage, loaded_at)
+        VALUES (?, ?, ?, ?, ?, ?, ?, now())
+        ON CONFLICT (table_name)
+        DO UPDATE SET
+            source_path = excluded.source_path,
+            role = excluded.role,
+            file_size = excluded.file_size,
+            mtime = excluded.mtime,
+            content_hash = excluded.content_hash,
+            storage = excluded.storage,
+            loaded_at = now()
+    """, [source["table_name"], str(source["path"]), source["role"], source["file_size"],
+          source["mtime"], source["content_hash"], storage])
+
+
+def _check_source(source: dict, known: Optional[dict], storage: str, registered: bool) -> str:
+    """
+    Classify a source as "unchanged", "touched" (same content, new stat) or "changed".
+
+    Fills in the file's size, mtime and (unless the stat matches) content hash.
+    """
+    stat = source["path"].stat()
+    source["file_size"], source["mtime"] = stat.st_size, stat.st_mtime
+    same_target = (
+        registered and known is not None
+        and known["source_path"] == str(source["path"])
+        and known["role"] == source["role"]
+        and known["storage"] == storage
+    )
+    if same_target and known["file_size"] == source["file_size"] and known["mtime"] == source["mtime"]:
+        source["content_hash"] = known["content_hash"]
+        return "unchanged"
+    source["content_hash"] = _file_hash(source["path"])
+    if same_target and known["content_hash"] == source["content_hash"]:
+        return "touched"
+    return "changed"
+
+
+def _load_source(db_manager: DatabaseManager, source: dict, parquet: bool, stage_parquet: bool) -> bool:
+    """Load one changed CSV. Runs on a worker thread; only the final replace takes the writer."""
+    table_name, path, role = source["table_name"], str(source["path"]), source["role"]
+    if parquet:
+        return db_manager.create_table_from_csv_path(table_name, path, role, storage="parquet")
+    if not stage_parquet:
+        return db_manager.create_table_from_csv_path(table_name, path, role, storage="table")
+
+    staging_path = PARQUET_DIR / ".staging" / f"{table_name}-{uuid.uuid4().hex}.parquet"
+    try:
+        staging_path.parent.mkdir(parents=True, exist_ok=True)
+        db_manager.export_csv_to_parquet(path, str(staging_path))
+        return db_manager.create_table_from_parquet(table_name, str(staging_path), role)
+    except Exception as e:
+        logger.error("Failed to convert %s to Parquet: %s", path, e)
+        return False
+    finally:
+        staging_path.unlink(missing_ok=True)
+
+
+def _time_first_queries(db_manager: DatabaseManager, table_names) -> Dict[str, float]:
+    """Seconds taken by the first scan of each table, including schema lookup."""
+    timings = {}
+    for table_name in table_names:
+        start = time.perf_counter()
+        if db_manager.get_table_schemas([table_name]):
+            db_manager.execute_query(f"SELECT count(*) FROM {table_name}")
+            timings[table_name] = time.perf_counter() - start
+    return timings
+
+
+def sync_resource_csvs(db_manager: Optional[DatabaseManager] = None, resources_dir: Path = RESOURCES_DIR,
+                       workers: int = CSV_BOOTSTRAP_WORKERS, parquet: bool = CSV_BOOTSTRAP_PARQUET) -> dict:
+    """
+    Load new or changed role CSVs into DuckDB and return a report.
+
+    The report lists loaded, unchanged and failed tables, the sync time in
+    seconds and the latency of the first query on each table.
+    """
+    start = time.perf_counter()
+    db_manager = db_manager or get_db_manager()
+    storage = "parquet" if parquet else "table"
+    report = {"storage": storage, "loaded": [], "unchanged": [], "failed": [], "seconds": 0.0,
+              "first_query_seconds": {}}
+
+    sources = []
+    for source in iter_resource_csvs(resources_dir):
+        if any(other["table_name"] == source["table_name"] for other in sources):
+            logger.warning("Skipping %s: table %s is already loaded from another role folder",
+                           source["path"], source["table_name"])
+            continue
+        sources.append(source)
+    if not sources:
+        return report
+    try:
+        known = _load_known_sources(db_manager)
+        registered = set(db_manager.get_table_schemas([source["table_name"] for source in sources]))
+    except Exception as e:
+        logger.error("CSV bootstrap could not read csv_sources: %s", e)
+        known, registered = {}, set()
+
+    with ThreadPoolExecutor(max_workers=max(1, workers), thread_name_prefix="csv-bootstrap") as pool:
+        states = list(pool.map(
+            lambda source: _check_source(source, known.get(source["table_name"]), storage,
+                                         source["table_name"] in registered),
+            sources,
+        ))
+        changed = [source for source, state in zip(sources, states) if state == "changed"]
+        # Staging through Parquet only pays off when several files can be parsed at once
+        stage_parquet = workers > 1 and len(changed) > 1
+        results = list(pool.map(lambda source: _load_source(db_manager, source, parquet, stage_parquet), changed))
+
+    loaded = {source["table_name"] for source, ok in zip(changed, results) if ok}
+    for source, state in zip(sources, states):
+        table_name = source["table_name"]
+        if state == "changed" and table_name not in loaded:
+            report["failed"].append(table_name)
+            continue
+        report["loaded" if state == "changed" else "unchanged"].append(table_name)
+        if state != "unchanged":
+            _record_source(db_manager, source, storage)
+
+    report["seconds"] = time.perf_counter() - start
+    report["first_query_seconds"] = _time_first_queries(db_manager, report["loaded"] + report["unchanged"])
+    logger.info(
+        "CSV bootstrap (%s): %s loaded, %s unchanged, %s failed in %.2fs",
+        storage, len(report["loaded"]), len(report["unchanged"]), len(report["failed"]), report["seconds"],
+    )
+    if report["first_query_seconds"]:
+        logger.info(
+            "First query latency: %s",
+            ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in report["first_query_seconds"].items()),
+        )
+    return report
@@ -5,18 +5,94 @@ This module handles DuckDB connections, table operations, and data management.
 """
 
 import duckdb
-import pandas as pd
 from pathlib import Path
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Optional, Tuple
+import asyncio
+import contextvars
+import functools
 import logging
+import re
+import shutil
+import threading
+import time
+import uuid
+from concurrent.futures import ThreadPoolExecutor
 
-from app.config import DUCKDB_PATH, DUCKDB_DIR
+from app.config import (
+    DUCKDB_PATH,
+    DUCKDB_DIR,
+    DB_EXECUTOR_MAX_WORKERS,
+    DB_READ_POOL_SIZE,
+    DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+    DB_POOL_MAX_IDLE_SECONDS,
+    DUCKDB_MEMORY_LIMIT,
+    DUCKDB_THREADS,
+    CSV_TABLE_STORAGE,
+    PARQUET_DIR,
+    PARQUET_COMPRESSION,
+    PARQUET_ROW_GROUP_SIZE,
+    SQL_MAX_RESULT_BYTES,
+    SQL_QUERY_TIMEOUT_SECONDS,
+)
+from app.backend.metrics import stage
 from app.backend.models import QueryType
+from app.backend.audit_log import QueryLogWriter
+from app.backend.db_pool import CursorPool, WriterCursor
 
-# Configure logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+# Rows pulled per fetchmany call while enforcing the result byte limit
+_FETCH_BATCH_ROWS = 256
+
+class QueryTimeoutError(TimeoutError):
+    """Raised when a limited query is interrupted after its time budget."""
+
+def csv_table_name(filename: str) -> str:
+    """Get the DuckDB table name used for an uploaded CSV file."""
+    raw_name = Path(filename).stem.replace("-", "_")
+    return "".join(ch if (ch.isalnum() or ch == "_") else "_" for ch in raw_name)
+
+# Partition columns are interpolated into COPY statements
+_IDENTIFIER = re.compile(r"^[A-Za-z_][A-Za-z0-9_]*$")
+
+def _current_parquet_generation(table_dir: Path) -> Optional[Path]:
+    """The newest generation directory of a Parquet table, if any."""
+    if not table_dir.is_dir():
+        return None
+    generations = [path for path in table_dir.iterdir() if path.is_dir() and path.name[1:].isdigit()]
+    return max(generations, key=lambda path: int(path.name[1:]), default=None)
+
+def _parquet_partition_columns(generation: Path) -> List[str]:
+    """Hive partition columns of a generation, read from the key=value directories of one file."""
+    for path in generation.rglob("*.parquet"):
+        return [part.split("=", 1)[0] for part in path.relative_to(generation).parts[:-1] if "=" in part]
+    return []
+
+def sql_literal(value: str) -> str:
+    """Quote a string as a SQL literal, for statements that cannot take parameters (views, COPY)."""
+    return "'" + str(value).replace("'", "''") + "'"
+
+def strip_trailing_semicolons(query: str) -> str:
+    """Drop the semicolons ending a statement, including ones followed by comments."""
+    query = query.strip()
+    try:
+        tokens = duckdb.tokenize(query)
+    except Exception:
+        return query.rstrip(";")
+    end = len(query)
+    # Comments are not tokens, so a trailing "; -- note" ends in a ";" token
+    for offset, _ in reversed(tokens):
+        if query[offset] != ";":
+            break
+        end = offset
+    return query[:end].rstrip()
+
+def wrap_limited_query(query: str, limit: int, offset: int) -> str:
+    """Wrap a SELECT so it returns at most ``limit`` rows (plus one) from ``offset``."""
+    inner = strip_trailing_semicolons(query)
+    # The newline ends a trailing "-- comment" before it can swallow the parenthesis
+    return f"SELECT * FROM ({inner}\n) AS limited_result LIMIT {int(limit) + 1} OFFSET {int(offset)}"
+
 class DatabaseManager:
     """Manages DuckDB database operations and connections."""
     
@@ -27,9 +103,35 @@ class DatabaseManager:
         self.db_path = db_path
         self.connection = None
         self._connection_closed = False
+        self._init_schema_catalog()
+        self._init_cursor_pools()
+        self._init_query_log_writer()
         self._ensure_db_directory()
         self._initialize_database()
     
+    def _init_schema_catalog(self):
+        """Initialize the in-memory schema catalog (table name -> columns)."""
+        self._schema_cache: Dict[str, Optional[List[Tuple[str, str]]]] = {}
+        self._schema_lock = threading.Lock()
+        # Bumped whenever a table is (re)created so dependent caches can expire
+        self._table_version = 0
+    
+    def _init_cursor_pools(self):
+        """Initialize the read-only cursor pool and the single writer cursor."""
+        self._read_pool = CursorPool(
+            self.get_connection,
+            size=DB_READ_POOL_SIZE,
+            checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT_SECONDS,
+            max_idle_seconds=DB_POOL_MAX_IDLE_SECONDS,
+            read_only=True,
+            name="read",
+        )
+        self._writer = WriterCursor(self.get_connection, checkout_timeout=DB_POOL_CHECKOUT_TIMEOUT_SECONDS)
+    
+    def _init_query_log_writer(self):
+        """Initialize the background writer that batches query_log inserts."""
+        self._query_log_writer = QueryLogWriter(self.write_cursor)
+    
     def _ensure_db_directory(self):
         """Ensure the database directory exists."""
         self.db_path.parent.mkdir(parents=True, exist_ok=True)
@@ -43,7 +145,7 @@ class DatabaseManager:
                 self._connection_closed = False
             except Exception as e:
                 if "WAL file" in str(e) or "Binder Error" in str(e):
-                    logger.warning(f"WAL corruption detected, attempting recovery: {e}")
+                    logger.warning("WAL corruption detected, attempting recovery: %s", e)
                     # Try to remove WAL file and reconnect
                     import os
                     wal_path = str(self.db_path) + ".wal"
@@ -52,7 +154,7 @@ class DatabaseManager:
                             os.remove(wal_path)
                             logger.info("Removed corrupted WAL file")
                         except Exception as remove_error:
-                            logger.warning(f"Could not remove WAL file: {remove_error}")
+                            logger.warning("Could not remove WAL file: %s", remove_error)
                     
                     # Try to connect again
                     self.connection = duckdb.connect(str(self.db_path))
@@ -60,12 +162,22 @@ class DatabaseManager:
                 else:
                     raise e
             
+            self._apply_resource_settings(self.connection)
             self._create_tables()
-            logger.info(f"Database initialized successfully at {self.db_path}")
+            logger.info("Database initialized successfully at %s", self.db_path)
         except Exception as e:
-            logger.error(f"Failed to initialize database: {e}")
+            logger.error("Failed to initialize database: %s", e)
             raise
     
+    def _apply_resource_settings(self, connection):
+        """
+        Apply the configured memory_limit and threads to the DuckDB instance.
+        """
+        if DUCKDB_MEMORY_LIMIT:
+            connection.execute(f"SET memory_limit = '{DUCKDB_MEMORY_LIMIT}'")
+        if DUCKDB_THREADS:
+            connection.execute(f"SET threads = {int(DUCKDB_THREADS)}")
+    
     def _create_tables(self):
         """Create necessary tables if they don't exist."""
         try:
@@ -107,6 +219,44 @@ class DatabaseManager:
                 )
             """)
             
+            # Create sql_translation_cache table for reusing generated SQL
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS sql_translation_cache (
+                    kind TEXT NOT NULL,
+                    question_key TEXT NOT NULL,
+                    schema_fingerprint TEXT NOT NULL,
+                    sql_text TEXT NOT NULL,
+                    slots TEXT,
+                    tables TEXT[],
+                    created_at TIMESTAMP DEFAULT now(),
+                    PRIMARY KEY (kind, question_key, schema_fingerprint)
+                )
+            """)
+            
+            # Create embedding_cache table: content-addressed vectors shared by every indexer run
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS embedding_cache (
+                    key TEXT PRIMARY KEY,
+                    model TEXT NOT NULL,
+                    vector FLOAT[] NOT NULL,
+                    created_at TIMESTAMP DEFAULT now()
+                )
+            """)
+            
+            # Create csv_sources table: CSVs loaded at startup, to skip unchanged files on restart
+            self.connection.execute("""
+                CREATE TABLE IF NOT EXISTS csv_sources (
+                    table_name TEXT PRIMARY KEY,
+                    source_path TEXT NOT NULL,
+                    role TEXT NOT NULL,
+                    file_size BIGINT NOT NULL,
+                    mtime DOUBLE NOT NULL,
+                    content_hash TEXT NOT NULL,
+                    storage TEXT NOT NULL,
+                    loaded_at TIMESTAMP DEFAULT now()
+                )
+            """)
+            
             # Add sequence for auto-incrementing ID if it doesn't exist
             self.connection.execute("""
                 CREATE SEQUENCE IF NOT EXISTS query_log_id_seq
@@ -124,7 +274,7 @@ class DatabaseManager:
             
             logger.info("Database tables created successfully")
         except Exception as e:
-            logger.error(f"Failed to create tables: {e}")
+            logger.error("Failed to create tables: %s", e)
             raise
     
     def get_connection(self) -> duckdb.DuckDBPyConnection:
@@ -135,24 +285,41 @@ class DatabaseManager:
             try:
                 self.connection = duckdb.connect(str(self.db_path))
                 self._connection_closed = False
+                self._apply_resource_settings(self.connection)
             except Exception as e:
-                logger.error(f"Failed to create new database connection: {e}")
+                logger.error("Failed to create new database connection: %s", e)
                 raise
         return self.connection
     
+    def read_cursor(self):
+        """
+        Borrow a pooled cursor inside a READ ONLY transaction (context manager).
+        """
+        return self._read_pool.checkout()
+    
+    def write_cursor(self):
+        """
+        Hold the single writer cursor (context manager); writes are serialized.
+        """
+        return self._writer.checkout()
+    
+    def pool_stats(self) -> Dict[str, Dict[str, Any]]:
+        """Checkout, wait and health counters of the read pool and the writer."""
+        return {"read": self._read_pool.stats_snapshot(), "write": self._writer.stats_snapshot()}
+    
     def execute_query(self, query: str, params: Optional[List[Any]] = None) -> List[tuple]:
         """
-        Execute a SQL query and return results.
+        Execute a read-only SQL query on a pooled cursor and return results.
         """
         try:
-            conn = self.get_connection()
-            if params:
-                result = conn.execute(query, params).fetchall()
-            else:
-                result = conn.execute(query).fetchall()
+            with self.read_cursor() as cursor:
+                if params:
+                    result = cursor.execute(query, params).fetchall()
+                else:
+                    result = cursor.execute(query).fetchall()
             return result
         except Exception as e:
-            logger.error(f"Query execution failed: {e}")
+            logger.error("Query execution failed: %s", e)
             raise
     
     def execute_query_with_columns(self, query: str, params: Optional[List[Any]] = None) -> Dict[str, Any]:
@@ -160,51 +327,306 @@ class DatabaseManager:
         Execute a SQL query and return results with column information.
         """
         try:
-            conn = self.get_connection()
-            if params:
-                result = conn.execute(query, params)
-            else:
-                result = conn.execute(query)
-            
-            data = result.fetchall()
-            columns = [desc[0] for desc in result.description]
+            with self.read_cursor() as cursor:
+                if params:
+                    result = cursor.execute(query, params)
+                else:
+                    result = cursor.execute(query)
+                
+                data = result.fetchall()
+                columns = [desc[0] for desc in result.description]
             
             return {
                 "data": data,
                 "columns": columns
             }
         except Exception as e:
-            logger.error(f"Query execution failed: {e}")
+            logger.error("Query execution failed: %s", e)
             raise
     
-    def create_table_from_csv_path(self, table_name: str, csv_path: str, role: str) -> bool:
+    def execute_limited_query(self, query: str, limit: int, offset: int = 0,
+                              max_bytes: int = SQL_MAX_RESULT_BYTES,
+                              timeout: float = SQL_QUERY_TIMEOUT_SECONDS) -> Dict[str, Any]:
+        """
+        Execute an untrusted SELECT with row, byte and time limits.
+        
+        The query is wrapped so DuckDB returns at most ``limit`` rows starting at
+        ``offset`` (plus one to tell whether more exist). Rows are fetched
+        incrementally until ``max_bytes`` of rendered values is reached, and the
+        query is interrupted after ``timeout`` seconds.
+        """
+        wrapped = wrap_limited_query(query, limit, offset)
+        with self.read_cursor() as cursor:
+            timer = threading.Timer(timeout, cursor.interrupt) if timeout else None
+            if timer:
+                timer.daemon = True
+                timer.start()
+            try:
+                result = cursor.execute(wrapped)
+                columns = [desc[0] for desc in result.description]
+                rows, size, truncated = [], 0, False
+                while len(rows) <= limit and not truncated:
+                    batch = result.fetchmany(_FETCH_BATCH_ROWS)
+                    if not batch:
+                        break
+                    for row in batch:
+                        size += sum(len(str(value)) for value in row)
+                        if size > max_bytes and rows:
+                            truncated = True
+                            break
+                        rows.append(list(row))
+            except duckdb.InterruptException as e:
+                raise QueryTimeoutError(f"Query exceeded the {timeout:g}s time limit") from e
+            finally:
+                if timer:
+                    timer.cancel()
+        
+        return {
+            "columns": columns,
+            "data": rows[:limit],
+            "has_more": truncated or len(rows) > limit,
+            "truncated": truncated,
+        }
+    
+    def execute_write(self, query: str, params: Optional[List[Any]] = None):
+        """
+        Execute a statement that modifies the database on the writer cursor.
+        """
+        try:
+            with self.write_cursor() as cursor:
+                cursor.execute(query, params or [])
+        except Exception as e:
+            logger.error("Write execution failed: %s", e)
+            raise
+    
+    def create_table_from_csv_path(self, table_name: str, csv_path: str, role: str, storage: Optional[str] = None,
+                                   partition_by: Optional[List[str]] = None, append: bool = False) -> bool:
         """
         Create a table from a CSV file using DuckDB's native CSV reader.
         This avoids loading the entire CSV into memory via pandas for large files.
+
+        With ``storage="parquet"`` (default: CSV_TABLE_STORAGE) the rows are kept as
+        Parquet files under PARQUET_DIR/<role>/<table>/, optionally hive-partitioned
+        by ``partition_by``, and the table is a view over them. ``append`` adds the
+        rows to an existing table instead of replacing it.
         """
+        storage = storage or CSV_TABLE_STORAGE
+        existing = self._relation_type(table_name) if append else None
+        # Appends go wherever the table lives now; the storage setting applies on the next replace
+        if existing == "BASE TABLE":
+            storage = "table"
+        elif existing == "VIEW" and _current_parquet_generation(self.parquet_table_dir(role, table_name)):
+            storage = "parquet"
+        if storage == "parquet":
+            return self._write_parquet_table(table_name, csv_path, role, partition_by, append)
+        # Use read_csv_auto for robust schema inference; quoting and header handled automatically
+        select_sql = f"SELECT * FROM read_csv_auto({sql_literal(csv_path)}, header=True)"
+        if existing == "BASE TABLE":
+            return self._append_relation(table_name, f"INSERT INTO {table_name} {select_sql}", "CSV")
+        if self._replace_relation(table_name, role, select_sql, "CSV"):
+            self._remove_parquet_table(role, table_name)
+            return True
+        return False
+    
+    def create_table_from_parquet(self, table_name: str, parquet_path: str, role: str, as_view: bool = False) -> bool:
+        """
+        Create a table from a Parquet file, or with ``as_view`` a view that scans the file in place.
+        """
+        return self._replace_relation(
+            table_name, role, f"SELECT * FROM read_parquet({sql_literal(parquet_path)})", "Parquet", as_view
+        )
+    
+    def _relation_type(self, table_name: str) -> Optional[str]:
+        """
+        "BASE TABLE", "VIEW" or None when nothing of that name exists.
+        """
+        with self.write_cursor() as cursor:
+            row = cursor.execute(
+                "SELECT table_type FROM information_schema.tables WHERE table_schema = 'main' AND table_name = ?",
+                [table_name],
+            ).fetchone()
+        return row[0] if row else None
+    
+    def _replace_relation(self, table_name: str, role: str, select_sql: str, source: str,
+                          as_view: bool = False) -> bool:
+        """
+        Create or replace a table (or view) from a SELECT and register it for a role.
+        """
+        kind = "VIEW" if as_view else "TABLE"
         try:
-            conn = self.get_connection()
-            # Use read_csv_auto for robust schema inference; quoting and header handled automatically
-            # Use replace to handle re-uploads
-            conn.execute(
-                f"CREATE OR REPLACE TABLE {table_name} AS SELECT * FROM read_csv_auto(?, header=True)",
-                [csv_path],
-            )
-
-            self._upsert_table_metadata(table_name, role)
-            logger.info(f"Table {table_name} created from CSV for role {role}")
+            old_columns = self._get_table_columns(table_name)
+            with self.write_cursor() as cursor:
+                # CREATE OR REPLACE cannot turn a table into a view or back
+                existing = self._relation_type(table_name)
+                if existing and (existing == "VIEW") != as_view:
+                    cursor.execute(f"DROP {'VIEW' if existing == 'VIEW' else 'TABLE'} {table_name}")
+                # Use replace to handle re-uploads
+                cursor.execute(f"CREATE OR REPLACE {kind} {table_name} AS {select_sql}")
+                self._upsert_table_metadata(table_name, role)
+            self._relation_changed(table_name, old_columns)
+            logger.info("%s %s created from %s for role %s", kind.capitalize(), table_name, source, role)
+            return True
+        except Exception as e:
+            logger.error("Failed to create %s %s from %s: %s", kind.lower(), table_name, source, e)
+            return False
+    
+    def _append_relation(self, table_name: str, insert_sql: str, source: str) -> bool:
+        """
+        Append rows to an existing native table.
+        """
+        try:
+            old_columns = self._get_table_columns(table_name)
+            with self.write_cursor() as cursor:
+                cursor.execute(insert_sql)
+            self._relation_changed(table_name, old_columns)
+            logger.info("Appended %s rows to %s", source, table_name)
             return True
         except Exception as e:
-            logger.error(f"Failed to create table {table_name} from CSV: {e}")
+            logger.error("Failed to append %s rows to %s: %s", source, table_name, e)
             return False
     
+    def _relation_changed(self, table_name: str, old_columns: List[tuple]):
+        """
+        Expire the schema catalog, cached translations and data version after a write.
+        """
+        self.invalidate_schema_cache(table_name)
+        if old_columns and old_columns != self._get_table_columns(table_name):
+            self._purge_sql_translations(table_name)
+        self._table_version += 1
+    
+    @staticmethod
+    def parquet_table_dir(role: str, table_name: str) -> Path:
+        """
+        Directory holding the Parquet generations of a table.
+        """
+        return PARQUET_DIR / role / table_name
+    
+    def _write_parquet_table(self, table_name: str, csv_path: str, role: str,
+                             partition_by: Optional[List[str]], append: bool) -> bool:
+        """
+        Store a CSV as zstd-compressed Parquet and expose it as a view.
+
+        Every replace writes a new generation directory and swaps the view to it,
+        so readers never see a half-written table and nothing is rewritten in
+        the database file. An append adds one more file to the current
+        generation, keeping its partitioning.
+        """
+        table_dir = self.parquet_table_dir(role, table_name)
+        generation = _current_parquet_generation(table_dir) if append else None
+        if generation is not None and self._relation_type(table_name) == "VIEW":
+            partition_by = _parquet_partition_columns(generation)
+        else:
+            generation, append = table_dir / f"v{time.time_ns()}", False
+        partition_by = [column.strip() for column in partition_by or [] if column.strip()]
+        old_columns = self._get_table_columns(table_name) if append else []
+        try:
+            for column in partition_by:
+                if not _IDENTIFIER.match(column):
+                    raise ValueError(f"Invalid partition column: {column!r}")
+            generation.mkdir(parents=True, exist_ok=True)
+            self.export_csv_to_parquet(csv_path, str(generation), partition_by)
+        except Exception as e:
+            logger.error("Failed to write Parquet for %s: %s", table_name, e)
+            if not append:
+                shutil.rmtree(generation, ignore_errors=True)
+            return False
+        if append:
+            # The view's glob picks up the new file; only the caches need to expire
+            self._relation_changed(table_name, old_columns)
+            logger.info("Appended Parquet rows to %s", table_name)
+            return True
+
+        pattern = "**/*.parquet" if partition_by else "*.parquet"
+        hive = ", hive_partitioning = true" if partition_by else ""
+        select_sql = (
+            f"SELECT * FROM read_parquet({sql_literal(str(generation / pattern))}{hive}, union_by_name = true)"
+        )
+        if not self._replace_relation(table_name, role, select_sql, "Parquet", as_view=True):
+            shutil.rmtree(generation, ignore_errors=True)
+            return False
+        self._remove_parquet_table(role, table_name, keep=generation)
+        return True
+    
+    def _remove_parquet_table(self, role: str, table_name: str, keep: Optional[Path] = None):
+        """
+        Delete a table's Parquet generations other than ``keep``.
+        """
+        table_dir = self.parquet_table_dir(role, table_name)
+        if not table_dir.is_dir():
+            return
+        for generation in table_dir.iterdir():
+            if generation != keep:
+                shutil.rmtree(generation, ignore_errors=True)
+        if keep is None:
+            shutil.rmtree(table_dir, ignore_errors=True)
+    
+    def export_csv_to_parquet(self, csv_path: str, target: str, partition_by: Optional[List[str]] = None):
+        """
+        Convert a CSV file to zstd-compressed Parquet without touching the catalog.
+
+        ``target`` is a file, or with ``partition_by`` a directory that receives
+        one more hive-partitioned set of files (existing files are kept). A
+        directory target without partitioning gets a single new part file.
+
+        Runs on a cursor of its own rather than the writer, so conversions can
+        proceed in parallel with each other and with queries.
+        """
+        options = [
+            "FORMAT PARQUET",
+            f"COMPRESSION {PARQUET_COMPRESSION}",
+            f"ROW_GROUP_SIZE {int(PARQUET_ROW_GROUP_SIZE)}",
+        ]
+        if partition_by:
+            columns = ", ".join(f'"{column}"' for column in partition_by)
+            options += [f"PARTITION_BY ({columns})", "OVERWRITE_OR_IGNORE true", "FILENAME_PATTERN 'part_{uuid}'"]
+        elif Path(target).is_dir():
+            target = str(Path(target) / f"part_{uuid.uuid4().hex}.parquet")
+        cursor = self.get_connection().cursor()
+        try:
+            cursor.execute(
+                f"COPY (SELECT * FROM read_csv_auto({sql_literal(csv_path)}, header=True)) "
+                f"TO {sql_literal(target)} ({', '.join(options)})"
+            )
+        finally:
+            cursor.close()
+    
+    def _get_table_columns(self, table_name: str) -> List[tuple]:
+        """
+        Get (column name, data type) pairs of a table straight from information_schema.
+        """
+        # Read on the writer so table replacement never waits on the read pool
+        with self.write_cursor() as cursor:
+            return cursor.execute("""
+                SELECT column_name, data_type FROM information_schema.columns
+                WHERE table_schema = 'main' AND table_name = ?
+                ORDER BY ordinal_position
+            """, [table_name]).fetchall()
+    
+    def _purge_sql_translations(self, table_name: str):
+        """
+        Delete cached NL-to-SQL translations that reference a table whose schema changed.
+
+        The in-memory copies of the affected schema fingerprints are dropped too.
+        """
+        from app.backend.rag_utils.sql_cache import sql_translation_cache
+
+        try:
+            with self.write_cursor() as cursor:
+                rows = cursor.execute(
+                    "DELETE FROM sql_translation_cache WHERE list_contains(tables, ?) RETURNING schema_fingerprint",
+                    [table_name],
+                ).fetchall()
+            sql_translation_cache.forget(row[0] for row in rows)
+            logger.info("Purged %s cached SQL translations for changed table %s", len(rows), table_name)
+        except Exception as e:
+            logger.error("Failed to purge cached SQL translations: %s", e)
+    
     def _upsert_table_metadata(self, table_name: str, role: str):
         """
         Insert or update table metadata.
         """
         try:
-            conn = self.get_connection()
-            conn.execute("""
+            self.execute_write("""
                 INSERT INTO tables_metadata (table_name, role, updated_at)
                 VALUES (?, ?, now())
                 ON CONFLICT (table_name) 
@@ -213,7 +635,7 @@ class DatabaseManager:
                     updated_at = now()
             """, [table_name, role])
         except Exception as e:
-            logger.error(f"Failed to update table metadata: {e}")
+            logger.error("Failed to update table metadata: %s", e)
     
     def get_allowed_tables_for_role(self, role: str) -> List[str]:
         """
@@ -237,9 +659,69 @@ class DatabaseManager:
             
             return [row[0] for row in result]
         except Exception as e:
-            logger.error(f"Failed to get allowed tables for role {role}: {e}")
+            logger.error("Failed to get allowed tables for role %s: %s", role, e)
             return []
     
+    def get_table_schemas(self, table_names: List[str]) -> Dict[str, List[Tuple[str, str]]]:
+        """
+        Get (column name, data type) pairs for the given tables.
+        
+        Schemas come from DuckDB's information_schema for tables registered in
+        tables_metadata and are cached in memory until the table is replaced.
+        """
+        with self._schema_lock:
+            missing = [name for name in table_names if name not in self._schema_cache]
+        if missing:
+            self._load_table_schemas(missing)
+        with self._schema_lock:
+            return {
+                name: self._schema_cache[name]
+                for name in table_names
+                if self._schema_cache.get(name)
+            }
+    
+    def _load_table_schemas(self, table_names: List[str]):
+        """
+        Load schemas for the given tables into the catalog with a single query.
+        """
+        try:
+            rows = self.execute_query("""
+                SELECT c.table_name, c.column_name, c.data_type
+                FROM information_schema.columns AS c
+                JOIN tables_metadata AS m ON m.table_name = c.table_name
+                WHERE c.table_schema = 'main'
+                  AND list_contains(?, c.table_name)
+                ORDER BY c.table_name, c.ordinal_position
+            """, [table_names])
+        except Exception as e:
+            logger.error("Failed to load table schemas: %s", e)
+            return
+        
+        loaded: Dict[str, List[Tuple[str, str]]] = {}
+        for table_name, column_name, data_type in rows:
+            loaded.setdefault(table_name, []).append((column_name, data_type))
+        
+        with self._schema_lock:
+            for name in table_names:
+                # Unknown tables are cached as None so they are not looked up again
+                self._schema_cache[name] = loaded.get(name)
+    
+    def invalidate_schema_cache(self, table_name: Optional[str] = None):
+        """
+        Drop a table (or every table) from the in-memory schema catalog.
+        """
+        with self._schema_lock:
+            if table_name is None:
+                self._schema_cache.clear()
+            else:
+                self._schema_cache.pop(table_name, None)
+    
+    def get_table_version(self) -> int:
+        """
+        Get a counter that changes whenever table data is replaced.
+        """
+        return self._table_version
+    
     def is_database_healthy(self) -> bool:
         """
         Check if the database is in a healthy state.
@@ -252,60 +734,32 @@ class DatabaseManager:
             self.connection.execute("SELECT 1")
             return True
         except Exception as e:
-            logger.warning(f"Database health check failed: {e}")
+            logger.warning("Database health check failed: %s", e)
             return False
     
     def log_query(self, username: str, role: str, query_type: str, query_text: str, 
                   success: bool, error_message: Optional[str] = None):
         """
         Log a query for auditing purposes.
+        
+        The row is queued and written in bulk by a background thread, so this
+        never waits on DuckDB; see ``flush_query_log`` to wait for pending rows.
         """
         try:
-            # Check if database is healthy before logging
-            if not self.is_database_healthy():
-                logger.warning("Database not healthy, attempting to recover for logging")
-                try:
-                    self.safe_reset_connection()
-                except Exception as recovery_error:
-                    logger.error(f"Database recovery failed during logging: {recovery_error}")
-                    # Log to console as fallback
-                    logger.info(f"FALLBACK LOG: {username} ({role}) - {query_type}: {query_text} - Success: {success} - Error: {error_message}")
-                    return
-            
-            conn = self.get_connection()
-            
-            # Try to insert with auto-incrementing ID first
-            try:
-                conn.execute("""
-                    INSERT INTO query_log (username, role, query_type, query_text, success, error_message)
-                    VALUES (?, ?, ?, ?, ?, ?)
-                """, [username, role, query_type, query_text, success, error_message])
-            except Exception as id_error:
-                # If auto-increment fails, try to manually generate ID
-                logger.warning(f"Auto-increment failed, trying manual ID generation: {id_error}")
-                try:
-                    # Get the next available ID
-                    result = conn.execute("SELECT COALESCE(MAX(id), 0) + 1 FROM query_log").fetchone()
-                    next_id = result[0] if result else 1
-                    
-                    conn.execute("""
-                        INSERT INTO query_log (id, username, role, query_type, query_text, success, error_message)
-                        VALUES (?, ?, ?, ?, ?, ?, ?)
-                    """, [next_id, username, role, query_type, query_text, success, error_message])
-                except Exception as manual_error:
-                    logger.error(f"Manual ID generation also failed: {manual_error}")
-                    # Log to console as final fallback
-                    logger.info(f"FALLBACK LOG: {username} ({role}) - {query_type}: {query_text} - Success: {success} - Error: {error_message}")
-                    return
-            
-            logger.debug(f"Query logged successfully: {username} ({role}) - {query_type}")
-            
+            with stage("audit_log"):
+                self._query_log_writer.enqueue(username, role, query_type, query_text, success, error_message)
         except Exception as e:
-            logger.error(f"Failed to log query: {e}")
+            logger.error("Failed to log query: %s", e)
             # Log to console as fallback
-            logger.info(f"FALLBACK LOG: {username} ({role}) - {query_type}: {query_text} - Success: {success} - Error: {error_message}")
+            logger.info("FALLBACK LOG: %s (%s) - %s: %s - Success: %s - Error: %s", username, role, query_type, query_text, success, error_message)
             # Don't raise the exception - logging failure shouldn't break the main functionality
     
+    def flush_query_log(self, timeout: Optional[float] = None) -> bool:
+        """
+        Wait until all queued audit rows are written to query_log.
+        """
+        return self._query_log_writer.flush(timeout)
+    
     def safe_reset_connection(self):
         """Safely reset the database connection, handling WAL corruption."""
         try:
@@ -325,20 +779,26 @@ class DatabaseManager:
                 os.remove(wal_path)
                 logger.info("Removed potentially corrupted WAL file during reset")
         except Exception as e:
-            logger.warning(f"Could not remove WAL file during reset: {e}")
+            logger.warning("Could not remove WAL file during reset: %s", e)
         
         # Reinitialize the database
         self._initialize_database()
     
     def close_connection(self):
         """Close the database connection."""
+        # Pending audit rows need the connection, so write them out first;
+        # a fresh writer starts if the connection is reopened later
+        self._query_log_writer.close()
+        self._init_query_log_writer()
+        self._read_pool.close()
+        self._writer.close()
         if self.connection and not self._connection_closed:
             try:
                 self.connection.close()
                 self._connection_closed = True
                 logger.info("Database connection closed")
             except Exception as e:
-                logger.error(f"Error closing database connection: {e}")
+                logger.error("Error closing database connection: %s", e)
                 self._connection_closed = True
     
     def __enter__(self):
@@ -360,7 +820,7 @@ def get_db_manager() -> DatabaseManager:
         try:
             _db_manager = DatabaseManager()
         except Exception as e:
-            logger.error(f"Failed to initialize database manager: {e}")
+            logger.error("Failed to initialize database manager: %s", e)
             # Try to recover from WAL corruption
             if "WAL file" in str(e) or "Binder Error" in str(e):
                 logger.info("Attempting to recover from WAL corruption...")
@@ -377,12 +837,15 @@ def get_db_manager() -> DatabaseManager:
                     _db_manager = DatabaseManager()
                     logger.info("Successfully recovered from WAL corruption")
                 except Exception as recovery_error:
-                    logger.error(f"Recovery failed: {recovery_error}")
+                    logger.error("Recovery failed: %s", recovery_error)
                     # Create a minimal database manager for basic operations
                     _db_manager = DatabaseManager.__new__(DatabaseManager)
                     _db_manager.db_path = DUCKDB_PATH
                     _db_manager.connection = None
                     _db_manager._connection_closed = True
+                    _db_manager._init_schema_catalog()
+                    _db_manager._init_cursor_pools()
+                    _db_manager._init_query_log_writer()
                     logger.warning("Created minimal database manager due to initialization failure")
             else:
                 # For other errors, create a minimal manager
@@ -390,6 +853,23 @@ def get_db_manager() -> DatabaseManager:
                 _db_manager.db_path = DUCKDB_PATH
                 _db_manager.connection = None
                 _db_manager._connection_closed = True
+                _db_manager._init_schema_catalog()
+                _db_manager._init_cursor_pools()
+                _db_manager._init_query_log_writer()
                 logger.warning("Created minimal database manager due to initialization failure")
     
     return _db_manager
+
+# Bounded pool for blocking DuckDB calls made from async request handlers
+_db_executor = ThreadPoolExecutor(max_workers=DB_EXECUTOR_MAX_WORKERS, thread_name_prefix="duckdb")
+
+async def run_db(func, *args, **kwargs):
+    """
+    Run a blocking database call on the bounded DuckDB executor.
+
+    The call runs in a copy of the caller's context, so stages it records
+    land in the current request's trace.
+    """
+    loop = asyncio.get_running_loop()
+    context = contextvars.copy_context()
+    return await loop.run_in_executor(_db_executor, context.run, functools.partial(func, *args, **kwargs))
@@ -0,0 +1,207 @@
+"""
+Cursor pools over the shared DuckDB connection.
+
+DuckDB cursors (``connection.cursor()``) are independent connections to the
+same database and are safe to use from different threads, while a single
+connection object is not. ``CursorPool`` hands out cursors for reads, optionally
+inside a READ ONLY transaction, and ``WriterCursor`` serializes all writes on
+one dedicated cursor.
+
+Cursors are health-checked without extra statements: a cursor whose statement
+failed is discarded instead of being returned to the pool, and cursors created
+from a connection that has since been replaced are dropped on checkout.
+"""
+
+import logging
+import queue
+import threading
+import time
+from contextlib import contextmanager
+from typing import Callable, Optional
+
+logger = logging.getLogger(__name__)
+
+
+class PoolTimeoutError(TimeoutError):
+    """Raised when no cursor becomes available within the checkout timeout."""
+
+
+class _PooledCursor:
+    __slots__ = ("cursor", "parent", "last_used")
+
+    def __init__(self, cursor, parent):
+        self.cursor = cursor
+        self.parent = parent
+        self.last_used = time.monotonic()
+
+
+def _close_quietly(cursor):
+    try:
+        cursor.close()
+    except Exception:
+        pass
+
+
+class CursorPool:
+    """
+    Bounded pool of cursors created lazily from ``connection_factory()``.
+    """
+
+    def __init__(
+        self,
+        connection_factory: Callable,
+        size: int,
+        checkout_timeout: float,
+        max_idle_seconds: Optional[float] = None,
+        read_only: bool = False,
+        name: str = "duckdb",
+    ):
+        self.connection_factory = connection_factory
+        self.size = max(1, size)
+        self.checkout_timeout = checkout_timeout
+        self.max_idle_seconds = max_idle_seconds
+        self.read_only = read_only
+        self.name = name
+        self._idle: "queue.LifoQueue[_PooledCursor]" = queue.LifoQueue()
+        self._lock = threading.Lock()
+        self._available = threading.Semaphore(self.size)
+        self.stats = {"checkouts": 0, "created": 0, "discarded": 0, "timeouts": 0, "wait_seconds": 0.0}
+
+    def _is_usable(self, pooled: _PooledCursor, connection) -> bool:
+        if pooled.parent is not connection:
+            return False
+        if self.max_idle_seconds and time.monotonic() - pooled.last_used > self.max_idle_seconds:
+            return False
+        return True
+
+    def _acquire_cursor(self) -> _PooledCursor:
+        connection = self.connection_factory()
+        while True:
+            try:
+                pooled = self._idle.get_nowait()
+            except queue.Empty:
+                break
+            if self._is_usable(pooled, connection):
+                return pooled
+            self._discard(pooled)
+        pooled = _PooledCursor(connection.cursor(), connection)
+        with self._lock:
+            self.stats["created"] += 1
+        return pooled
+
+    def _discard(self, pooled: _PooledCursor):
+        _close_quietly(pooled.cursor)
+        with self._lock:
+            self.stats["discarded"] += 1
+
+    @contextmanager
+    def checkout(self):
+        """
+        Borrow a cursor for the duration of the block.
+
+        Raises PoolTimeoutError if every cursor stays busy for longer than the
+        checkout timeout. A cursor whose block raised is closed, not reused.
+        """
+        start = time.monotonic()
+        if not self._available.acquire(timeout=self.checkout_timeout):
+            with self._lock:
+                self.stats["timeouts"] += 1
+            raise PoolTimeoutError(
+                f"No {self.name} cursor available within {self.checkout_timeout}s (pool size {self.size})"
+            )
+        with self._lock:
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds"] += time.monotonic() - start
+        pooled = None
+        try:
+            pooled = self._acquire_cursor()
+            if self.read_only:
+                pooled.cursor.execute("BEGIN TRANSACTION READ ONLY")
+            yield pooled.cursor
+            if self.read_only:
+                pooled.cursor.execute("COMMIT")
+        except BaseException:
+            if pooled is not None:
+                self._discard(pooled)
+                pooled = None
+            raise
+        finally:
+            if pooled is not None:
+                pooled.last_used = time.monotonic()
+                self._idle.put(pooled)
+            self._available.release()
+
+    def stats_snapshot(self) -> dict:
+        with self._lock:
+            return dict(self.stats)
+
+    def close(self):
+        """Close idle cursors; cursors in use are closed when they are returned and found stale."""
+        while True:
+            try:
+                self._discard(self._idle.get_nowait())
+            except queue.Empty:
+                return
+
+
+class WriterCursor:
+    """
+    Single cursor that serializes every write.
+
+    The lock is re-entrant, so a write helper may call another one while it
+    already holds the writer. Stats have their own lock because a timed-out
+    checkout never holds the writer lock.
+    """
+
+    def __init__(self, connection_factory: Callable, checkout_timeout: float):
+        self.connection_factory = connection_factory
+        self.checkout_timeout = checkout_timeout
+        self._lock = threading.RLock()
+        self._pooled: Optional[_PooledCursor] = None
+        self._depth = 0
+        self._stats_lock = threading.Lock()
+        self.stats = {"checkouts": 0, "created": 0, "discarded": 0, "timeouts": 0, "wait_seconds": 0.0}
+
+    @contextmanager
+    def checkout(self):
+        start = time.monotonic()
+        if not self._lock.acquire(timeout=self.checkout_timeout):
+            with self._stats_lock:
+                self.stats["timeouts"] += 1
+            raise PoolTimeoutError(f"DuckDB writer busy for more than {self.checkout_timeout}s")
+        with self._stats_lock:
+            self.stats["checkouts"] += 1
+            self.stats["wait_seconds"] += time.monotonic() - start
+        self._depth += 1
+        try:
+            connection = self.connection_factory()
+            if self._pooled is None or self._pooled.parent is not connection:
+                if self._pooled is not None:
+                    _close_quietly(self._pooled.cursor)
+                self._pooled = _PooledCursor(connection.cursor(), connection)
+                with self._stats_lock:
+                    self.stats["created"] += 1
+            try:
+                yield self._pooled.cursor
+            except BaseException:
+                # Do not reuse a cursor that may be in a failed transaction;
+                # an outer block still holding it decides when it is done
+                if self._depth == 1 and self._pooled is not None:
+                    _close_quietly(self._pooled.cursor)
+                    self._pooled = None
+                    with self._stats_lock:
+                        self.stats["discarded"] += 1
+                raise
+        finally:
+            self._depth -= 1
+            self._lock.release()
+
+    def stats_snapshot(self) -> dict:
+        with self._stats_lock:
+            return dict(self.stats)
+
+    def close(self):
+        with self._lock:
+            if self._pooled is not None:
+                _close_quietly(self._pooled.cursor)
+                self._pooled = None
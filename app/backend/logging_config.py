@@ -0,0 +1,163 @@
+"""
+Process-wide logging setup for the backend.
+
+``configure_logging()`` replaces the per-module ``basicConfig`` calls. Records
+are put on an in-memory queue by a ``QueueHandler`` on the root logger, and a
+``QueueListener`` thread formats and writes them, so a request never waits on
+stdout. Records carry the request ID from ``app.backend.metrics`` and are
+written as JSON lines (or plain text with LOG_FORMAT=text). DEBUG records can
+be sampled per call site with LOG_DEBUG_SAMPLE_RATE so high-volume events such
+as generated SQL stay affordable when debug logging is on.
+
+Messages use lazy ``%`` formatting: arguments are only rendered for records
+that pass the level check.
+"""
+
+import atexit
+import itertools
+import json
+import logging
+import logging.handlers
+import queue
+import sys
+import threading
+from datetime import datetime, timezone
+from typing import Dict, Optional, Tuple
+
+from app.config import LOG_DEBUG_SAMPLE_RATE, LOG_FORMAT, LOG_LEVEL, LOG_QUEUE_MAX_SIZE
+from app.backend.metrics import get_request_id
+
+# Attributes every LogRecord has; anything else was passed through ``extra``
+_STANDARD_ATTRIBUTES = frozenset(vars(logging.LogRecord("", 0, "", 0, "", None, None))) | {"message", "asctime"}
+
+_listener: Optional[logging.handlers.QueueListener] = None
+_lock = threading.Lock()
+
+
+class RequestContextFilter(logging.Filter):
+    """Stamp records with the current request ID; runs in the thread that logged."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = get_request_id()
+        return True
+
+
+class DebugSamplingFilter(logging.Filter):
+    """
+    Keep one in ``1 / rate`` DEBUG records per call site, starting with the first.
+
+    Call sites are identified by logger name and message template, so
+    different events are sampled independently. Other levels always pass.
+    """
+
+    def __init__(self, rate: float = 1.0):
+        super().__init__()
+        self.every = max(1, round(1 / rate)) if rate > 0 else 0
+        self._counters: Dict[Tuple[str, str], itertools.count] = {}
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno != logging.DEBUG or self.every == 1:
+            return True
+        if self.every == 0:
+            return False
+        key = (record.name, str(record.msg))
+        counter = self._counters.get(key)
+        if counter is None:
+            counter = self._counters.setdefault(key, itertools.count())
+        return next(counter) % self.every == 0
+
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per record, including ``extra`` fields."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
+        }
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for key, value in vars(record).items():
+            if key not in _STANDARD_ATTRIBUTES and key != "request_id" and not key.startswith("_"):
+                entry[key] = value
+        if record.exc_info:
+            entry["exc_info"] = self.formatException(record.exc_info)
+        elif record.exc_text:
+            entry["exc_info"] = record.exc_text
+        return json.dumps(entry, default=str)
+
+
+class TextFormatter(logging.Formatter):
+    def __init__(self):
+        super().__init__("%(asctime)s %(levelname)s %(name)s [%(request_id)s] %(message)s")
+
+    def format(self, record: logging.LogRecord) -> str:
+        if not hasattr(record, "request_id"):
+            record.request_id = None
+        return super().format(record)
+
+
+class _DeferredQueueHandler(logging.handlers.QueueHandler):
+    """
+    QueueHandler that leaves formatting to the listener thread.
+
+    The message is rendered here (so mutable arguments are captured as they
+    were), but JSON encoding and I/O happen on the listener. When the queue is
+    full the record is dropped rather than blocking the request.
+    """
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        record.msg = record.getMessage()
+        record.args = None
+        if record.exc_info and not record.exc_text:
+            record.exc_text = logging.Formatter().formatException(record.exc_info)
+        # Tracebacks hold frames alive; the text is all the listener needs
+        record.exc_info = None
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            pass
+
+
+def configure_logging(level: str = LOG_LEVEL, fmt: str = LOG_FORMAT, stream=None,
+                      use_queue: bool = True, debug_sample_rate: float = LOG_DEBUG_SAMPLE_RATE) -> None:
+    """
+    Install the backend's handlers on the root logger, replacing any existing ones.
+
+    Safe to call again (e.g. from benchmarks) to switch level, format or stream.
+    """
+    global _listener
+    with _lock:
+        stop_logging()
+        output = logging.StreamHandler(stream or sys.stderr)
+        output.setFormatter(JsonFormatter() if fmt == "json" else TextFormatter())
+
+        root = logging.getLogger()
+        for handler in list(root.handlers):
+            root.removeHandler(handler)
+        if use_queue:
+            handler = _DeferredQueueHandler(queue.Queue(maxsize=LOG_QUEUE_MAX_SIZE))
+            _listener = logging.handlers.QueueListener(handler.queue, output, respect_handler_level=True)
+            _listener.start()
+        else:
+            handler = output
+        handler.addFilter(RequestContextFilter())
+        handler.addFilter(DebugSamplingFilter(debug_sample_rate))
+        root.addHandler(handler)
+        root.setLevel(level.upper() if isinstance(level, str) else level)
+
+
+def stop_logging() -> None:
+    """Flush queued records and stop the listener thread, if one is running."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+
+atexit.register(stop_logging)
@@ -1,33 +1,162 @@
 from pathlib import Path
+import asyncio
+import json
 import os
+import time
 import logging
 from datetime import datetime
+from contextlib import asynccontextmanager
 from fastapi import FastAPI, UploadFile, File, Form, HTTPException, Depends, BackgroundTasks
+from fastapi.responses import PlainTextResponse, StreamingResponse
 
 from app.config import (
     AVAILABLE_ROLES, ALLOWED_EXTENSIONS, 
-    MAX_FILE_SIZE, UPLOADS_DIR, RESOURCES_DIR
+    MAX_FILE_SIZE, UPLOADS_DIR, RESOURCES_DIR,
+    SPECULATIVE_EXECUTION_ENABLED, SPECULATIVE_POLICY, CSV_BOOTSTRAP_ENABLED
 )
 
 from app.backend.models import ChatRequest, ChatResponse, UploadResponse, AvailableDocsResponse, LoginResponse, HealthCheck, QueryType
 from app.backend.auth import authenticate_user, require_c_level_access, get_user_role_dependencies
-from app.backend.database import get_db_manager
-from app.backend.rag_utils.rag_module import run_indexer, vectorstore, get_rag_chain
-from app.backend.rag_utils.query_classifier import detect_query_type_llm
+from app.backend.database import get_db_manager, csv_table_name, run_db
+from app.backend.rag_utils.rag_module import run_indexer, rag_service, get_rag_chain, get_corpus_version, warm_up_rag_chains
+from app.backend.rag_utils.query_classifier import aclassify_query
 from app.backend.rag_utils.csv_query import ask_csv
-from app.backend.rag_utils.rag_chain import ask_rag
+from app.backend.rag_utils.rag_chain import ask_rag, astream_rag, reranker_api_key
 from app.backend.role_validator import validate_role_access
+from app.backend.answer_cache import answer_cache
+from app.backend.metrics import MetricsMiddleware, registry, stage, time_to_first_token_seconds
+from app.backend.logging_config import configure_logging
+from app.backend.csv_bootstrap import sync_resource_csvs
 
 # Configure logging
-logging.basicConfig(level=logging.INFO)
+configure_logging()
 logger = logging.getLogger(__name__)
 
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    # Shipped role CSVs must be queryable through SQL before the first request
+    if CSV_BOOTSTRAP_ENABLED:
+        await run_db(sync_resource_csvs)
+    # Heavy RAG clients are built here rather than at import time
+    if rag_service.startup():
+        # Build per-role RAG chains once so the first request of each role does not pay for it
+        chain_count = warm_up_rag_chains(AVAILABLE_ROLES, cohere_api_key=reranker_api_key())
+        logger.info("Warmed up %s RAG chains", chain_count)
+    yield
+    rag_service.shutdown()
+    # Audit rows are written in the background; do not lose the last batch
+    get_db_manager().flush_query_log(timeout=10)
+
 app = FastAPI(
     title="Agriculture RBAC-Project API",
     description="Role-Based Access Control System with RAG and SQL Querying for Agriculture Domain",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan
 )
 
+def _get_data_version(db_manager) -> str:
+    """Version stamp of the data answers depend on: RAG corpus and DuckDB tables."""
+    return f"{get_corpus_version()}:{db_manager.get_table_version()}"
+
+def _is_valid_answer(result: dict, mode: QueryType) -> bool:
+    return (
+        result.get("query_type") == mode
+        and not result.get("error")
+        and bool(result.get("answer", "").strip())
+    )
+
+async def _speculative_answer(question: str, role: str, username: str, page: int,
+                              preferred: QueryType, db_manager) -> tuple[dict, QueryType]:
+    """
+    Run the SQL and RAG handlers concurrently for a question of uncertain mode.
+
+    Returns the chosen result and its mode, or the RAG result and None when
+    neither handler produced a valid answer. The handler that loses is cancelled.
+    """
+    tasks = {
+        QueryType.SQL: asyncio.create_task(ask_csv(question, role, username, return_sql=True, page=page)),
+        QueryType.RAG: asyncio.create_task(ask_rag(question, role)),
+    }
+    results = {}
+
+    def collect(mode: QueryType) -> bool:
+        try:
+            results[mode] = tasks[mode].result()
+        except Exception as e:
+            logger.error("Speculative %s handler failed: %s", mode.value, e)
+            results[mode] = {"answer": "", "error": True, "query_type": QueryType.UNKNOWN}
+        valid = _is_valid_answer(results[mode], mode)
+        if not valid and mode == QueryType.SQL:
+            db_manager.log_query(username, role, QueryType.SQL.value, question, False, "SQL query blocked or failed")
+        return valid
+
+    try:
+        if SPECULATIVE_POLICY == "preferred":
+            # The classified mode wins when valid; the other one only replaces the sequential fallback
+            other = QueryType.RAG if preferred == QueryType.SQL else QueryType.SQL
+            for mode in (preferred, other):
+                await asyncio.wait([tasks[mode]])
+                if collect(mode):
+                    return results[mode], mode
+        else:
+            pending = set(tasks.values())
+            while pending:
+                done, pending = await asyncio.wait(pending, return_when=asyncio.FIRST_COMPLETED)
+                # Both may finish in the same step; prefer the classified mode then
+                for mode in sorted(tasks, key=lambda m: m != preferred):
+                    if tasks[mode] in done and collect(mode):
+                        return results[mode], mode
+    finally:
+        for task in tasks.values():
+            if not task.done():
+                task.cancel()
+    return results[QueryType.RAG], None
+
+async def _route_speculatively(question: str, role: str, username: str, page: int,
+                               mode: QueryType, db_manager) -> tuple[dict, QueryType, bool]:
+    """
+    Speculative routing with audit logging; returns (result, mode, fallback_used).
+
+    A race winner is logged as SQL_SPECULATIVE or RAG_SPECULATIVE, and the
+    result carries that ``log_type`` for the answer cache. Winning the race
+    says nothing about whether the other mode would have answered too, so
+    these rows are not used to train the query classifier.
+    """
+    logger.info("Uncertain query mode, running SQL and RAG concurrently for question: %s", question)
+    result, winner = await _speculative_answer(question, role, username, page, mode, db_manager)
+    if winner is None:
+        # Same outcome as the sequential SQL -> RAG fallback
+        db_manager.log_query(username, role, "RAG_FALLBACK", question, True)
+        return result, QueryType.UNKNOWN, True
+    log_type = f"{winner.value}_SPECULATIVE"
+    db_manager.log_query(username, role, log_type, question, True)
+    return {**result, "log_type": log_type}, winner, False
+
+def _permission_denied_answer(role: str) -> str:
+    return f"you don't have permission to access this type of information. As a {role} user, you can only access documents related to your role. Please contact your administrator if you need access to other information."
+
+def _sql_result_fields(result: dict) -> dict:
+    """Structured rows of the SQL result page, alongside the Markdown answer."""
+    if result.get("query_type") == QueryType.SQL:
+        return {key: result.get(key) for key in ("columns", "data", "page", "has_more")}
+    return {}
+
+def _cache_answer(question: str, role: str, data_version: str, mode: QueryType, fallback_used: bool,
+                  result: dict, sql_result: dict, question_embedding) -> None:
+    # Only cache real answers, never errors or "service unavailable" messages
+    if answer_cache is not None and result.get("query_type") in (QueryType.SQL, QueryType.RAG) and not result.get("error"):
+        answer_cache.put(question, role, data_version, {
+            "mode": mode.value,
+            "fallback": fallback_used,
+            "answer": result["answer"],
+            "sql": result.get("sql"),
+            "sql_result": sql_result,
+            "log_type": result.get("log_type") or ("RAG_FALLBACK" if fallback_used else mode.value),
+        }, question_embedding)
+
+def _ndjson(event: dict) -> str:
+    return json.dumps(event, default=str) + "\n"
+
 # -------------------------
 # === ROUTES ===
 # -------------------------
@@ -48,9 +177,17 @@ async def upload_docs(
     background_tasks: BackgroundTasks,
     file: UploadFile = File(...), 
     role: str = Form(...), 
+    append: bool = Form(False),
+    partition_by: str = Form(None),
     user=Depends(require_c_level_access)
 ):
-    """Upload documents (Admin only)"""
+    """
+    Upload documents (Admin only).
+
+    A CSV replaces the table of the same name unless ``append`` is set. With the
+    Parquet storage tier, ``partition_by`` (comma-separated columns) hive-partitions
+    a new table's files.
+    """
     try:
         filename = file.filename
         extension = Path(filename).suffix.lower()
@@ -96,11 +233,14 @@ async def upload_docs(
         if extension == ".csv":
             try:
                 # Generate a safe table name
-                raw_name = Path(filename).stem.replace("-", "_")
-                table_name = "".join(ch if (ch.isalnum() or ch == "_") else "_" for ch in raw_name)
+                table_name = csv_table_name(filename)
                 # Create table in database using DuckDB's CSV reader for performance
                 db_manager = get_db_manager()
-                success = db_manager.create_table_from_csv_path(table_name, str(filepath), role)
+                success = db_manager.create_table_from_csv_path(
+                    table_name, str(filepath), role,
+                    partition_by=partition_by.split(",") if partition_by else None,
+                    append=append,
+                )
                 if not success:
                     raise HTTPException(
                         status_code=500,
@@ -145,20 +285,46 @@ async def chat(req: ChatRequest, user=Depends(authenticate_user)):
 
     try:
         # Role-based access validation
-        validate_role_access(question, role, username, db_manager)
+        with stage("role_validation"):
+            validate_role_access(question, role, username, db_manager)
+        
+        # 0. Serve repeated questions from the answer cache (scoped to role, data version and page)
+        data_version = f"{_get_data_version(db_manager)}:p{req.page}"
+        question_embedding = None
+        if answer_cache is not None:
+            with stage("answer_cache"):
+                cached, question_embedding = await answer_cache.lookup(question, role, data_version)
+            if cached is not None:
+                logger.info("Answer cache hit for question: %s", question)
+                db_manager.log_query(username, role, cached["log_type"], question, True)
+                return ChatResponse(
+                    user=username,
+                    role=role,
+                    mode=cached["mode"],
+                    fallback=cached["fallback"],
+                    answer=cached["answer"],
+                    sql=cached["sql"],
+                    **cached["sql_result"]
+                )
         
         # 1. Detect mode: SQL or RAG
-        mode = detect_query_type_llm(question)
-        logger.info(f"Query mode detected: {mode.value} for question: {question}")
+        with stage("classification"):
+            mode, confident = await aclassify_query(question)
+        logger.info("Query mode detected: %s for question: %s", mode.value, question)
         
         result = {}
         fallback_used = False
 
         # 2. Route to appropriate handler
-        if mode == QueryType.SQL:
-            logger.info(f"Routing to SQL handler for question: {question}")
+        if SPECULATIVE_EXECUTION_ENABLED and not confident:
+            result, mode, fallback_used = await _route_speculatively(
+                question, role, username, req.page, mode, db_manager
+            )
+
+        elif mode == QueryType.SQL:
+            logger.info("Routing to SQL handler for question: %s", question)
             try:
-                result = await ask_csv(question, role, username, return_sql=True)
+                result = await ask_csv(question, role, username, return_sql=True, page=req.page)
 
                 # Check if SQL query failed or returned an error
                 if result.get("error") or not result.get("answer", "").strip() or "Only SELECT queries are allowed" in result.get("answer", ""):
@@ -168,7 +334,7 @@ async def chat(req: ChatRequest, user=Depends(authenticate_user)):
                 db_manager.log_query(username, role, QueryType.SQL.value, question, True)
 
             except Exception as e:
-                logger.info(f"SQL query failed, falling back to RAG: {str(e)}")
+                logger.info("SQL query failed, falling back to RAG: %s", str(e))
                 # Log failed SQL query
                 db_manager.log_query(username, role, QueryType.SQL.value, question, False, str(e))
                 
@@ -181,18 +347,22 @@ async def chat(req: ChatRequest, user=Depends(authenticate_user)):
                 db_manager.log_query(username, role, "RAG_FALLBACK", question, True)
 
         else:
-            logger.info(f"Routing to RAG handler for question: {question}")
+            logger.info("Routing to RAG handler for question: %s", question)
             result = await ask_rag(question, role)
             # Log RAG query
             db_manager.log_query(username, role, QueryType.RAG.value, question, True)
 
+        sql_result = _sql_result_fields(result)
+        _cache_answer(question, role, data_version, mode, fallback_used, result, sql_result, question_embedding)
+
         return ChatResponse(
             user=username,
             role=role,
             mode=mode.value,
             fallback=fallback_used,
             answer=result["answer"],
-            sql=result.get("sql")
+            sql=result.get("sql"),
+            **sql_result
         )
 
     except HTTPException as http_ex:
@@ -202,7 +372,7 @@ async def chat(req: ChatRequest, user=Depends(authenticate_user)):
             try:
                 db_manager.log_query(username, role, "BLOCKED", question, False, "Access denied by role validation")
             except Exception as log_error:
-                logger.error(f"Failed to log blocked query: {log_error}")
+                logger.error("Failed to log blocked query: %s", log_error)
             
             # Return user-friendly error message
             return ChatResponse(
@@ -210,7 +380,7 @@ async def chat(req: ChatRequest, user=Depends(authenticate_user)):
                 role=role,
                 mode=QueryType.UNKNOWN.value,
                 fallback=False,
-                answer=f"you don't have permission to access this type of information. As a {role} user, you can only access documents related to your role. Please contact your administrator if you need access to other information.",
+                answer=_permission_denied_answer(role),
                 sql=None
             )
         else:
@@ -221,10 +391,139 @@ async def chat(req: ChatRequest, user=Depends(authenticate_user)):
         try:
             db_manager.log_query(username, role, QueryType.UNKNOWN.value, question, False, str(e))
         except Exception as log_error:
-            logger.error(f"Failed to log failed query: {log_error}")
+            logger.error("Failed to log failed query: %s", log_error)
         
         raise HTTPException(status_code=500, detail=f"Query processing failed: {str(e)}")
 
+@app.post("/chat/stream")
+async def chat_stream(req: ChatRequest, user=Depends(authenticate_user)):
+    """
+    Streaming variant of /chat: newline-delimited JSON events.
+
+    Progress events ("mode", "fallback", "sql", "rows", "retrieved") arrive as
+    the pipeline advances, the answer arrives as "token" events (streamed from
+    the LLM for RAG answers, in one piece for SQL and cached answers), and a
+    final "done" event carries the /chat response fields plus time-to-first-token.
+    """
+    return StreamingResponse(
+        _chat_events(req, user.username, user.role),
+        media_type="application/x-ndjson",
+    )
+
+async def _chat_events(req: ChatRequest, username: str, role: str):
+    question = req.question
+    db_manager = get_db_manager()
+    start = time.perf_counter()
+    first_token_at = None
+
+    def token(text: str) -> str:
+        nonlocal first_token_at
+        if first_token_at is None:
+            first_token_at = time.perf_counter()
+        return _ndjson({"event": "token", "text": text})
+
+    def done(mode: QueryType, fallback_used: bool, answer: str, sql: str = None, **sql_result) -> str:
+        total_ms = (time.perf_counter() - start) * 1000
+        ttft_ms = (first_token_at - start) * 1000 if first_token_at is not None else None
+        if ttft_ms is not None:
+            time_to_first_token_seconds.observe(ttft_ms / 1000, mode.value)
+        logger.info("Streamed %s answer: time to first token %.0f ms, total %.0f ms", mode.value, ttft_ms or 0, total_ms)
+        response = ChatResponse(
+            user=username, role=role, mode=mode.value, fallback=fallback_used, answer=answer, sql=sql, **sql_result
+        )
+        return _ndjson({"event": "done", **response.model_dump(), "ttft_ms": ttft_ms, "total_ms": total_ms})
+
+    try:
+        try:
+            with stage("role_validation"):
+                validate_role_access(question, role, username, db_manager)
+        except HTTPException as http_ex:
+            if http_ex.status_code != 403:
+                raise
+            db_manager.log_query(username, role, "BLOCKED", question, False, "Access denied by role validation")
+            answer = _permission_denied_answer(role)
+            yield token(answer)
+            yield done(QueryType.UNKNOWN, False, answer)
+            return
+
+        data_version = f"{_get_data_version(db_manager)}:p{req.page}"
+        question_embedding = None
+        if answer_cache is not None:
+            with stage("answer_cache"):
+                cached, question_embedding = await answer_cache.lookup(question, role, data_version)
+            if cached is not None:
+                logger.info("Answer cache hit for question: %s", question)
+                db_manager.log_query(username, role, cached["log_type"], question, True)
+                yield _ndjson({"event": "mode", "mode": cached["mode"], "cached": True})
+                yield token(cached["answer"])
+                yield done(QueryType(cached["mode"]), cached["fallback"], cached["answer"], cached["sql"],
+                           **cached["sql_result"])
+                return
+
+        with stage("classification"):
+            mode, confident = await aclassify_query(question)
+        logger.info("Query mode detected: %s for question: %s", mode.value, question)
+        yield _ndjson({"event": "mode", "mode": mode.value, "confident": confident})
+
+        result = None
+        fallback_used = False
+        if SPECULATIVE_EXECUTION_ENABLED and not confident:
+            result, mode, fallback_used = await _route_speculatively(
+                question, role, username, req.page, mode, db_manager
+            )
+        elif mode == QueryType.SQL:
+            result = await ask_csv(question, role, username, return_sql=True, page=req.page)
+            if _is_valid_answer(result, QueryType.SQL):
+                db_manager.log_query(username, role, QueryType.SQL.value, question, True)
+            else:
+                logger.info("SQL query failed, falling back to streamed RAG")
+                db_manager.log_query(username, role, QueryType.SQL.value, question, False, "SQL query blocked or failed")
+                result = None
+                fallback_used = True
+                mode = QueryType.UNKNOWN
+                yield _ndjson({"event": "fallback", "mode": QueryType.RAG.value})
+
+        if result is not None:
+            if result.get("query_type") == QueryType.SQL:
+                yield _ndjson({"event": "sql", "sql": result.get("sql")})
+                yield _ndjson({
+                    "event": "rows",
+                    "columns": result.get("columns"),
+                    "row_count": len(result.get("data") or []),
+                    "page": result.get("page"),
+                    "has_more": result.get("has_more"),
+                })
+            yield token(result["answer"])
+        else:
+            parts = []
+            query_type = QueryType.UNKNOWN
+            async for event in astream_rag(question, role):
+                if event["event"] == "token":
+                    parts.append(event["text"])
+                    query_type = event["query_type"]
+                    yield token(event["text"])
+                else:
+                    yield _ndjson(event)
+            result = {"answer": "".join(parts), "query_type": query_type}
+            db_manager.log_query(username, role, "RAG_FALLBACK" if fallback_used else QueryType.RAG.value, question, True)
+
+        sql_result = _sql_result_fields(result)
+        _cache_answer(question, role, data_version, mode, fallback_used, result, sql_result, question_embedding)
+        yield done(mode, fallback_used, result["answer"], result.get("sql"), **sql_result)
+
+    except Exception as e:
+        logger.error("Streaming chat failed: %s", e)
+        try:
+            db_manager.log_query(username, role, QueryType.UNKNOWN.value, question, False, str(e))
+        except Exception as log_error:
+            logger.error("Failed to log failed query: %s", log_error)
+        yield _ndjson({"event": "error", "detail": f"Query processing failed: {str(e)}"})
+
+@app.get("/metrics", response_class=PlainTextResponse)
+def metrics():
+    """Request and per-stage latency histograms in the Prometheus text format"""
+    return PlainTextResponse(registry.render(), media_type="text/plain; version=0.0.4")
+
 @app.get("/health", response_model=HealthCheck)
 def health_check():
     """Health check endpoint"""
@@ -234,6 +533,9 @@ def health_check():
         timestamp=datetime.now().isoformat()
     )
 
+# Added last so that every route is known when labelling request metrics
+app.add_middleware(MetricsMiddleware, known_paths=[route.path for route in app.routes])
+
 if __name__ == "__main__":
     import uvicorn
     uvicorn.run(app, host="0.0.0.0", port=8000)
@@ -0,0 +1,255 @@
+"""
+Request metrics and per-stage latency tracing for the /chat pipeline.
+
+Stages of a request (auth, role validation, classification, SQL generation,
+DuckDB execution, retrieval, rerank, LLM generation, audit logging) are timed
+with ``stage(name)`` and recorded in process-wide histograms, which ``/metrics``
+exports in the Prometheus text format, together with the time to first token
+of streamed answers. The middleware gives every request an
+ID and a trace held in context variables, so stage timings recorded anywhere
+below it (including in worker threads started with a copied context) are
+attributed to the request without passing anything around. Nothing here
+depends on LangSmith.
+
+Recording a stage is two ``perf_counter`` calls, a bisect and a short locked
+update; ``bench/metrics_overhead.py`` measures the per-request cost.
+"""
+
+import bisect
+import logging
+import threading
+import time
+import uuid
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Callable, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from app.config import METRICS_ENABLED, METRICS_SLOW_REQUEST_SECONDS
+
+logger = logging.getLogger(__name__)
+
+# Seconds; spans cache hits (sub-millisecond) through slow LLM calls
+DEFAULT_BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+REQUEST_ID_HEADER = "x-request-id"
+
+request_id_var: ContextVar[Optional[str]] = ContextVar("request_id", default=None)
+_trace_var: ContextVar[Optional[List[Tuple[str, float]]]] = ContextVar("request_trace", default=None)
+
+
+def _format_labels(names: Sequence[str], values: Sequence[str], extra: str = "") -> str:
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    if extra:
+        pairs.append(extra)
+    return "{" + ",".join(pairs) + "}" if pairs else ""
+
+
+def _escape(value: str) -> str:
+    return str(value).replace("\\", "\\\\").replace("\n", "\\n").replace('"', '\\"')
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed buckets, one series per label value tuple.
+    """
+
+    def __init__(self, name: str, documentation: str, label_names: Sequence[str] = (),
+                 buckets: Sequence[float] = DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(label_names)
+        self.buckets = tuple(sorted(buckets))
+        self._lock = threading.Lock()
+        # label values -> [per-bucket counts (last one is +Inf), sum]
+        self._series: Dict[Tuple[str, ...], list] = {}
+
+    def observe(self, value: float, *label_values: str):
+        index = bisect.bisect_left(self.buckets, value)
+        with self._lock:
+            series = self._series.get(label_values)
+            if series is None:
+                series = self._series[label_values] = [[0] * (len(self.buckets) + 1), 0.0]
+            series[0][index] += 1
+            series[1] += value
+
+    def snapshot(self) -> Dict[Tuple[str, ...], Dict[str, float]]:
+        """Count and sum per label value tuple."""
+        with self._lock:
+            return {labels: {"count": sum(counts), "sum": total} for labels, (counts, total) in self._series.items()}
+
+    def render(self) -> List[str]:
+        lines = [f"# HELP {self.name} {self.documentation}", f"# TYPE {self.name} histogram"]
+        with self._lock:
+            series = [(labels, list(counts), total) for labels, (counts, total) in sorted(self._series.items())]
+        for labels, counts, total in series:
+            cumulative = 0
+            for bound, count in zip(self.buckets + (float("inf"),), counts):
+                cumulative += count
+                le = "+Inf" if bound == float("inf") else repr(bound)
+                bucket_labels = _format_labels(self.label_names, labels, f'le="{le}"')
+                lines.append(f"{self.name}_bucket{bucket_labels} {cumulative}")
+            lines.append(f"{self.name}_sum{_format_labels(self.label_names, labels)} {total}")
+            lines.append(f"{self.name}_count{_format_labels(self.label_names, labels)} {cumulative}")
+        return lines
+
+    def clear(self):
+        with self._lock:
+            self._series.clear()
+
+
+class MetricsRegistry:
+    """Histograms exported together by ``/metrics``."""
+
+    def __init__(self):
+        self._histograms: Dict[str, Histogram] = {}
+
+    def histogram(self, name: str, documentation: str, label_names: Iterable[str] = (),
+                  buckets: Sequence[float] = DEFAULT_BUCKETS) -> Histogram:
+        if name not in self._histograms:
+            self._histograms[name] = Histogram(name, documentation, tuple(label_names), buckets)
+        return self._histograms[name]
+
+    def render(self) -> str:
+        lines = []
+        for histogram in self._histograms.values():
+            lines.extend(histogram.render())
+        return "\n".join(lines) + "\n"
+
+    def clear(self):
+        for histogram in self._histograms.values():
+            histogram.clear()
+
+
+# Global registry and the histograms the backend records into
+registry = MetricsRegistry()
+stage_seconds = registry.histogram(
+    "agri_chat_stage_seconds", "Time spent in each stage of a chat request.", ["stage"]
+)
+time_to_first_token_seconds = registry.histogram(
+    "agri_chat_time_to_first_token_seconds", "Time from a /chat/stream request to its first answer token.",
+    ["mode"],
+)
+request_seconds = registry.histogram(
+    "agri_http_request_seconds", "End-to-end HTTP request time, including streamed bodies.",
+    ["method", "path", "status"],
+)
+
+
+# Called as listener(request_id, method, path, status, seconds, trace) after each request
+_request_listeners: List[Callable] = []
+
+
+def add_request_listener(listener: Callable):
+    """Receive every finished request with its stage trace, e.g. for benchmark percentiles."""
+    _request_listeners.append(listener)
+
+
+def remove_request_listener(listener: Callable):
+    if listener in _request_listeners:
+        _request_listeners.remove(listener)
+
+
+def get_request_id() -> Optional[str]:
+    """ID of the request being handled in this context, if any."""
+    return request_id_var.get()
+
+
+def record_stage(name: str, seconds: float):
+    """Record a stage timing in the histogram and the current request's trace."""
+    stage_seconds.observe(seconds, name)
+    trace = _trace_var.get()
+    if trace is not None:
+        trace.append((name, seconds))
+
+
+@contextmanager
+def stage(name: str):
+    """
+    Time the enclosed block as stage ``name``; failed blocks are recorded too.
+
+    Stages may nest (e.g. rerank inside retrieval), so they need not add up
+    to the request time.
+    """
+    if not METRICS_ENABLED:
+        yield
+        return
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        record_stage(name, time.perf_counter() - start)
+
+
+def format_trace(trace: Sequence[Tuple[str, float]]) -> str:
+    return ", ".join(f"{name}={seconds * 1000:.1f}ms" for name, seconds in trace)
+
+
+class MetricsMiddleware:
+    """
+    ASGI middleware: assigns request IDs, times requests and logs slow traces.
+
+    The request ID comes from the ``X-Request-ID`` header when present and is
+    echoed in the response. Timing ends when the last body chunk is sent, so
+    streamed responses are measured in full. Paths that match no route are
+    grouped under "unmatched" to keep label cardinality bounded.
+    """
+
+    def __init__(self, app, known_paths: Optional[Iterable[str]] = None):
+        self.app = app
+        self.known_paths = frozenset(known_paths or ())
+
+    def _path_label(self, scope) -> str:
+        route = scope.get("route")
+        if route is not None and getattr(route, "path", None):
+            return route.path
+        path = scope.get("path", "")
+        return path if not self.known_paths or path in self.known_paths else "unmatched"
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or not METRICS_ENABLED:
+            await self.app(scope, receive, send)
+            return
+
+        request_id = None
+        for key, value in scope.get("headers", ()):
+            if key == REQUEST_ID_HEADER.encode("latin-1"):
+                request_id = value.decode("latin-1")[:128]
+                break
+        request_id = request_id or uuid.uuid4().hex
+        trace: List[Tuple[str, float]] = []
+        id_token = request_id_var.set(request_id)
+        trace_token = _trace_var.set(trace)
+        status = 500
+        start = time.perf_counter()
+
+        async def send_with_request_id(message):
+            nonlocal status
+            if message["type"] == "http.response.start":
+                status = message["status"]
+                headers = list(message.get("headers", ()))
+                headers.append((REQUEST_ID_HEADER.encode("latin-1"), request_id.encode("latin-1")))
+                message = {**message, "headers": headers}
+            await send(message)
+
+        try:
+            await self.app(scope, receive, send_with_request_id)
+        finally:
+            elapsed = time.perf_counter() - start
+            path_label = self._path_label(scope)
+            request_seconds.observe(elapsed, scope.get("method", ""), path_label, str(status))
+            for listener in list(_request_listeners):
+                try:
+                    listener(request_id, scope.get("method", ""), path_label, status, elapsed, trace)
+                except Exception as e:
+                    logger.warning("Request listener failed: %s", e)
+            if elapsed >= METRICS_SLOW_REQUEST_SECONDS:
+                logger.warning(
+                    "Slow request %s %s %s: %.0fms (%s)",
+                    request_id, scope.get("method"), scope.get("path"), elapsed * 1000, format_trace(trace),
+                )
+            elif logger.isEnabledFor(logging.DEBUG):
+                logger.debug(
+                    "Request %s %s: %.1fms (%s)", request_id, scope.get("path"), elapsed * 1000, format_trace(trace)
+                )
+            _trace_var.reset(trace_token)
+            request_id_var.reset(id_token)
@@ -18,6 +18,7 @@ class QueryType(str, Enum):
 class ChatRequest(BaseModel):
     """Request model for chat queries."""
     question: str = Field(..., min_length=1, max_length=1000, description="The question to ask")
+    page: int = Field(1, ge=1, description="Result page for SQL answers")
     
     @validator('question')
     def validate_question(cls, v):
@@ -34,6 +35,10 @@ class ChatResponse(BaseModel):
     answer: str = Field(..., description="The answer to the question")
     sql: Optional[str] = Field(None, description="SQL query if applicable")
     error: Optional[str] = Field(None, description="Error message if any")
+    columns: Optional[List[str]] = Field(None, description="Column names of the SQL result page")
+    data: Optional[List[List[Any]]] = Field(None, description="Rows of the SQL result page")
+    page: Optional[int] = Field(None, description="SQL result page number")
+    has_more: Optional[bool] = Field(None, description="Whether further SQL result pages exist")
 
 class UserInfo(BaseModel):
     """Model for user information."""
@@ -83,6 +88,10 @@ class SQLQueryResult(BaseModel):
     error: Optional[bool] = Field(False, description="Whether an error occurred")
     columns: Optional[List[str]] = Field(None, description="Column names")
     data: Optional[List[List[Any]]] = Field(None, description="Query result data")
+    page: int = Field(1, description="Result page number")
+    page_size: Optional[int] = Field(None, description="Maximum rows per page")
+    has_more: bool = Field(False, description="Whether further pages exist")
+    truncated: bool = Field(False, description="Whether the page was cut short by the result size limit")
 
 class RAGQueryResult(BaseModel):
     """Model for RAG query results."""
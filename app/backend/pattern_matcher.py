@@ -0,0 +1,123 @@
+"""
+Multi-pattern matching for the role and RAG access policies.
+
+All blocking patterns and agriculture context indicators from
+``constants.py`` are compiled once into an Aho–Corasick automaton labelled
+with their category. One pass over the lowercased question returns every
+category with at least one pattern occurring in it (same substring semantics
+as ``pattern in question.lower()``), so the cost of a check no longer grows
+with the number of patterns. Results are cached per question, so the role
+validator and the RAG validator share the work within a request.
+"""
+
+from collections import deque
+from functools import lru_cache
+from typing import Dict, FrozenSet, Iterable, List, Mapping
+
+from app.backend.constants import (
+    FINANCE_BLOCKING_PATTERNS,
+    MARKET_BLOCKING_PATTERNS,
+    HR_BLOCKING_PATTERNS,
+    SUPPLY_CHAIN_BLOCKING_PATTERNS,
+    AGRICULTURE_CONTEXT_INDICATORS,
+    ROLE_BLOCKING_PATTERNS,
+)
+
+# Categories of the policy matcher
+FINANCE = "finance"
+MARKET = "market"
+HR = "hr"
+SUPPLY_CHAIN = "supply_chain"
+AGRICULTURE_CONTEXT = "agriculture_context"
+
+
+def role_blocking_category(role: str) -> str:
+    """Category of the RAG blocking patterns for ``role``."""
+    return f"role:{role}"
+
+
+class AhoCorasickMatcher:
+    """
+    Automaton over many patterns, each labelled with a category.
+    """
+
+    def __init__(self, patterns_by_category: Mapping[str, Iterable[str]]):
+        goto: List[Dict[str, int]] = [{}]
+        outputs: List[set] = [set()]
+        self.pattern_count = 0
+        for category, patterns in patterns_by_category.items():
+            for pattern in patterns:
+                pattern = pattern.lower()
+                if not pattern:
+                    continue
+                state = 0
+                for ch in pattern:
+                    nxt = goto[state].get(ch)
+                    if nxt is None:
+                        nxt = len(goto)
+                        goto[state][ch] = nxt
+                        goto.append({})
+                        outputs.append(set())
+                    state = nxt
+                outputs[state].add(category)
+                self.pattern_count += 1
+
+        # Breadth-first failure links; a state also reports its failure chain's categories
+        fail = [0] * len(goto)
+        queue = deque(goto[0].values())
+        while queue:
+            state = queue.popleft()
+            for ch, nxt in goto[state].items():
+                queue.append(nxt)
+                target = fail[state]
+                while target and ch not in goto[target]:
+                    target = fail[target]
+                fail[nxt] = goto[target].get(ch, 0)
+                outputs[nxt] |= outputs[fail[nxt]]
+
+        self._goto = goto
+        self._fail = fail
+        self._outputs = [frozenset(categories) for categories in outputs]
+
+    @property
+    def state_count(self) -> int:
+        return len(self._goto)
+
+    def match(self, text: str) -> FrozenSet[str]:
+        """Categories with at least one pattern occurring in ``text`` (case-insensitive)."""
+        goto, fail, outputs = self._goto, self._fail, self._outputs
+        found = set()
+        state = 0
+        for ch in text.lower():
+            while state and ch not in goto[state]:
+                state = fail[state]
+            state = goto[state].get(ch, 0)
+            if outputs[state]:
+                found |= outputs[state]
+        return frozenset(found)
+
+
+def policy_patterns() -> Dict[str, Iterable[str]]:
+    """Every pattern list from constants.py, keyed by matcher category."""
+    patterns = {
+        FINANCE: FINANCE_BLOCKING_PATTERNS,
+        MARKET: MARKET_BLOCKING_PATTERNS,
+        HR: HR_BLOCKING_PATTERNS,
+        SUPPLY_CHAIN: SUPPLY_CHAIN_BLOCKING_PATTERNS,
+        AGRICULTURE_CONTEXT: AGRICULTURE_CONTEXT_INDICATORS,
+    }
+    for role, role_patterns in ROLE_BLOCKING_PATTERNS.items():
+        patterns[role_blocking_category(role)] = role_patterns
+    return patterns
+
+
+@lru_cache(maxsize=1)
+def get_policy_matcher() -> AhoCorasickMatcher:
+    """Matcher over the policy patterns, built on first use."""
+    return AhoCorasickMatcher(policy_patterns())
+
+
+@lru_cache(maxsize=1024)
+def question_categories(question: str) -> FrozenSet[str]:
+    """Policy categories matched by ``question``; repeated checks of the same question are free."""
+    return get_policy_matcher().match(question)
@@ -1,72 +1,52 @@
-import re
 import tabulate
-from openai import OpenAI
-import pandas as pd
-from pathlib import Path
 import logging
+from functools import lru_cache
 
-from app.config import OPENAI_API_KEY, OPENAI_MODEL, FORBIDDEN_SQL_KEYWORDS
-from app.backend.database import get_db_manager
-from app.backend.models import QueryType
+from app.config import OPENAI_API_KEY, OPENAI_MODEL, SQL_RESULT_PAGE_SIZE
+from app.backend.database import get_db_manager, run_db
+from app.backend.metrics import stage
+from app.backend.models import QueryType, SQLQueryResult
+from app.backend.rag_utils.sql_cache import sql_translation_cache, schema_fingerprint
+from app.backend.rag_utils.sql_validator import sql_validator
 
 # Configure logging
 logger = logging.getLogger(__name__)
 
-# OpenAI setup
-client = OpenAI(api_key=OPENAI_API_KEY)
+# OpenAI setup - clients are created on first use to keep imports cheap
+@lru_cache(maxsize=None)
+def get_openai_client():
+    from openai import OpenAI
+    return OpenAI(api_key=OPENAI_API_KEY)
+
+@lru_cache(maxsize=None)
+def get_async_openai_client():
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=OPENAI_API_KEY)
 
 def get_allowed_tables_for_role(role: str) -> list[str]:
     """Get tables that a role can access."""
     db_manager = get_db_manager()
     return db_manager.get_allowed_tables_for_role(role)
 
-def extract_tables_from_sql(sql: str) -> list[str]:
-    # Extract tables used in FROM and JOIN clauses
-    return re.findall(r'FROM\s+(\w+)|JOIN\s+(\w+)', sql, flags=re.IGNORECASE)
+def _format_schema_block(table_schemas: dict) -> str:
+    schemas = []
+    for table_name, columns in table_schemas.items():
+        cols = ", ".join(f"{name} ({data_type})" for name, data_type in columns)
+        schemas.append(f"Table: {table_name}\nColumns: {cols}")
+    return "\n\n".join(schemas)
 
-def flatten_matches(matches: list[tuple]) -> list[str]:
-    return [item for tup in matches for item in tup if item]
+def build_schema_block(allowed_tables: list[str]) -> str:
+    """Build the schema section of the NL-to-SQL prompt from the cached schema catalog."""
+    db_manager = get_db_manager()
+    return _format_schema_block(db_manager.get_table_schemas(allowed_tables))
 
-def is_safe_query(sql: str) -> bool:
-    """Check if a SQL query is safe to execute."""
-    lowered = sql.strip().lower().rstrip(";")
-    return lowered.startswith("select") and all(word not in lowered for word in FORBIDDEN_SQL_KEYWORDS)
+def get_schema_context(allowed_tables: list[str]) -> tuple[str, str]:
+    """Get the prompt schema block and its fingerprint for the translation cache."""
+    table_schemas = get_db_manager().get_table_schemas(allowed_tables)
+    return _format_schema_block(table_schemas), schema_fingerprint(table_schemas)
 
-def translate_nl_to_sql(question: str, allowed_tables: list[str]) -> str:
-    print("translate_nl_to_sql() called")
-    
-    # Get schemas from agriculture resources folder
-    resources_path = Path("resources_2")
-    schemas = []
-    
-    # Check each agriculture role folder for CSV files
-    role_folders = [
-        "agriculture expert", "farmer", "field worker", "finance officer", 
-        "hr", "market analysis", "salesperson", "supply chain manager"
-    ]
-    
-    for role in role_folders:
-        role_path = resources_path / role
-        if role_path.exists():
-            for file_path in role_path.iterdir():
-                if file_path.suffix.lower() == ".csv":
-                    try:
-                        table_name = Path(file_path.name).stem.replace("-", "_")
-                        # Read CSV to get headers
-                        df = pd.read_csv(file_path)
-                        cols = ", ".join(df.columns.tolist())
-                        schemas.append(f"Table: {table_name}\nColumns: {cols}")
-                        print(f"Added schema for {table_name}: {cols}")
-                    except Exception as e:
-                        print(f"❌ Error while building schema for {file_path}: {e}")
-
-    print("Schemas:", schemas)
-
-    schema_block = "\n\n".join(schemas)
-    print("schema_block:\n", schema_block)
-
-    # Prompt for LLM
-    prompt = f"""
+def _build_sql_prompt(question: str, schema_block: str) -> str:
+    return f"""
     You are an agriculture expert assistant that converts natural language questions into safe SQL SELECT queries.
 
     Use only the following schemas:
@@ -85,67 +65,121 @@ def translate_nl_to_sql(question: str, allowed_tables: list[str]) -> str:
     SQL:
     """
 
+def _clean_sql_response(response_text: str) -> str:
+    response_text = (response_text or "").strip()
+    
+    # Clean up markdown code blocks if present
+    if response_text.startswith("```sql"):
+        response_text = response_text[6:]  # Remove ```sql
+    if response_text.startswith("```"):
+        response_text = response_text[3:]  # Remove ```
+    if response_text.endswith("```"):
+        response_text = response_text[:-3]  # Remove trailing ```
+    
+    response_text = response_text.strip()
+    
+    logger.debug("Raw SQL from LLM: %s", response_text)
+
+    return response_text
+
+def translate_nl_to_sql(question: str, allowed_tables: list[str]) -> str:
+    schema_block = build_schema_block(allowed_tables)
+    if not schema_block:
+        logger.info("No queryable tables available for this role, skipping SQL generation")
+        return "Error generating SQL"
+
+    logger.debug("schema_block:\n%s", schema_block)
+
     try:
-        response = client.chat.completions.create(
+        response = get_openai_client().chat.completions.create(
             model=OPENAI_MODEL,
-            messages=[{"role": "user", "content": prompt}],
+            messages=[{"role": "user", "content": _build_sql_prompt(question, schema_block)}],
             temperature=0
         )
         logger.info("LLM call successful")
-        
-        response_text = response.choices[0].message.content.strip()
-        
-        # Clean up markdown code blocks if present
-        if response_text.startswith("```sql"):
-            response_text = response_text[6:]  # Remove ```sql
-        if response_text.startswith("```"):
-            response_text = response_text[3:]  # Remove ```
-        if response_text.endswith("```"):
-            response_text = response_text[:-3]  # Remove trailing ```
-        
-        response_text = response_text.strip()
-        
-        logger.debug(f"Raw SQL from LLM: {response_text}")
-
-        return response_text
+        return _clean_sql_response(response.choices[0].message.content)
 
     except Exception as e:
-        logger.error(f"LLM call failed: {e}")
+        logger.error("LLM call failed: %s", e)
+        return "Error generating SQL"
+
+async def atranslate_nl_to_sql(question: str, allowed_tables: list[str], schema_block: str = None) -> str:
+    """Async variant of translate_nl_to_sql; catalog lookups run on the DB executor."""
+    if schema_block is None:
+        schema_block = await run_db(build_schema_block, allowed_tables)
+    if not schema_block:
+        logger.info("No queryable tables available for this role, skipping SQL generation")
         return "Error generating SQL"
 
-async def ask_csv(question: str, role: str, username: str, return_sql: bool = False) -> dict:
-    allowed_tables = get_allowed_tables_for_role(role)
+    logger.debug("schema_block:\n%s", schema_block)
 
     try:
-        sql = translate_nl_to_sql(question, allowed_tables)
-        print(f"[SQL GENERATED]:\n{sql}")
+        response = await get_async_openai_client().chat.completions.create(
+            model=OPENAI_MODEL,
+            messages=[{"role": "user", "content": _build_sql_prompt(question, schema_block)}],
+            temperature=0
+        )
+        logger.info("LLM call successful")
+        return _clean_sql_response(response.choices[0].message.content)
 
-        if not is_safe_query(sql):
-            return {"answer": "Only SELECT queries are allowed.", "error": True, "query_type": QueryType.UNKNOWN}
+    except Exception as e:
+        logger.error("LLM call failed: %s", e)
+        return "Error generating SQL"
 
-        raw_matches = extract_tables_from_sql(sql)
-        referenced_tables = flatten_matches(raw_matches)
+def _render_result_page(result: dict, page: int, page_size: int) -> str:
+    """Render one page of a limited SQL result as a Markdown table with a paging note."""
+    if not result["data"]:
+        return "Query executed, but no results found." if page == 1 else f"No results on page {page}."
+    markdown_table = tabulate.tabulate(result["data"], headers=result["columns"], tablefmt="github")
+    first_row = (page - 1) * page_size + 1
+    last_row = first_row + len(result["data"]) - 1
+    if result["truncated"]:
+        return f"{markdown_table}\n\n_Showing rows {first_row}-{last_row}; the page was cut short by the result size limit._"
+    if result["has_more"]:
+        return f"{markdown_table}\n\n_Showing rows {first_row}-{last_row}; more rows are available on page {page + 1}._"
+    return markdown_table
+
+async def ask_csv(question: str, role: str, username: str, return_sql: bool = False, page: int = 1) -> dict:
+    allowed_tables = await run_db(get_allowed_tables_for_role, role)
 
-        for table in referenced_tables:
-            if table not in allowed_tables:
-                return {"answer": f"Access denied to table: {table}", "error": True, "query_type": QueryType.UNKNOWN}
+    try:
+        with stage("sql_generation"):
+            schema_block, fingerprint = await run_db(get_schema_context, allowed_tables)
+            cached_sql = None
+            if schema_block:
+                cached_sql = await run_db(sql_translation_cache.lookup, question, fingerprint)
+            sql = cached_sql or await atranslate_nl_to_sql(question, allowed_tables, schema_block)
+        logger.debug("SQL generated:\n%s", sql)
+
+        # DuckDB's parser decides what the statement is and which tables it reads
+        validation = sql_validator.validate(sql, allowed_tables)
+        if not validation.allowed:
+            return {"answer": validation.reason, "error": True, "query_type": QueryType.UNKNOWN}
+        referenced_tables = validation.tables
 
         db_manager = get_db_manager()
-        result = db_manager.execute_query_with_columns(sql)
-        output = [list(row) for row in result["data"]]
-        columns = result["columns"]
-
-        markdown_table = tabulate.tabulate(output, headers=columns, tablefmt="github")
-        response = {
-            "answer": markdown_table if output else "Query executed, but no results found.",
-            "query_type": QueryType.SQL
-        }
-
-        if return_sql:
-            response["sql"] = sql
-
+        page_size = SQL_RESULT_PAGE_SIZE
+        # Row, byte and time limits are enforced by the database layer
+        with stage("duckdb_execution"):
+            result = await run_db(db_manager.execute_limited_query, sql, page_size, (page - 1) * page_size)
+
+        # Only SQL that validated and executed is worth reusing
+        if cached_sql is None:
+            await run_db(sql_translation_cache.store, question, fingerprint, sql, referenced_tables)
+
+        response = SQLQueryResult(
+            answer=_render_result_page(result, page, page_size),
+            sql=sql if return_sql else None,
+            columns=result["columns"],
+            data=result["data"],
+            page=page,
+            page_size=page_size,
+            has_more=result["has_more"],
+            truncated=result["truncated"],
+        ).model_dump()
+        response["query_type"] = QueryType.SQL
         return response
 
     except Exception as e:
-        logger.error(f"Error in ask_csv: {e}")
+        logger.error("Error in ask_csv: %s", e)
         return {"answer": f"❌ Error: {str(e)}", "error": True, "query_type": QueryType.UNKNOWN}
@@ -0,0 +1,203 @@
+"""
+Pluggable embedding backends behind a persistent, content-addressed cache.
+
+The backend is either OpenAI (``text-embedding-3-small``) or a local
+sentence-transformers model running on CPU. Either way it is wrapped in
+``CachedEmbeddings``: every document vector is stored in DuckDB under the hash
+of the model name and the text, so unchanged chunks re-read by the indexer
+are never embedded twice. Question vectors go to a small in-process LRU
+instead, so /chat neither touches DuckDB nor grows the table with one row per
+question. Hit rates and embedding throughput are kept in ``stats()``.
+"""
+
+import hashlib
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, List, Optional, Sequence
+
+from langchain_core.embeddings import Embeddings
+
+from app.backend.database import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+# Keys looked up per query against the cache table
+LOOKUP_BATCH_SIZE = 1000
+
+_INSERT_BATCH_SQL = """
+    INSERT OR IGNORE INTO embedding_cache (key, model, vector)
+    SELECT UNNEST(?::TEXT[]), ?, UNNEST(?::FLOAT[][])
+"""
+
+
+def embedding_cache_key(model_name: str, text: str) -> str:
+    """Content address of ``text`` embedded by ``model_name``."""
+    return hashlib.sha256(f"{model_name}\0{text}".encode("utf-8")).hexdigest()
+
+
+class EmbeddingCache:
+    """
+    Vectors keyed by content hash, stored as FLOAT[] (float32) rows in DuckDB.
+    """
+
+    def get_many(self, keys: Sequence[str]) -> Dict[str, List[float]]:
+        """Cached vectors for whichever of ``keys`` are present."""
+        found = {}
+        db_manager = get_db_manager()
+        for start in range(0, len(keys), LOOKUP_BATCH_SIZE):
+            rows = db_manager.execute_query(
+                "SELECT key, vector FROM embedding_cache WHERE key IN (SELECT unnest(?::VARCHAR[]))",
+                [list(keys[start:start + LOOKUP_BATCH_SIZE])],
+            )
+            found.update((key, list(vector)) for key, vector in rows)
+        return found
+
+    def put_many(self, model_name: str, keys: Sequence[str], vectors: Sequence[Sequence[float]]):
+        """
+        Store vectors; keys already cached are left as they are.
+
+        One vectorized statement per call, so the shared writer cursor is held
+        for a single insert rather than one per vector. ``keys`` must be unique.
+        """
+        if not keys:
+            return
+        with get_db_manager().write_cursor() as cursor:
+            cursor.execute(
+                _INSERT_BATCH_SQL,
+                [list(keys), model_name, [[float(v) for v in vector] for vector in vectors]],
+            )
+
+
+class LocalEmbeddings(Embeddings):
+    """
+    sentence-transformers model on CPU, loaded on first use; vectors are L2-normalized.
+    """
+
+    def __init__(self, model_name: str, device: str = "cpu", batch_size: int = 32):
+        self.model_name = model_name
+        self.device = device
+        self.batch_size = batch_size
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import SentenceTransformer
+                    self._model = SentenceTransformer(self.model_name, device=self.device)
+        return self._model
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        vectors = self.model.encode(
+            list(texts), batch_size=self.batch_size, normalize_embeddings=True, show_progress_bar=False
+        )
+        return vectors.tolist()
+
+    def embed_query(self, text: str) -> List[float]:
+        return self.embed_documents([text])[0]
+
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings that consult the cache first and only embed the misses.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache: Optional[EmbeddingCache] = None,
+                 query_cache_size: int = 1024):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache = cache or EmbeddingCache()
+        self.query_cache_size = query_cache_size
+        self._query_cache: "OrderedDict[str, List[float]]" = OrderedDict()
+        self._stats_lock = threading.Lock()
+        self._stats = {
+            "hits": 0, "misses": 0, "embed_seconds": 0.0, "cache_errors": 0,
+            "query_hits": 0, "query_misses": 0,
+        }
+
+    def _lookup(self, keys: List[str]) -> Dict[str, List[float]]:
+        try:
+            return self.cache.get_many(keys)
+        except Exception as e:
+            logger.warning("Embedding cache lookup failed: %s", e)
+            with self._stats_lock:
+                self._stats["cache_errors"] += 1
+            return {}
+
+    def _store(self, keys: List[str], vectors: List[List[float]]):
+        try:
+            self.cache.put_many(self.model_name, keys, vectors)
+        except Exception as e:
+            logger.warning("Embedding cache write failed: %s", e)
+            with self._stats_lock:
+                self._stats["cache_errors"] += 1
+
+    def embed_documents(self, texts: List[str]) -> List[List[float]]:
+        keys = [embedding_cache_key(self.model_name, text) for text in texts]
+        found = self._lookup(keys)
+        # Duplicate texts within a call are embedded once
+        missing = {key: text for key, text in zip(keys, texts) if key not in found}
+        if missing:
+            start = time.perf_counter()
+            vectors = self.embeddings.embed_documents(list(missing.values()))
+            elapsed = time.perf_counter() - start
+            found.update(zip(missing, vectors))
+            self._store(list(missing), vectors)
+        else:
+            elapsed = 0.0
+        with self._stats_lock:
+            self._stats["hits"] += len(keys) - len(missing)
+            self._stats["misses"] += len(missing)
+            self._stats["embed_seconds"] += elapsed
+        return [found[key] for key in keys]
+
+    def embed_query(self, text: str) -> List[float]:
+        """Question vectors are cached in memory only, bounded by ``query_cache_size``."""
+        with self._stats_lock:
+            vector = self._query_cache.get(text)
+            if vector is not None:
+                self._query_cache.move_to_end(text)
+                self._stats["query_hits"] += 1
+                return vector
+            self._stats["query_misses"] += 1
+        vector = self.embeddings.embed_query(text)
+        if self.query_cache_size > 0:
+            with self._stats_lock:
+                self._query_cache[text] = vector
+                self._query_cache.move_to_end(text)
+                while len(self._query_cache) > self.query_cache_size:
+                    self._query_cache.popitem(last=False)
+        return vector
+
+    def stats(self) -> Dict[str, float]:
+        with self._stats_lock:
+            lookups = self._stats["hits"] + self._stats["misses"]
+            return {
+                **self._stats,
+                "model": self.model_name,
+                "hit_rate": self._stats["hits"] / lookups if lookups else 0.0,
+                "embedded_per_second": (
+                    self._stats["misses"] / self._stats["embed_seconds"] if self._stats["embed_seconds"] else 0.0
+                ),
+            }
+
+
+def create_embeddings(backend: str, openai_model: str, local_model: str, device: str = "cpu",
+                      cache_enabled: bool = True, query_cache_size: int = 1024) -> Embeddings:
+    """
+    Build the configured backend ("openai" or "local"), wrapped in the cache unless disabled.
+    """
+    if backend == "local":
+        embeddings, model_name = LocalEmbeddings(local_model, device=device), f"local:{local_model}"
+    elif backend == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        embeddings, model_name = OpenAIEmbeddings(model=openai_model), f"openai:{openai_model}"
+    else:
+        raise ValueError(f"Unknown embedding backend: {backend!r}")
+    if not cache_enabled:
+        return embeddings
+    return CachedEmbeddings(embeddings, model_name, query_cache_size=query_cache_size)
@@ -0,0 +1,168 @@
+"""
+Streaming embedding pipeline for the RAG indexer.
+
+Chunks are pulled lazily from an iterator, embedded in fixed-size batches by a
+bounded pool of workers and upserted into the Chroma collection as each batch
+completes. At most ``max_concurrency`` batches are held at once, so memory
+stays flat regardless of corpus size. Embedding requests are paced by
+OPENAI_RATE_LIMIT (requests per minute), and rate-limited batches are retried
+with exponential backoff. An optional ``on_stored`` callback sees every stored
+batch, which is how the indexer keeps the BM25 keyword index in step.
+"""
+
+import itertools
+import logging
+import random
+import threading
+import time
+from concurrent.futures import FIRST_COMPLETED, ThreadPoolExecutor, wait
+from typing import Callable, Iterable, Iterator, List, Optional
+
+from app.config import EMBEDDING_BATCH_SIZE, EMBEDDING_MAX_CONCURRENCY, EMBEDDING_MAX_RETRIES
+from app.backend.rag_utils.secrets import OPENAI_RATE_LIMIT
+
+logger = logging.getLogger(__name__)
+
+# Minimum seconds between progress log lines
+PROGRESS_LOG_INTERVAL = 5.0
+
+
+def _parse_rate_limit(value) -> Optional[float]:
+    try:
+        rate = float(value)
+    except (TypeError, ValueError):
+        return None
+    return rate if rate > 0 else None
+
+
+def iter_batches(items: Iterable, size: int) -> Iterator[list]:
+    """Yield lists of up to ``size`` items without materializing the iterable."""
+    iterator = iter(items)
+    while True:
+        batch = list(itertools.islice(iterator, size))
+        if not batch:
+            return
+        yield batch
+
+
+def is_rate_limit_error(error: Exception) -> bool:
+    """True for OpenAI 429 responses, whichever client layer raised them."""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+class RequestRateLimiter:
+    """
+    Space requests evenly so that no more than ``requests_per_minute`` start per minute.
+    """
+
+    def __init__(self, requests_per_minute: Optional[float]):
+        self.interval = 60.0 / requests_per_minute if requests_per_minute else 0.0
+        self._next_start = 0.0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        if not self.interval:
+            return
+        with self._lock:
+            now = time.monotonic()
+            start = max(now, self._next_start)
+            self._next_start = start + self.interval
+        if start > now:
+            time.sleep(start - now)
+
+
+class EmbeddingPipeline:
+    """
+    Embed chunks in batches and upsert them into a Chroma collection.
+    """
+
+    def __init__(
+        self,
+        embeddings,
+        collection,
+        batch_size: int = EMBEDDING_BATCH_SIZE,
+        max_concurrency: int = EMBEDDING_MAX_CONCURRENCY,
+        requests_per_minute: Optional[float] = _parse_rate_limit(OPENAI_RATE_LIMIT),
+        max_retries: int = EMBEDDING_MAX_RETRIES,
+        backoff_base: float = 1.0,
+        backoff_max: float = 60.0,
+        on_stored: Optional[Callable[[List[str], List[str], List[dict]], None]] = None,
+    ):
+        self.embeddings = embeddings
+        self.collection = collection
+        self.batch_size = max(1, batch_size)
+        self.max_concurrency = max(1, max_concurrency)
+        self.max_retries = max_retries
+        self.backoff_base = backoff_base
+        self.backoff_max = backoff_max
+        self.rate_limiter = RequestRateLimiter(requests_per_minute)
+        self.on_stored = on_stored
+        self.stats = {"batches": 0, "chunks": 0, "retries": 0}
+
+    def _embed_with_retry(self, texts: List[str]) -> List[List[float]]:
+        for attempt in itertools.count():
+            self.rate_limiter.acquire()
+            try:
+                return self.embeddings.embed_documents(texts)
+            except Exception as e:
+                if not is_rate_limit_error(e) or attempt >= self.max_retries:
+                    raise
+                # Full jitter keeps concurrent workers from retrying in lockstep
+                delay = random.uniform(0, min(self.backoff_max, self.backoff_base * 2 ** attempt))
+                self.stats["retries"] += 1
+                logger.warning("Embedding rate limited, retry %s/%s in %.1fs", attempt + 1, self.max_retries, delay)
+                time.sleep(delay)
+
+    def _store(self, batch: list, vectors: List[List[float]]):
+        ids = [chunk_id for chunk_id, _ in batch]
+        documents = [doc.page_content for _, doc in batch]
+        metadatas = [doc.metadata or None for _, doc in batch]
+        self.collection.upsert(ids=ids, embeddings=vectors, documents=documents, metadatas=metadatas)
+        if self.on_stored is not None:
+            self.on_stored(ids, documents, metadatas)
+        self.stats["batches"] += 1
+        self.stats["chunks"] += len(batch)
+
+    def run(self, chunks: Iterable, chunk_ids: Iterable[str]) -> List[str]:
+        """
+        Embed and store ``chunks`` (Documents) under the matching ``chunk_ids``.
+
+        Both iterables are consumed lazily. Returns the IDs of the stored chunks.
+        """
+        batches = iter_batches(zip(chunk_ids, chunks), self.batch_size)
+        stored_ids = []
+        last_progress = time.monotonic()
+
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix="embed") as pool:
+            pending = {}
+
+            def submit_next() -> bool:
+                batch = next(batches, None)
+                if batch is None:
+                    return False
+                pending[pool.submit(self._embed_with_retry, [doc.page_content for _, doc in batch])] = batch
+                return True
+
+            try:
+                while len(pending) < self.max_concurrency and submit_next():
+                    pass
+                while pending:
+                    done, _ = wait(pending, return_when=FIRST_COMPLETED)
+                    for future in done:
+                        batch = pending.pop(future)
+                        # Writes happen on this thread only; workers just embed
+                        self._store(batch, future.result())
+                        stored_ids.extend(chunk_id for chunk_id, _ in batch)
+                        submit_next()
+                    if time.monotonic() - last_progress >= PROGRESS_LOG_INTERVAL:
+                        last_progress = time.monotonic()
+                        logger.info(
+                            "Embedded %s chunks in %s batches; collection has %s chunks",
+                            len(stored_ids), self.stats["batches"], self.collection.count(),
+                        )
+            except BaseException:
+                for future in pending:
+                    future.cancel()
+                raise
+
+        return stored_ids
@@ -0,0 +1,137 @@
+"""
+Hybrid retrieval: Chroma vector search fused with the in-process BM25 index.
+
+Both searches run concurrently over the same role filter and their rankings
+are merged with reciprocal rank fusion (RRF), which needs no score
+calibration between cosine distances and BM25 scores. An optional local
+cross-encoder (sentence-transformers) then reorders the fused candidates.
+"""
+
+import asyncio
+import contextvars
+import logging
+import threading
+from typing import Any, Dict, Iterable, List, Optional, Sequence, Tuple
+
+from langchain_core.callbacks import AsyncCallbackManagerForRetrieverRun, CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+
+from app.backend.metrics import stage
+
+logger = logging.getLogger(__name__)
+
+
+def reciprocal_rank_fusion(rankings: Iterable[Sequence[str]], rrf_k: int = 60) -> List[Tuple[str, float]]:
+    """
+    Merge rankings of IDs; each ID scores sum(1 / (rrf_k + rank)) over the rankings it appears in.
+    """
+    scores: Dict[str, float] = {}
+    for ranking in rankings:
+        for rank, item_id in enumerate(ranking, start=1):
+            scores[item_id] = scores.get(item_id, 0.0) + 1.0 / (rrf_k + rank)
+    return sorted(scores.items(), key=lambda item: -item[1])
+
+
+class LocalCrossEncoderReranker:
+    """
+    Scores (question, chunk) pairs with a sentence-transformers CrossEncoder, loaded on first use.
+    """
+
+    def __init__(self, model_name: str):
+        self.model_name = model_name
+        self._model = None
+        self._lock = threading.Lock()
+
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from sentence_transformers import CrossEncoder
+                    self._model = CrossEncoder(self.model_name)
+        return self._model
+
+    def rerank(self, query: str, documents: List[Document], top_n: int) -> List[Document]:
+        if not documents:
+            return documents
+        with stage("rerank"):
+            scores = self.model.predict([(query, doc.page_content) for doc in documents])
+        order = sorted(range(len(documents)), key=lambda i: -float(scores[i]))
+        return [documents[i] for i in order[:top_n]]
+
+
+_local_rerankers: Dict[str, Optional[LocalCrossEncoderReranker]] = {}
+
+
+def get_local_reranker(model_name: str) -> Optional[LocalCrossEncoderReranker]:
+    """
+    Shared reranker for ``model_name``, or None when unset or sentence-transformers is missing.
+    """
+    if not model_name:
+        return None
+    if model_name not in _local_rerankers:
+        try:
+            import sentence_transformers  # noqa: F401
+            _local_rerankers[model_name] = LocalCrossEncoderReranker(model_name)
+        except ImportError:
+            logger.warning("sentence-transformers is not installed; local reranker %s disabled", model_name)
+            _local_rerankers[model_name] = None
+    return _local_rerankers[model_name]
+
+
+class HybridRetriever(BaseRetriever):
+    """
+    Top ``k`` chunks by RRF over vector and BM25 rankings of ``fetch_k`` candidates each.
+    """
+
+    vectorstore: Any
+    keyword_index: Any
+    k: int = 4
+    fetch_k: int = 20
+    search_filter: Dict[str, Any] = {}
+    rrf_k: int = 60
+    reranker: Optional[Any] = None
+
+    def _keyword_documents(self, query: str) -> List[Document]:
+        hits = self.keyword_index.search(query, self.fetch_k, self.search_filter or None)
+        return [
+            Document(id=chunk_id, page_content=text, metadata=metadata)
+            for chunk_id, text, metadata in self.keyword_index.get_documents(chunk_id for chunk_id, _ in hits)
+        ]
+
+    def _fuse(self, query: str, vector_docs: List[Document], keyword_docs: List[Document]) -> List[Document]:
+        by_id: Dict[str, Document] = {}
+        rankings = []
+        for docs in (vector_docs, keyword_docs):
+            ranking = []
+            for doc in docs:
+                # Chunks without an ID (not written by the indexer) are keyed by their text
+                doc_id = doc.id or doc.page_content
+                by_id.setdefault(doc_id, doc)
+                ranking.append(doc_id)
+            rankings.append(ranking)
+        fused = [by_id[doc_id] for doc_id, _ in reciprocal_rank_fusion(rankings, self.rrf_k)]
+        if self.reranker is not None:
+            return self.reranker.rerank(query, fused[:self.fetch_k], self.k)
+        return fused[:self.k]
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> List[Document]:
+        vector_docs = self.vectorstore.similarity_search(query, k=self.fetch_k, filter=self.search_filter or None)
+        return self._fuse(query, vector_docs, self._keyword_documents(query))
+
+    async def _aget_relevant_documents(
+        self, query: str, *, run_manager: AsyncCallbackManagerForRetrieverRun
+    ) -> List[Document]:
+        loop = asyncio.get_running_loop()
+        # Executor calls run in a copy of the context so their stages reach the request trace
+        vector_docs, keyword_docs = await asyncio.gather(
+            self.vectorstore.asimilarity_search(query, k=self.fetch_k, filter=self.search_filter or None),
+            loop.run_in_executor(None, contextvars.copy_context().run, self._keyword_documents, query),
+        )
+        if self.reranker is None:
+            return self._fuse(query, vector_docs, keyword_docs)
+        # Cross-encoder inference is CPU-bound; keep it off the event loop
+        return await loop.run_in_executor(
+            None, contextvars.copy_context().run, self._fuse, query, vector_docs, keyword_docs
+        )
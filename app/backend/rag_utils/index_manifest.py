@@ -0,0 +1,112 @@
+"""
+Index manifest for incremental RAG indexing.
+
+The manifest records every source file that has been indexed into the vector
+store, keyed by path, together with the mtime, size and content hash seen at
+indexing time and the deterministic IDs of the chunks produced from it.
+"""
+
+import hashlib
+import itertools
+import json
+import logging
+import os
+from pathlib import Path
+from typing import Dict, Any, Iterator, List, Optional
+
+logger = logging.getLogger(__name__)
+
+MANIFEST_VERSION = 1
+
+
+def hash_file(file_path: Path, block_size: int = 1024 * 1024) -> str:
+    """
+    Compute the SHA-256 content hash of a file without loading it into memory.
+    """
+    digest = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        for block in iter(lambda: f.read(block_size), b""):
+            digest.update(block)
+    return digest.hexdigest()
+
+
+def iter_chunk_ids(file_key: str, content_hash: str) -> Iterator[str]:
+    """
+    Yield deterministic chunk IDs for a file version, one per chunk in order.
+
+    The same file content always maps to the same IDs, so chunks of a replaced
+    or removed file can be deleted without querying the vector store.
+    """
+    path_digest = hashlib.sha1(file_key.encode("utf-8")).hexdigest()[:16]
+    for i in itertools.count():
+        yield f"{path_digest}-{content_hash[:16]}-{i}"
+
+
+def make_chunk_ids(file_key: str, content_hash: str, count: int) -> List[str]:
+    """Build the first ``count`` deterministic chunk IDs for a file version."""
+    return list(itertools.islice(iter_chunk_ids(file_key, content_hash), count))
+
+
+class IndexManifest:
+    """Persistent record of indexed files and the chunks they produced."""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self.files: Dict[str, Dict[str, Any]] = {}
+        self.exists = False
+
+    def load(self) -> "IndexManifest":
+        """Load the manifest from disk; a missing or unreadable file yields an empty manifest."""
+        self.files = {}
+        self.exists = self.path.exists()
+        if not self.exists:
+            return self
+        try:
+            with open(self.path, "r", encoding="utf-8") as f:
+                payload = json.load(f)
+            if payload.get("version") == MANIFEST_VERSION:
+                self.files = payload.get("files", {})
+            else:
+                logger.warning("Ignoring index manifest with unsupported version: %s", payload.get("version"))
+                self.exists = False
+        except Exception as e:
+            logger.warning("Could not read index manifest %s: %s", self.path, e)
+            self.exists = False
+        return self
+
+    def save(self):
+        """Atomically write the manifest to disk."""
+        self.path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = self.path.with_suffix(self.path.suffix + ".tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump({"version": MANIFEST_VERSION, "files": self.files}, f, indent=2, sort_keys=True)
+        os.replace(tmp_path, self.path)
+        self.exists = True
+
+    def get(self, file_key: str) -> Optional[Dict[str, Any]]:
+        return self.files.get(file_key)
+
+    def set(self, file_key: str, role: str, stat: os.stat_result, content_hash: str, chunk_ids: List[str],
+            skip_reason: Optional[str] = None):
+        """Record a file; ``skip_reason`` marks one deliberately left unembedded, to be re-checked."""
+        self.files[file_key] = {
+            "role": role,
+            "mtime_ns": stat.st_mtime_ns,
+            "size": stat.st_size,
+            "content_hash": content_hash,
+            "chunk_ids": chunk_ids,
+        }
+        if skip_reason:
+            self.files[file_key]["skip_reason"] = skip_reason
+
+    def remove(self, file_key: str) -> Optional[Dict[str, Any]]:
+        return self.files.pop(file_key, None)
+
+    @staticmethod
+    def is_stat_unchanged(entry: Dict[str, Any], role: str, stat: os.stat_result) -> bool:
+        """Cheap change check that avoids hashing files whose mtime and size are unchanged."""
+        return (
+            entry.get("role") == role
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+            and entry.get("size") == stat.st_size
+        )
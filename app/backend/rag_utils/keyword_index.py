@@ -0,0 +1,153 @@
+"""
+In-process BM25 index over the chunks stored in the Chroma collection.
+
+Vector search ranks chunks by meaning, which blurs exact agronomy terms
+(pesticide names, crop varieties, scheme acronyms) into their neighbours.
+This inverted index scores the same chunks by term overlap instead, so the
+hybrid retriever can fuse both rankings without another network hop. The
+indexer keeps it in step with the collection: chunks are added as they are
+upserted and removed by the same IDs; on startup it is rebuilt from the
+collection in pages.
+"""
+
+import logging
+import math
+import re
+import threading
+from collections import Counter, defaultdict
+from typing import Dict, Iterable, List, Mapping, Optional, Sequence, Tuple
+
+logger = logging.getLogger(__name__)
+
+# Letters and digits, keeping hyphenated and dotted terms (e.g. "2,4-d", "co-51") whole
+_TOKEN = re.compile(r"[a-z0-9]+(?:[-.][a-z0-9]+)*")
+
+# Function words that carry no retrieval signal
+STOPWORDS = frozenset(
+    "a an and are as at be but by can do does for from has have how i if in into is it its "
+    "me my of on or our should so than that the their them then there these they this to "
+    "was we what when where which who why will with you your".split()
+)
+
+# Chunks fetched per collection.get() call when rebuilding
+REBUILD_PAGE_SIZE = 1000
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased terms without stopwords; compound terms also yield their parts."""
+    tokens = []
+    for term in _TOKEN.findall((text or "").lower()):
+        if term in STOPWORDS:
+            continue
+        tokens.append(term)
+        if "-" in term or "." in term:
+            tokens.extend(part for part in re.split(r"[-.]", term) if part and part not in STOPWORDS)
+    return tokens
+
+
+class BM25Index:
+    """
+    Okapi BM25 over an inverted index, with per-chunk text and metadata for filtering.
+    """
+
+    def __init__(self, k1: float = 1.5, b: float = 0.75):
+        self.k1 = k1
+        self.b = b
+        self._lock = threading.RLock()
+        self._postings: Dict[str, Dict[str, int]] = defaultdict(dict)
+        self._lengths: Dict[str, int] = {}
+        self._documents: Dict[str, Tuple[str, dict]] = {}
+        self._total_length = 0
+
+    def __len__(self) -> int:
+        return len(self._lengths)
+
+    def add(self, ids: Sequence[str], texts: Sequence[str], metadatas: Optional[Sequence[Mapping]] = None):
+        """Index chunks; an existing ID is replaced, matching Chroma's upsert."""
+        metadatas = metadatas or [None] * len(ids)
+        with self._lock:
+            self._remove(ids)
+            for chunk_id, text, metadata in zip(ids, texts, metadatas):
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    self._postings[term][chunk_id] = tf
+                length = sum(counts.values())
+                self._lengths[chunk_id] = length
+                self._total_length += length
+                self._documents[chunk_id] = (text, dict(metadata or {}))
+
+    def remove(self, ids: Iterable[str]) -> int:
+        """Drop chunks by ID; returns how many were indexed."""
+        with self._lock:
+            return self._remove(ids)
+
+    def _remove(self, ids: Iterable[str]) -> int:
+        removed = 0
+        for chunk_id in ids:
+            entry = self._documents.pop(chunk_id, None)
+            if entry is None:
+                continue
+            for term in set(tokenize(entry[0])):
+                postings = self._postings.get(term)
+                if postings is not None:
+                    postings.pop(chunk_id, None)
+                    if not postings:
+                        del self._postings[term]
+            self._total_length -= self._lengths.pop(chunk_id)
+            removed += 1
+        return removed
+
+    def clear(self):
+        with self._lock:
+            self._postings.clear()
+            self._lengths.clear()
+            self._documents.clear()
+            self._total_length = 0
+
+    def search(self, query: str, k: int = 4, where: Optional[Mapping] = None) -> List[Tuple[str, float]]:
+        """
+        Top ``k`` (chunk ID, score) pairs for ``query``, best first.
+
+        ``where`` is an equality filter on chunk metadata, like the role filter
+        passed to Chroma.
+        """
+        terms = set(tokenize(query))
+        with self._lock:
+            count = len(self._lengths)
+            if not count or not terms:
+                return []
+            average_length = self._total_length / count
+            scores: Dict[str, float] = defaultdict(float)
+            for term in terms:
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (count - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = self.k1 * (1 - self.b + self.b * self._lengths[chunk_id] / average_length)
+                    scores[chunk_id] += idf * tf * (self.k1 + 1) / (tf + norm)
+            if where:
+                scores = {
+                    chunk_id: score for chunk_id, score in scores.items()
+                    if all(self._documents[chunk_id][1].get(key) == value for key, value in where.items())
+                }
+        return sorted(scores.items(), key=lambda item: (-item[1], item[0]))[:k]
+
+    def get_documents(self, ids: Iterable[str]) -> List[Tuple[str, str, dict]]:
+        """(chunk ID, text, metadata) for the indexed IDs among ``ids``, in order."""
+        with self._lock:
+            return [(chunk_id, *self._documents[chunk_id]) for chunk_id in ids if chunk_id in self._documents]
+
+    def rebuild_from_collection(self, collection, page_size: int = REBUILD_PAGE_SIZE) -> int:
+        """Replace the index with every chunk in a Chroma collection; returns the chunk count."""
+        with self._lock:
+            self.clear()
+            offset = 0
+            while True:
+                page = collection.get(include=["documents", "metadatas"], limit=page_size, offset=offset)
+                if not page["ids"]:
+                    break
+                self.add(page["ids"], [text or "" for text in page["documents"]], page["metadatas"])
+                offset += len(page["ids"])
+            logger.info("Built BM25 index over %s chunks", len(self))
+            return len(self)
@@ -0,0 +1,242 @@
+"""
+Local SQL-vs-RAG query classifier.
+
+TF-IDF over word unigrams and bigrams feeding a logistic regression, both in
+plain numpy. It is trained from a built-in seed set plus the outcomes recorded
+in ``query_log`` (a question answered by SQL is an SQL example, one that fell
+back to RAG or went straight to RAG is a RAG example), and saved to a single
+``.npz`` file that loads in a few milliseconds.
+
+Retrain from the current query_log with:
+    python -m app.backend.rag_utils.local_classifier
+"""
+
+import logging
+import re
+import threading
+from collections import Counter, defaultdict
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+from app.config import LOCAL_CLASSIFIER_PATH
+from app.backend.models import QueryType
+
+logger = logging.getLogger(__name__)
+
+_TOKEN = re.compile(r"[a-z0-9]+")
+
+# Labeled questions the model always trains on, so it works before any history exists
+SEED_EXAMPLES: List[Tuple[str, str]] = [
+    ("How many employees are listed in the HR dataset?", "SQL"),
+    ("What is the total number of records in the table?", "SQL"),
+    ("What is the average yield per hectare for rice in each district?", "SQL"),
+    ("List all farmers in Madurai with more than 5 acres", "SQL"),
+    ("Count the number of field workers hired in 2023", "SQL"),
+    ("Show the top 10 crops by production", "SQL"),
+    ("Which district has the highest wheat yield?", "SQL"),
+    ("Which employees earn more than 50000?", "SQL"),
+    ("What is the sum of expenses for fertilizer last quarter?", "SQL"),
+    ("Give me the details of employee Ravi Kumar", "SQL"),
+    ("What is the maximum market price of cotton this year?", "SQL"),
+    ("What is the minimum temperature recorded in Salem?", "SQL"),
+    ("Show monthly sales grouped by region", "SQL"),
+    ("How many shipments were delayed in March?", "SQL"),
+    ("What percent of the budget was spent on irrigation?", "SQL"),
+    ("Compare revenue between kharif and rabi seasons", "SQL"),
+    ("Which supplier delivered the most seed bags?", "SQL"),
+    ("List employees ordered by joining date", "SQL"),
+    ("What is the median salary of agriculture experts?", "SQL"),
+    ("Show all records where yield is less than 2000 kg", "SQL"),
+    ("How much rainfall did Erode get in July?", "SQL"),
+    ("Number of tractors owned per village", "SQL"),
+    ("What was the average price of onions in the last 6 months?", "SQL"),
+    ("Top 5 districts by cultivated area", "SQL"),
+    ("Show the inventory levels of urea by warehouse", "SQL"),
+    ("Which crop had the lowest cost per acre?", "SQL"),
+    ("Total loan amount disbursed to farmers in 2022", "SQL"),
+    ("How many hectares of paddy were planted in Thanjavur?", "SQL"),
+    ("List the salespeople with sales above target", "SQL"),
+    ("What is the attendance count for each field team?", "SQL"),
+    ("Explain crop rotation for small farms", "RAG"),
+    ("What are the best practices for rice irrigation?", "RAG"),
+    ("How do I control aphids on cotton organically?", "RAG"),
+    ("What is drip irrigation and why is it useful?", "RAG"),
+    ("Summarize the leave policy for field workers", "RAG"),
+    ("What does the guide recommend for soil testing?", "RAG"),
+    ("Describe the procedure for claiming crop insurance", "RAG"),
+    ("Why do leaves turn yellow in maize?", "RAG"),
+    ("What is integrated pest management?", "RAG"),
+    ("How should fertilizer be stored safely?", "RAG"),
+    ("Tell me about the company's code of conduct", "RAG"),
+    ("What are the symptoms of blast disease in rice?", "RAG"),
+    ("How can farmers improve soil organic matter?", "RAG"),
+    ("What is the onboarding process for new employees?", "RAG"),
+    ("Explain the market outlook for pulses", "RAG"),
+    ("What safety gear should sprayers wear?", "RAG"),
+    ("How does the cold chain work for vegetables?", "RAG"),
+    ("What government schemes support drip irrigation?", "RAG"),
+    ("Give an overview of the quarterly finance report", "RAG"),
+    ("What are the benefits of mulching?", "RAG"),
+    ("How do I prepare the land before sowing groundnut?", "RAG"),
+    ("Define minimum support price", "RAG"),
+    ("What is the reimbursement policy for travel?", "RAG"),
+    ("Suggest ways to reduce post harvest losses", "RAG"),
+    ("How should a salesperson handle a dealer complaint?", "RAG"),
+    ("What are the warning signs of nitrogen deficiency?", "RAG"),
+    ("Explain how to calibrate a knapsack sprayer", "RAG"),
+    ("What is the company's approach to sustainable farming?", "RAG"),
+    ("How do I apply for a farm equipment subsidy?", "RAG"),
+    ("Why is crop diversification important?", "RAG"),
+]
+
+
+def tokenize(text: str) -> List[str]:
+    """Lowercased word unigrams and bigrams."""
+    words = _TOKEN.findall((text or "").lower())
+    return words + [f"{a} {b}" for a, b in zip(words, words[1:])]
+
+
+def query_log_examples(db_manager) -> List[Tuple[str, str]]:
+    """
+    Label past questions by how they were answered, one example per distinct question.
+
+    SQL answers vote SQL; direct RAG answers and SQL -> RAG fallbacks vote RAG.
+    Ties go to RAG, the cheaper mistake. Speculative wins (SQL_SPECULATIVE,
+    RAG_SPECULATIVE) are left out: the faster handler won, not the right one.
+    """
+    rows = db_manager.execute_query("""
+        SELECT query_text, query_type FROM query_log
+        WHERE success AND query_type IN ('SQL', 'RAG', 'RAG_FALLBACK')
+    """)
+    votes: Dict[str, Counter] = defaultdict(Counter)
+    for question, query_type in rows:
+        votes[question.strip()]["SQL" if query_type == "SQL" else "RAG"] += 1
+    return [
+        (question, "SQL" if counts["SQL"] > counts["RAG"] else "RAG")
+        for question, counts in votes.items() if question
+    ]
+
+
+class LocalQueryClassifier:
+    """
+    TF-IDF + logistic regression estimating the probability that a question is SQL.
+    """
+
+    def __init__(self, vocabulary: Optional[Dict[str, int]] = None, idf: Optional[np.ndarray] = None,
+                 weights: Optional[np.ndarray] = None, bias: float = 0.0):
+        self.vocabulary = vocabulary or {}
+        self.idf = idf if idf is not None else np.zeros(0)
+        self.weights = weights if weights is not None else np.zeros(0)
+        self.bias = bias
+
+    def _vectorize(self, tokens: Sequence[str]) -> np.ndarray:
+        vector = np.zeros(len(self.vocabulary))
+        for token in tokens:
+            index = self.vocabulary.get(token)
+            if index is not None:
+                vector[index] += 1.0
+        vector *= self.idf
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def fit(self, questions: Sequence[str], labels: Sequence[str], l2: float = 1e-3,
+            iterations: int = 500, learning_rate: float = 2.0) -> "LocalQueryClassifier":
+        """Fit the vocabulary, IDF weights and a class-balanced logistic regression."""
+        token_lists = [tokenize(q) for q in questions]
+        document_frequency = Counter(token for tokens in token_lists for token in set(tokens))
+        self.vocabulary = {token: i for i, token in enumerate(sorted(document_frequency))}
+        n = len(token_lists)
+        self.idf = np.log((1 + n) / (1 + np.array([document_frequency[t] for t in self.vocabulary]))) + 1.0
+
+        X = np.vstack([self._vectorize(tokens) for tokens in token_lists])
+        y = np.array([1.0 if label == "SQL" else 0.0 for label in labels])
+        positives = max(y.sum(), 1.0)
+        negatives = max(n - y.sum(), 1.0)
+        sample_weight = np.where(y == 1.0, n / (2 * positives), n / (2 * negatives))
+
+        w = np.zeros(X.shape[1])
+        b = 0.0
+        for _ in range(iterations):
+            p = 1.0 / (1.0 + np.exp(-(X @ w + b)))
+            error = (p - y) * sample_weight
+            w -= learning_rate * (X.T @ error / n + l2 * w)
+            b -= learning_rate * error.mean()
+        self.weights, self.bias = w, float(b)
+        return self
+
+    def predict_proba(self, question: str) -> float:
+        """Probability that ``question`` should be answered with SQL."""
+        x = self._vectorize(tokenize(question))
+        return float(1.0 / (1.0 + np.exp(-(x @ self.weights + self.bias))))
+
+    def predict(self, question: str) -> Tuple[QueryType, float]:
+        """Predicted mode and the model's confidence in it (0.5 - 1.0)."""
+        p_sql = self.predict_proba(question)
+        return (QueryType.SQL, p_sql) if p_sql >= 0.5 else (QueryType.RAG, 1.0 - p_sql)
+
+    def save(self, path: Path = LOCAL_CLASSIFIER_PATH):
+        path = Path(path)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tokens = np.array(sorted(self.vocabulary, key=self.vocabulary.get), dtype=str)
+        with open(path, "wb") as f:
+            np.savez(f, tokens=tokens, idf=self.idf, weights=self.weights, bias=np.array(self.bias))
+
+    @classmethod
+    def load(cls, path: Path = LOCAL_CLASSIFIER_PATH) -> "LocalQueryClassifier":
+        with np.load(path) as data:
+            vocabulary = {str(token): i for i, token in enumerate(data["tokens"])}
+            return cls(vocabulary, data["idf"], data["weights"], float(data["bias"]))
+
+
+def train_classifier(extra_examples: Iterable[Tuple[str, str]] = ()) -> LocalQueryClassifier:
+    """Train on the seed set plus ``extra_examples``; history wins over a seed with the same question."""
+    examples = {question: label for question, label in SEED_EXAMPLES}
+    examples.update(extra_examples)
+    questions = list(examples)
+    return LocalQueryClassifier().fit(questions, [examples[q] for q in questions])
+
+
+_classifier: Optional[LocalQueryClassifier] = None
+_classifier_lock = threading.Lock()
+
+
+def get_local_classifier() -> LocalQueryClassifier:
+    """
+    Shared classifier, loaded from LOCAL_CLASSIFIER_PATH or trained on the seed set.
+    """
+    global _classifier
+    if _classifier is None:
+        with _classifier_lock:
+            if _classifier is None:
+                path = Path(LOCAL_CLASSIFIER_PATH)
+                if path.exists():
+                    try:
+                        _classifier = LocalQueryClassifier.load(path)
+                        logger.info("Loaded local query classifier from %s", path)
+                        return _classifier
+                    except Exception as e:
+                        logger.warning("Could not load local query classifier from %s: %s", path, e)
+                _classifier = train_classifier()
+    return _classifier
+
+
+def retrain_from_query_log(path: Path = LOCAL_CLASSIFIER_PATH) -> int:
+    """Retrain on the seed set plus query_log history, save it and swap it in; returns the history size."""
+    global _classifier
+    from app.backend.database import get_db_manager
+
+    history = query_log_examples(get_db_manager())
+    classifier = train_classifier(history)
+    classifier.save(path)
+    _classifier = classifier
+    logger.info("Trained local query classifier on %s seed and %s logged questions", len(SEED_EXAMPLES), len(history))
+    return len(history)
+
+
+if __name__ == "__main__":
+    from app.backend.logging_config import configure_logging
+
+    configure_logging()
+    retrain_from_query_log()
@@ -1,10 +1,22 @@
-from openai import OpenAI
-import os
-import re
+import logging
+from functools import lru_cache
+from typing import Optional
 from app.backend.rag_utils.secrets import OPENAI_API_KEY
 from app.backend.models import QueryType
+from app.config import LOCAL_CLASSIFIER_ENABLED, LOCAL_CLASSIFIER_CONFIDENCE
 
-client = OpenAI(api_key=OPENAI_API_KEY) if OPENAI_API_KEY else None
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def get_async_openai_client():
+    """AsyncOpenAI client created on first use, or None without an API key."""
+    if not OPENAI_API_KEY:
+        return None
+    from openai import AsyncOpenAI
+    return AsyncOpenAI(api_key=OPENAI_API_KEY)
+
+CLASSIFIER_MODEL = "gpt-3.5-turbo"
+CLASSIFIER_TIMEOUT = 20
 
 def _heuristic_detect_query_type(question: str) -> QueryType:
     q = (question or "").lower()
@@ -19,16 +31,25 @@ def _heuristic_detect_query_type(question: str) -> QueryType:
         return QueryType.SQL
     return QueryType.RAG
 
-def detect_query_type_llm(question: str) -> QueryType:
-    # Fast local heuristic first to avoid latency and external dependency
-    heuristic = _heuristic_detect_query_type(question)
+def _local_verdict(question: str) -> tuple[QueryType, bool]:
+    """
+    Local classification and whether it is confident enough to skip the LLM.
 
-    # If no API key or client unavailable, use heuristic
-    if not OPENAI_API_KEY or client is None:
-        return heuristic
+    Uses the keyword heuristic, never treated as final, when the local model
+    is disabled or unavailable.
+    """
+    if LOCAL_CLASSIFIER_ENABLED:
+        try:
+            # numpy is only imported once a question needs classifying
+            from app.backend.rag_utils.local_classifier import get_local_classifier
+            mode, confidence = get_local_classifier().predict(question)
+            return mode, confidence >= LOCAL_CLASSIFIER_CONFIDENCE
+        except Exception as e:
+            logger.warning("Local query classifier unavailable, using keyword heuristic: %s", e)
+    return _heuristic_detect_query_type(question), False
 
-    try:
-        prompt = f"""
+def _build_classifier_prompt(question: str) -> str:
+    return f"""
 You are a classifier that decides if a user's question should be handled by structured SQL query logic or by unstructured document search (RAG).
 
 If the question contains terms related to structured data analysis (e.g., average, sum, total, count, how many, filter, greater than, less than, top 5, group by, details of employee etc.), classify it as:
@@ -42,19 +63,53 @@ Respond with only one word: either SQL or RAG.
 Question: "{question}"
 """
 
-        response = client.chat.completions.create(
-            model="gpt-3.5-turbo",
-            messages=[{"role": "user", "content": prompt}],
+def _parse_label(content: str, heuristic: Optional[QueryType]) -> Optional[QueryType]:
+    """
+    Map the model's answer to a QueryType, or ``heuristic`` when it is neither label.
+
+    Surrounding whitespace, quotes and trailing punctuation are tolerated
+    ("SQL.", "sql\n"); anything else ("Neither") is not a usable label.
+    """
+    label = (content or "").strip().strip("\"'`.!").strip().upper()
+    if label == "SQL":
+        return QueryType.SQL
+    elif label == "RAG":
+        return QueryType.RAG
+    return heuristic
+
+async def aclassify_query(question: str) -> tuple[QueryType, bool]:
+    """
+    Classify a question and report whether the verdict is certain.
+
+    A confident local classification is final and skips the LLM. Otherwise the
+    verdict is uncertain when the LLM gives no usable label (no API key,
+    network error, unexpected output) or disagrees with the local one.
+    """
+    local, final = _local_verdict(question)
+    if final:
+        return local, True
+
+    async_client = get_async_openai_client()
+    if not OPENAI_API_KEY or async_client is None:
+        return local, False
+
+    try:
+        response = await async_client.chat.completions.create(
+            model=CLASSIFIER_MODEL,
+            messages=[{"role": "user", "content": _build_classifier_prompt(question)}],
             temperature=0,
-            timeout=20,
+            timeout=CLASSIFIER_TIMEOUT,
         )
-
-        label = (response.choices[0].message.content or "").strip().upper()
-        if label == "SQL":
-            return QueryType.SQL
-        elif label == "RAG":
-            return QueryType.RAG
-        return heuristic
     except Exception:
         # Network/model errors → graceful fallback
-        return heuristic
+        return local, False
+
+    label = _parse_label(response.choices[0].message.content, None)
+    if label is None:
+        return local, False
+    return label, label == local
+
+async def adetect_query_type_llm(question: str) -> QueryType:
+    """Classify a question without blocking the event loop, ignoring certainty."""
+    mode, _ = await aclassify_query(question)
+    return mode
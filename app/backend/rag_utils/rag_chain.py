@@ -1,25 +1,21 @@
 from app.backend.rag_utils.rag_module import get_rag_chain
-from app.config import ROLE_DOCS_MAPPING
-from app.backend.constants import ROLE_BLOCKING_PATTERNS
+from app.config import ROLE_DOCS_MAPPING, COHERE_API_KEY, COHERE_RERANK_ENABLED
+from app.backend.pattern_matcher import question_categories, role_blocking_category
 from app.backend.models import QueryType
 import logging
 
-# Set up logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+def reranker_api_key(cohere_api_key: str = None) -> str:
+    """Explicit key, else the configured one when Cohere reranking is enabled."""
+    return cohere_api_key or (COHERE_API_KEY if COHERE_RERANK_ENABLED else None)
+
 # Role-specific blocking patterns - each role can only access their domain
 def validate_query_for_role(question: str, role: str) -> bool:
-    question_lower = question.lower()
-    
-    # Get blocking patterns for the user's role
-    blocking_patterns = ROLE_BLOCKING_PATTERNS.get(role, [])
-    
-    # Check if question contains any blocking patterns for this role
-    for pattern in blocking_patterns:
-        if pattern in question_lower:
-            logger.warning(f"User '{role}' attempted to access restricted information: {question}")
-            return False
+    # Matches are shared with the role validator, which already checked this question
+    if role_blocking_category(role) in question_categories(question):
+        logger.warning("User '%s' attempted to access restricted information: %s", role, question)
+        return False
     
     return True
 
@@ -32,19 +28,52 @@ async def ask_rag(question: str, role: str, cohere_api_key: str = None) -> dict:
         }
     
     # Log the query for security auditing
-    logger.info(f"RAG query from role '{role}': {question}")
+    logger.info("RAG query from role '%s': %s", role, question)
     
     # Get RAG chain with role-based filtering
     try:
-        chain = get_rag_chain(user_role=role, cohere_api_key=cohere_api_key)
-        result = chain({"input": question})
+        chain = get_rag_chain(user_role=role, cohere_api_key=reranker_api_key(cohere_api_key))
+        result = await chain({"input": question})
         return {
             "answer": result.get("answer", "No answer generated."),
             "query_type": QueryType.RAG
         }
     except Exception as e:
-        logger.error(f"RAG pipeline failed: {e}")
+        logger.error("RAG pipeline failed: %s", e)
         return {
             "answer": "Sorry, the AI service is temporarily unavailable. Please try again in a moment.",
             "query_type": QueryType.UNKNOWN
-        }
\ No newline at end of file
+        }
+
+async def astream_rag(question: str, role: str, cohere_api_key: str = None):
+    """
+    Streaming variant of ask_rag.
+
+    Yields {"event": "retrieved", "documents": n} once the context is ready, then
+    {"event": "token", "text": ...} per generated chunk. Refusals and service
+    errors arrive as a single token with the same message ask_rag returns.
+    """
+    if not validate_query_for_role(question, role):
+        yield {
+            "event": "token",
+            "text": f"Sorry, you don't have permission to access this type of information. As a {role} user, you can only access documents related to your role. Please contact your administrator if you need access to other information.",
+            "query_type": QueryType.UNKNOWN,
+        }
+        return
+
+    logger.info("RAG query from role '%s' (streaming): %s", role, question)
+
+    try:
+        chain = get_rag_chain(user_role=role, cohere_api_key=reranker_api_key(cohere_api_key))
+        async for chunk in chain.astream({"input": question}):
+            if "context" in chunk:
+                yield {"event": "retrieved", "documents": len(chunk["context"])}
+            else:
+                yield {"event": "token", "text": chunk["answer"], "query_type": QueryType.RAG}
+    except Exception as e:
+        logger.error("RAG pipeline failed: %s", e)
+        yield {
+            "event": "token",
+            "text": "Sorry, the AI service is temporarily unavailable. Please try again in a moment.",
+            "query_type": QueryType.UNKNOWN,
+        }
@@ -1,21 +1,40 @@
 # ========== CONFIG ==========
 from pathlib import Path
 import os
-import pandas as pd
-from langchain_core.documents import Document
-
-from langchain_community.document_loaders import UnstructuredMarkdownLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_chroma import Chroma
-from langchain_openai import OpenAIEmbeddings
-from langchain_openai import ChatOpenAI
-from langchain_core.prompts import ChatPromptTemplate
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain_core.runnables import RunnablePassthrough
-from langchain.retrievers import ContextualCompressionRetriever
-from langchain_cohere import CohereRerank
 
 from dotenv import load_dotenv
+import hashlib
+import itertools
+import logging
+import threading
+import uuid
+
+from app.config import (
+    COHERE_BASE_URL,
+    COHERE_RERANK_MODEL,
+    CSV_INGESTION_MODE,
+    CSV_CHUNK_TOKEN_BUDGET,
+    CSV_READ_CHUNK_ROWS,
+    CSV_SKIP_RAG_FOR_SQL_TABLES,
+    EMBEDDING_BACKEND,
+    EMBEDDING_CACHE_ENABLED,
+    EMBEDDING_QUERY_CACHE_SIZE,
+    LOCAL_EMBEDDING_DEVICE,
+    LOCAL_EMBEDDING_MODEL,
+    HYBRID_RETRIEVAL_ENABLED,
+    HYBRID_FETCH_K,
+    HYBRID_RRF_K,
+    LOCAL_RERANKER_MODEL,
+)
+from app.backend.rag_utils.index_manifest import IndexManifest, hash_file, iter_chunk_ids
+from app.backend.rag_utils.embedding_pipeline import EmbeddingPipeline, iter_batches
+from app.backend.rag_utils.keyword_index import BM25Index
+from app.backend.metrics import stage
+
+# LangChain, OpenAI, Chroma and Cohere are imported inside RAGService so that
+# importing this module stays cheap and works without API keys.
+
+logger = logging.getLogger(__name__)
 
 # Load environment variables
 load_dotenv()
@@ -25,62 +44,349 @@ os.environ["LANGCHAIN_TRACING_V2"] = "true"
 os.environ["LANGCHAIN_ENDPOINT"] = "https://api.smith.langchain.com"
 os.environ["LANGCHAIN_PROJECT"] = "RAG"
 
+EMBEDDING_MODEL_NAME = "text-embedding-3-small"
+CHAT_MODEL_NAME = "gpt-4o"
+CHAT_MODEL_TEMPERATURE = 0.2
+# Vectors from different models cannot share a collection, so local models get their own
+COLLECTION_NAME = (
+    "my_collection" if EMBEDDING_BACKEND == "openai"
+    else "my_collection_" + "".join(ch if ch.isalnum() or ch in "-_" else "_" for ch in LOCAL_EMBEDDING_MODEL)
+)
+CHROMA_PERSIST_DIRECTORY = "chroma_db"
+
+# ==============================
+# ========== PROMPT TEMPLATE ==========
+# ==============================
+system_prompt = (
+    "You are an agriculture expert assistant for summarizing and answering queries from agriculture-related documents.\n"
+    "Always use the retrieved context to answer the query, even if partial.\n"
+    "Do not guess. If data is not found, explain what you searched for.\n"
+    "When responding:\n"
+    "- Add **Source** from document metadata if possible.\n"
+    "- Use headers\n"
+    "- Use bullet points\n"
+    "- For CSV-style data, format in table with two columns\n"
+    "- Focus on agriculture-specific terminology and best practices\n"
+    "\n{context}"
+)
+
+# ==============================
+# ========== SERVICE ==========
+# ==============================
+class RAGService:
+    """
+    Lazily initialized embeddings, vector store and models for the RAG pipeline.
+    
+    Nothing is constructed at import time; each component is built on first
+    access, or all at once by ``startup()`` from the FastAPI lifespan.
+    """
+    
+    def __init__(self):
+        self._lock = threading.RLock()
+        self._embeddings = None
+        self._vectorstore = None
+        self._model = None
+        self._question_answering_chain = None
+        self._keyword_index = None
+    
+    @property
+    def embeddings(self):
+        if self._embeddings is None:
+            with self._lock:
+                if self._embeddings is None:
+                    from app.backend.rag_utils.embedding_backend import create_embeddings
+                    self._embeddings = create_embeddings(
+                        EMBEDDING_BACKEND,
+                        openai_model=EMBEDDING_MODEL_NAME,
+                        local_model=LOCAL_EMBEDDING_MODEL,
+                        device=LOCAL_EMBEDDING_DEVICE,
+                        cache_enabled=EMBEDDING_CACHE_ENABLED,
+                        query_cache_size=EMBEDDING_QUERY_CACHE_SIZE,
+                    )
+        return self._embeddings
+    
+    @property
+    def vectorstore(self):
+        if self._vectorstore is None:
+            with self._lock:
+                if self._vectorstore is None:
+                    from langchain_chroma import Chroma
+                    self._vectorstore = Chroma(
+                        collection_name=COLLECTION_NAME,
+                        persist_directory=CHROMA_PERSIST_DIRECTORY,
+                        embedding_function=self.embeddings
+                    )
+        return self._vectorstore
+    
+    @property
+    def collection(self):
+        """Underlying Chroma collection, for batched upserts and counts."""
+        return self.vectorstore._collection
+    
+    @property
+    def keyword_index(self):
+        """BM25 index over the collection's chunks, rebuilt from Chroma on first access."""
+        if self._keyword_index is None:
+            with self._lock:
+                if self._keyword_index is None:
+                    index = BM25Index()
+                    index.rebuild_from_collection(self.collection)
+                    self._keyword_index = index
+        return self._keyword_index
+    
+    def keyword_index_if_loaded(self):
+        """
+        The BM25 index if it has been built, else None.
+
+        Writers update the index only through this: an index that is not built
+        yet reads the collection when it is, and with hybrid retrieval disabled
+        it should never be built at all.
+        """
+        return self._keyword_index
+    
+    @property
+    def model(self):
+        if self._model is None:
+            with self._lock:
+                if self._model is None:
+                    from langchain_openai import ChatOpenAI
+                    self._model = ChatOpenAI(
+                        model=CHAT_MODEL_NAME,
+                        temperature=CHAT_MODEL_TEMPERATURE,
+                        max_retries=1,
+                    )
+        return self._model
+    
+    @property
+    def question_answering_chain(self):
+        if self._question_answering_chain is None:
+            with self._lock:
+                if self._question_answering_chain is None:
+                    from langchain_core.prompts import ChatPromptTemplate
+                    from langchain.chains.combine_documents import create_stuff_documents_chain
+                    chat_prompt = ChatPromptTemplate.from_messages([
+                        ("system", system_prompt),
+                        ("human", "{input}"),
+                    ])
+                    self._question_answering_chain = create_stuff_documents_chain(self.model, chat_prompt)
+        return self._question_answering_chain
+    
+    def startup(self) -> bool:
+        """
+        Build all components up front; failures are logged and retried on first use.
+        """
+        try:
+            self.question_answering_chain
+            self.vectorstore
+            if HYBRID_RETRIEVAL_ENABLED:
+                self.keyword_index
+            return True
+        except Exception as e:
+            logger.warning("RAG service initialization deferred: %s", e)
+            return False
+    
+    def shutdown(self):
+        """Release built components and shared chains."""
+        clear_rag_chain_registry()
+        with self._lock:
+            self._question_answering_chain = None
+            self._model = None
+            self._vectorstore = None
+            self._embeddings = None
+            self._keyword_index = None
+
+# Global RAG service instance
+rag_service = RAGService()
+
+# Backwards-compatible module attributes, resolved lazily through the service
+_LAZY_ATTRIBUTES = {
+    "openai_embeddings": "embeddings",
+    "vectorstore": "vectorstore",
+    "model": "model",
+    "question_answering_chain": "question_answering_chain",
+}
+
+def __getattr__(name):
+    if name in _LAZY_ATTRIBUTES:
+        return getattr(rag_service, _LAZY_ATTRIBUTES[name])
+    raise AttributeError(f"module {__name__!r} has no attribute {name!r}")
+
 # ==============================
 # ====Split,load,embed==========
 # ==============================
 
-openai_embeddings = OpenAIEmbeddings(model="text-embedding-3-small")
-vectorstore = Chroma(
-    collection_name="my_collection",
-    persist_directory="chroma_db",
-    embedding_function=openai_embeddings
+# Manifest of indexed files, stored next to the Chroma collection it describes
+INDEX_MANIFEST_PATH = Path("chroma_db") / (
+    "index_manifest.json" if COLLECTION_NAME == "my_collection" else f"index_manifest_{COLLECTION_NAME}.json"
 )
+# Serializes indexer runs triggered by concurrent uploads
+_indexer_lock = threading.Lock()
+# Bumped whenever an indexer run changes the collection
+_corpus_version = 0
+
+def get_corpus_version() -> int:
+    """Get a counter that changes whenever indexed documents change."""
+    return _corpus_version
 
-def embed_documents_to_vectorstore(docs):
+def _iter_chunks(docs):
+    """Split documents one at a time so chunks are produced lazily."""
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
     text_splitter = RecursiveCharacterTextSplitter(chunk_size=1000, chunk_overlap=200)
-    splits = text_splitter.split_documents(docs)
-    vectorstore.add_documents(splits)
+    for doc in docs:
+        if "row_start" not in doc.metadata:
+            yield from text_splitter.split_documents([doc])
+        elif len(doc.page_content) <= CSV_CHUNK_TOKEN_BUDGET * CSV_CHARS_PER_TOKEN:
+            # Grouped CSV rows are already budgeted chunks with their own header
+            yield doc
+        else:
+            # A single row wider than the budget is split, repeating the header on every piece
+            from langchain_core.documents import Document
+            source_line, header, body = doc.page_content.split("\n", 2)
+            for piece in text_splitter.split_text(body):
+                yield Document(page_content=f"{source_line}\n{header}\n{piece}", metadata=dict(doc.metadata))
+
+def _add_to_keyword_index(ids, documents, metadatas):
+    keyword_index = rag_service.keyword_index_if_loaded()
+    if keyword_index is not None:
+        keyword_index.add(ids, documents, metadatas)
+
+def embed_documents_to_vectorstore(docs, chunk_ids=None, stored_ids=None):
+    """
+    Split documents into chunks and stream them into the vectorstore in batches.
+
+    ``docs`` may be any iterable, including a generator. ``chunk_ids`` is an
+    iterable of IDs assigned to the chunks in order (random IDs when omitted);
+    returns the IDs of the stored chunks. IDs are also appended to the
+    ``stored_ids`` list as batches land, so a caller can clean up after a
+    failure midway.
+    """
+    if chunk_ids is None:
+        chunk_ids = (str(uuid.uuid4()) for _ in itertools.count())
+    def on_stored(ids, documents, metadatas):
+        if stored_ids is not None:
+            stored_ids.extend(ids)
+        _add_to_keyword_index(ids, documents, metadatas)
     
-    print("Documents embedded and saved to vectorstore.")
-    print("Total documents:", len(vectorstore.get()["documents"]))
+    pipeline_options = {}
+    if EMBEDDING_BACKEND == "local":
+        # No API quota to respect for a model running in-process
+        pipeline_options["requests_per_minute"] = None
+    pipeline = EmbeddingPipeline(
+        rag_service.embeddings,
+        rag_service.collection,
+        on_stored=on_stored,
+        **pipeline_options,
+    )
+    return pipeline.run(_iter_chunks(docs), chunk_ids)
+
+# Rough characters per token, used to budget CSV chunks without a tokenizer
+CSV_CHARS_PER_TOKEN = 4
+
+def _csv_chunk_prefix(source, row_start, row_end):
+    return f"Source: {source} (rows {row_start + 1}-{row_end})\n"
+
+def _csv_chunk_document(header, lines, role, source, row_start):
+    from langchain_core.documents import Document
+    row_end = row_start + len(lines)
+    content = _csv_chunk_prefix(source, row_start, row_end) + f"{header}\n" + "\n".join(lines)
+    return Document(
+        page_content=content,
+        metadata={
+            "role": role.lower(),
+            "source": source,
+            "file_type": "csv",
+            "row_start": row_start + 1,
+            "row_end": row_end,
+        }
+    )
+
+def _iter_csv_grouped_documents(filepath, role, token_budget=CSV_CHUNK_TOKEN_BUDGET):
+    """
+    Stream a CSV as token-budgeted groups of rows, each starting with the header.
+
+    The budget covers the whole chunk text, including the source line.
+    """
+    import pandas as pd
+    source = Path(filepath).name
+    budget_chars = token_budget * CSV_CHARS_PER_TOKEN
+    header = None
+    lines, size, row_start = [], 0, 0
+    for frame in pd.read_csv(filepath, chunksize=CSV_READ_CHUNK_ROWS, dtype=str, keep_default_na=False):
+        if header is None:
+            header = "Columns: " + " | ".join(str(column) for column in frame.columns)
+            size = len(header)
+        for row in frame.itertuples(index=False, name=None):
+            line = " | ".join(row)
+            prefix_size = len(_csv_chunk_prefix(source, row_start, row_start + len(lines) + 1))
+            if lines and prefix_size + size + len(line) + 1 > budget_chars:
+                yield _csv_chunk_document(header, lines, role, source, row_start)
+                row_start += len(lines)
+                lines, size = [], len(header)
+            lines.append(line)
+            size += len(line) + 1
+    if lines:
+        yield _csv_chunk_document(header, lines, role, source, row_start)
+
+def _iter_csv_row_documents(filepath, role):
+    """
+    Stream a CSV as one Document per row (the original ingestion mode).
+    """
+    import pandas as pd
+    from langchain_core.documents import Document
+    for frame in pd.read_csv(filepath, chunksize=CSV_READ_CHUNK_ROWS):
+        for row in frame.to_dict(orient="records"):
+            content = "\n".join(f"{k}: {v}" for k, v in row.items())
+            yield Document(
+                page_content=content,
+                metadata={"role": role.lower(), "source": Path(filepath).name, "file_type": "csv"}
+            )
+
+def _is_sql_table(filepath) -> bool:
+    """Whether a CSV is already queryable as a DuckDB table."""
+    from app.backend.database import get_db_manager, csv_table_name
+    return bool(get_db_manager().get_table_schemas([csv_table_name(Path(filepath).name)]))
+
+def _rag_skip_reason(filepath):
+    """
+    Why a file is deliberately not embedded, or None.
+
+    Recorded in the manifest and compared on every run, so a skipped file is
+    embedded once the setting is turned off or its table is dropped.
+    """
+    if CSV_SKIP_RAG_FOR_SQL_TABLES and Path(filepath).suffix.lower() == ".csv" and _is_sql_table(filepath):
+        return "sql_table"
+    return None
 
 def load_file(filepath, role):
+    """
+    Load a source file as Documents for indexing, or None for unsupported types.
+
+    CSVs are streamed lazily, so the result may be a generator. Read errors
+    propagate (possibly midway through iteration) so that the indexer never
+    records a partly read file as indexed.
+    """
     ext = Path(filepath).suffix.lower()
-    try:
-        if ext == ".csv":
-            df1 = pd.read_csv(filepath)
-            documents = []
-            for row in df1.to_dict(orient="records"):
-                content = "\n".join(f"{k}: {v}" for k, v in row.items())
-                documents.append(
-                    Document(
-                        page_content=content,
-                        metadata={"role": role.lower(), "source": Path(filepath).name, "file_type": "csv"}
-                    )
-                )
-            return documents  # Return a list of documents
-
-        elif ext == ".md":
-            with open(filepath, "r", encoding="utf-8") as f:
-                content = f.read()
-            return [
-                Document(
-                    page_content=content,
-                    metadata={"role": role.lower(), "source": Path(filepath).name, "file_type": "markdown"}
-                )
-            ]
-        else:
-            return None
+    if ext == ".csv":
+        if CSV_INGESTION_MODE == "rows":
+            return _iter_csv_row_documents(filepath, role)
+        return _iter_csv_grouped_documents(filepath, role)
 
-    except Exception as e:
-        print(f"Failed to process {filepath}: {e}")
-        return None
+    elif ext == ".md":
+        from langchain_core.documents import Document
+        with open(filepath, "r", encoding="utf-8") as f:
+            content = f.read()
+        return [
+            Document(
+                page_content=content,
+                metadata={"role": role.lower(), "source": Path(filepath).name, "file_type": "markdown"}
+            )
+        ]
+    return None
 
-def run_indexer():
-    """Load and index documents from the agriculture resources folder and uploaded files"""
+def _iter_source_files():
+    """Yield (file path, metadata role) for every file in resources_2 and static/uploads."""
     resources_path = Path("resources_2")
     uploads_path = Path("static/uploads")
-    all_docs = []
     
     # Define agriculture role folders for resources_2
     role_folders = {
@@ -94,42 +400,175 @@ def run_indexer():
         "supply chain manager": resources_path / "supply chain manager"
     }
     
-    # Process documents from resources_2 directory
     for role, folder_path in role_folders.items():
         if folder_path.exists():
-            print(f"Processing {role} documents from resources_2...")
-            for file_path in folder_path.iterdir():
+            for file_path in sorted(folder_path.iterdir()):
                 if file_path.is_file():
-                    docs = load_file(file_path, role)
-                    if docs:
-                        if isinstance(docs, list):
-                            all_docs.extend(docs)
-                        else:
-                            all_docs.append(docs)
-                        print(f"Loaded {file_path.name} for role {role}")
+                    yield file_path, role
     
-    # Process uploaded documents from static/uploads directory
     if uploads_path.exists():
-        print("Processing uploaded documents...")
-        for role_folder in uploads_path.iterdir():
+        for role_folder in sorted(uploads_path.iterdir()):
             if role_folder.is_dir():
                 role_name = role_folder.name.lower()
-                print(f"Processing uploaded documents for role: {role_name}")
-                for file_path in role_folder.iterdir():
+                for file_path in sorted(role_folder.iterdir()):
                     if file_path.is_file():
-                        docs = load_file(file_path, role_name)
-                        if docs:
-                            if isinstance(docs, list):
-                                all_docs.extend(docs)
-                            else:
-                                all_docs.append(docs)
-                            print(f"Loaded uploaded file {file_path.name} for role {role_name}")
-
-    if all_docs:
-        embed_documents_to_vectorstore(all_docs)
-        print(f"Indexed {len(all_docs)} document chunks.")
-    else:
-        print("No documents found to index.")
+                        yield file_path, role_name
+
+# Chunk IDs deleted per vector store call
+DELETE_BATCH_SIZE = 1000
+
+def _delete_chunks(chunk_ids):
+    deleted = 0
+    for batch in iter_batches(chunk_ids or [], DELETE_BATCH_SIZE):
+        rag_service.collection.delete(ids=batch)
+        keyword_index = rag_service.keyword_index_if_loaded()
+        if keyword_index is not None:
+            keyword_index.remove(batch)
+        deleted += len(batch)
+    return deleted
+
+def _delete_untracked_chunks():
+    """Delete every chunk in the collection, one page of IDs at a time."""
+    collection = rag_service.collection
+    deleted = 0
+    while True:
+        page = collection.get(limit=DELETE_BATCH_SIZE, include=[])["ids"]
+        if not page:
+            keyword_index = rag_service.keyword_index_if_loaded()
+            if keyword_index is not None:
+                keyword_index.clear()
+            return deleted
+        collection.delete(ids=page)
+        deleted += len(page)
+
+def _embedding_cache_stats():
+    """Cumulative embedding cache counters, or None when the cache is disabled."""
+    stats = getattr(rag_service.embeddings, "stats", None)
+    return stats() if callable(stats) else None
+
+def _embedding_cache_report(before, after):
+    """Hit rate and embedding throughput between two ``_embedding_cache_stats()`` snapshots."""
+    if before is None or after is None:
+        return None
+    hits = after["hits"] - before["hits"]
+    misses = after["misses"] - before["misses"]
+    seconds = after["embed_seconds"] - before["embed_seconds"]
+    return {
+        "hits": hits,
+        "misses": misses,
+        "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+        "embedded_per_second": misses / seconds if seconds else 0.0,
+    }
+
+def run_indexer() -> dict:
+    """
+    Incrementally index the agriculture resources folder and uploaded files.
+
+    Only new or changed files (by mtime/size, then content hash) are embedded;
+    chunks of replaced or removed files are deleted by their deterministic IDs.
+    The BM25 keyword index follows every chunk added or deleted. Returns a
+    report of what changed, including the embedding cache hit rate and
+    embedding throughput of the run.
+    """
+    global _corpus_version
+    report = {
+        "added": [],
+        "updated": [],
+        "removed": [],
+        "failed": [],
+        "unchanged": 0,
+        "chunks_added": 0,
+        "chunks_deleted": 0,
+    }
+    
+    with _indexer_lock:
+        cache_stats_before = _embedding_cache_stats()
+        manifest = IndexManifest(INDEX_MANIFEST_PATH).load()
+        
+        if not manifest.exists:
+            # Chunks written before the manifest existed have random IDs and
+            # cannot be reconciled, so start from an empty collection.
+            legacy_count = rag_service.collection.count()
+            if legacy_count:
+                logger.warning("No index manifest found, removing %s untracked chunks", legacy_count)
+                report["chunks_deleted"] += _delete_untracked_chunks()
+            manifest.save()
+        
+        seen = set()
+        for file_path, role in _iter_source_files():
+            file_key = file_path.as_posix()
+            seen.add(file_key)
+            stat = file_path.stat()
+            entry = manifest.get(file_key)
+            skip_reason = _rag_skip_reason(file_path)
+            same_skip = entry is not None and entry.get("skip_reason") == skip_reason
+            
+            if same_skip and IndexManifest.is_stat_unchanged(entry, role, stat):
+                report["unchanged"] += 1
+                continue
+            
+            content_hash = hash_file(file_path)
+            if same_skip and entry["role"] == role and entry["content_hash"] == content_hash:
+                # Touched but not modified: refresh mtime without re-embedding
+                manifest.set(file_key, role, stat, content_hash, entry["chunk_ids"], skip_reason)
+                manifest.save()
+                report["unchanged"] += 1
+                continue
+            
+            if entry:
+                report["chunks_deleted"] += _delete_chunks(entry["chunk_ids"])
+            
+            chunk_ids, stored_ids = [], []
+            try:
+                if skip_reason == "sql_table":
+                    logger.info("Skipping RAG embedding for %s: already queryable through DuckDB", file_path.name)
+                else:
+                    docs = load_file(file_path, role)
+                    if docs:
+                        chunk_ids = embed_documents_to_vectorstore(
+                            docs, iter_chunk_ids(file_key, content_hash), stored_ids
+                        )
+                        logger.debug("Indexed %s for role %s: %s chunks", file_path.name, role, len(chunk_ids))
+            except Exception as e:
+                # Forget the file rather than record a partial index; the next run retries it
+                logger.error("Failed to process %s: %s", file_path, e)
+                report["chunks_deleted"] += _delete_chunks(stored_ids)
+                if manifest.remove(file_key) is not None:
+                    manifest.save()
+                report["failed"].append(file_key)
+                continue
+            
+            report["chunks_added"] += len(chunk_ids)
+            report["updated" if entry else "added"].append(file_key)
+            manifest.set(file_key, role, stat, content_hash, chunk_ids, skip_reason)
+            # Persist after each file so an interrupted run does not re-embed finished files
+            manifest.save()
+        
+        for file_key in sorted(set(manifest.files) - seen):
+            entry = manifest.remove(file_key)
+            report["chunks_deleted"] += _delete_chunks(entry.get("chunk_ids"))
+            report["removed"].append(file_key)
+        manifest.save()
+        
+        if report["chunks_added"] or report["chunks_deleted"]:
+            _corpus_version += 1
+        report["collection_count"] = rag_service.collection.count()
+        report["embedding_cache"] = _embedding_cache_report(cache_stats_before, _embedding_cache_stats())
+    
+    logger.info(
+        "Indexer finished: %s added, %s updated, %s removed, %s unchanged, %s failed files; "
+        "%s chunks added, %s chunks deleted; %s chunks in collection.",
+        len(report["added"]), len(report["updated"]), len(report["removed"]), report["unchanged"], len(report["failed"]),
+        report["chunks_added"], report["chunks_deleted"], report["collection_count"],
+    )
+    cache_report = report["embedding_cache"]
+    if cache_report and (cache_report["hits"] or cache_report["misses"]):
+        logger.info(
+            "Embedding cache: %.0f%% hit rate (%s hits, %s embedded at %.1f chunks/s)",
+            cache_report["hit_rate"] * 100, cache_report["hits"], cache_report["misses"],
+            cache_report["embedded_per_second"],
+        )
+    return report
 
 # ==============================
 # ========== ROLE VALIDATION ==========
@@ -178,50 +617,55 @@ def get_role_filter(user_role: str) -> dict:
         # All other roles see only their specific documents
         return {"role": metadata_role}
 
-# ==============================
-# ========== PROMPT TEMPLATE ==========
-# ==============================
-system_prompt = (
-    "You are an agriculture expert assistant for summarizing and answering queries from agriculture-related documents.\n"
-    "Always use the retrieved context to answer the query, even if partial.\n"
-    "Do not guess. If data is not found, explain what you searched for.\n"
-    "When responding:\n"
-    "- Add **Source** from document metadata if possible.\n"
-    "- Use headers\n"
-    "- Use bullet points\n"
-    "- For CSV-style data, format in table with two columns\n"
-    "- Focus on agriculture-specific terminology and best practices\n"
-    "\n{context}"
-)
-
-chat_prompt = ChatPromptTemplate.from_messages([
-    ("system", system_prompt),
-    ("human", "{input}"),
-])
-
-# ==============================
-# ========== MODEL ==========
-# ==============================
-model = ChatOpenAI(
-    model="gpt-4o",  
-    temperature=0.2,
-    max_retries=1,
-)
-
-question_answering_chain = create_stuff_documents_chain(model, chat_prompt)
-
 # ==============================
 # Add a Reranker
 # ==============================
 def wrap_with_reranker(retriever, cohere_api_key, top_n=4):
+    from langchain.retrievers import ContextualCompressionRetriever
+    from langchain_cohere import CohereRerank
+
+    class TimedCohereRerank(CohereRerank):
+        def compress_documents(self, *args, **kwargs):
+            with stage("rerank"):
+                return super().compress_documents(*args, **kwargs)
+
     #print("[INFO] Using Cohere reranker.")
-    reranker = CohereRerank(cohere_api_key=cohere_api_key, top_n=top_n)
+    options = {"base_url": COHERE_BASE_URL} if COHERE_BASE_URL else {}
+    reranker = TimedCohereRerank(cohere_api_key=cohere_api_key, model=COHERE_RERANK_MODEL, top_n=top_n, **options)
     return ContextualCompressionRetriever(
         base_compressor=reranker,
         base_retriever=retriever
     )
 
-def get_rag_chain(user_role: str,cohere_api_key: str = None):
+# ==============================
+# ========== CHAIN REGISTRY ==========
+# ==============================
+RETRIEVER_K = 4
+
+# Chains are stateless once built, so one instance per configuration is shared by all requests
+_chain_registry = {}
+_chain_registry_lock = threading.Lock()
+
+def _chain_config_key(role_filter: dict, cohere_api_key: str = None) -> tuple:
+    """
+    Identify everything a built chain depends on: role filter, reranker key, retrieval and model config.
+    """
+    reranker_key = hashlib.sha256(cohere_api_key.encode("utf-8")).hexdigest() if cohere_api_key else None
+    return (
+        tuple(sorted(role_filter.items())),
+        reranker_key,
+        COHERE_RERANK_MODEL if cohere_api_key else None,
+        (HYBRID_FETCH_K, HYBRID_RRF_K) if HYBRID_RETRIEVAL_ENABLED else None,
+        LOCAL_RERANKER_MODEL if HYBRID_RETRIEVAL_ENABLED and not cohere_api_key else None,
+        CHAT_MODEL_NAME,
+        CHAT_MODEL_TEMPERATURE,
+        RETRIEVER_K,
+    )
+
+def get_rag_chain(user_role: str, cohere_api_key: str = None):
+    """
+    Get the RAG chain for a role, building it only on first use for its configuration.
+    """
     user_role = user_role.lower()
     
     # Validate role access
@@ -230,35 +674,80 @@ def get_rag_chain(user_role: str,cohere_api_key: str = None):
     
     # Get appropriate role filter
     role_filter = get_role_filter(user_role)
+    key = _chain_config_key(role_filter, cohere_api_key)
     
-    # Create retriever with role-based filtering
-    if role_filter:
-        retriever = vectorstore.as_retriever(search_kwargs={
-            "k": 4,
-            "filter": role_filter
-        })
+    chain = _chain_registry.get(key)
+    if chain is None:
+        with _chain_registry_lock:
+            chain = _chain_registry.get(key)
+            if chain is None:
+                chain = _build_rag_chain(role_filter, cohere_api_key)
+                _chain_registry[key] = chain
+    return chain
+
+def warm_up_rag_chains(roles: list, cohere_api_key: str = None) -> int:
+    """
+    Build the chains for the given roles ahead of the first request; returns how many exist.
+    """
+    for role in roles:
+        get_rag_chain(role, cohere_api_key=cohere_api_key)
+    return len(_chain_registry)
+
+def clear_rag_chain_registry():
+    """Drop all built chains so the next request rebuilds them."""
+    with _chain_registry_lock:
+        _chain_registry.clear()
+
+def _build_retriever(role_filter: dict, cohere_api_key: str = None):
+    """
+    Hybrid vector + BM25 retriever (or plain vector search when disabled), with the
+    Cohere reranker when a key is given and otherwise the optional local cross-encoder.
+    """
+    if not HYBRID_RETRIEVAL_ENABLED:
+        search_kwargs = {"k": RETRIEVER_K}
+        if role_filter:
+            search_kwargs["filter"] = role_filter
+        retriever = rag_service.vectorstore.as_retriever(search_kwargs=search_kwargs)
     else:
-        # No filter for Admin users
-        retriever = vectorstore.as_retriever(search_kwargs={"k": 4})
+        from app.backend.rag_utils.hybrid_retriever import HybridRetriever, get_local_reranker
+        retriever = HybridRetriever(
+            vectorstore=rag_service.vectorstore,
+            keyword_index=rag_service.keyword_index,
+            # Cohere picks the final RETRIEVER_K from all fused candidates
+            k=HYBRID_FETCH_K if cohere_api_key else RETRIEVER_K,
+            fetch_k=HYBRID_FETCH_K,
+            search_filter=role_filter,
+            rrf_k=HYBRID_RRF_K,
+            reranker=None if cohere_api_key else get_local_reranker(LOCAL_RERANKER_MODEL),
+        )
 
     # wrap with reranker
     if cohere_api_key:
-        print("Using cohere reranker")
-        retriever = wrap_with_reranker(retriever, cohere_api_key)
+        logger.debug("Using cohere reranker")
+        retriever = wrap_with_reranker(retriever, cohere_api_key, top_n=RETRIEVER_K)
+    return retriever
 
-    # Create the retrieval chain using the new LangChain syntax
-    def create_chain(input_dict):
+def _build_rag_chain(role_filter: dict, cohere_api_key: str = None):
+    # Create retriever with role-based filtering (no filter for Admin users)
+    retriever = _build_retriever(role_filter, cohere_api_key)
+    question_answering_chain = rag_service.question_answering_chain
+
+    # Create the retrieval chain using the new LangChain syntax; both steps are
+    # awaited so that retrieval and generation never block the event loop
+    async def create_chain(input_dict):
         # Get the question from input
         question = input_dict["input"]
         
         # Retrieve relevant documents
-        docs = retriever.get_relevant_documents(question)
+        with stage("retrieval"):
+            docs = await retriever.ainvoke(question)
         
         # Generate answer using the question answering chain
-        answer = question_answering_chain.invoke({
-            "context": docs,
-            "input": question
-        })
+        with stage("llm_generation"):
+            answer = await question_answering_chain.ainvoke({
+                "context": docs,
+                "input": question
+            })
         
         # Handle different response formats
         if isinstance(answer, dict) and "answer" in answer:
@@ -273,4 +762,17 @@ def get_rag_chain(user_role: str,cohere_api_key: str = None):
             "answer": answer_text
         }
     
+    async def stream_chain(input_dict):
+        """Yield {"context": docs} once retrieval is done, then {"answer": chunk} per generated chunk."""
+        question = input_dict["input"]
+        with stage("retrieval"):
+            docs = await retriever.ainvoke(question)
+        yield {"context": docs}
+        with stage("llm_generation"):
+            async for chunk in question_answering_chain.astream({"context": docs, "input": question}):
+                if chunk:
+                    yield {"answer": chunk if isinstance(chunk, str) else str(chunk)}
+
+    # Streaming variant of the same chain, used by /chat/stream
+    create_chain.astream = stream_chain
     return create_chain
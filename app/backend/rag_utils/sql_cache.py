@@ -0,0 +1,279 @@
+"""
+Persistent NL-to-SQL translation cache.
+
+Generated SQL is stored in DuckDB keyed by the normalized question and a
+fingerprint of the schemas the role can see, so a schema change never reuses
+SQL written for the old columns. A template layer recognizes questions that
+differ only in literals (crop names, numbers, districts) and reuses the
+parameterized SQL with the new values bound in, instead of calling the LLM.
+"""
+
+import hashlib
+import json
+import logging
+import re
+import threading
+from typing import Dict, Iterable, List, Optional, Tuple
+
+from app.backend.database import get_db_manager
+
+logger = logging.getLogger(__name__)
+
+# Templates need this many fixed words so that e.g. "{0}" cannot match any question
+MIN_TEMPLATE_FIXED_WORDS = 3
+
+_STRING_LITERAL = re.compile(r"'((?:[^']|'')*)'")
+_NUMBER_LITERAL = re.compile(r"(?<![\w.])-?\d+(?:\.\d+)?(?![\w.])")
+_NUMBER_VALUE = re.compile(r"-?\d+(?:\.\d+)?")
+_SLOT = re.compile(r"\{(\d+)\}")
+# One word of a string slot: no separators, and not a word that joins several values
+_SLOT_WORD = r"(?!(?:and|or|not|nor|but|vs)\b)[^\s,;/&|]+"
+
+
+def normalize_question(question: str) -> str:
+    """Collapse whitespace and drop trailing punctuation, preserving case."""
+    return re.sub(r"\s+", " ", (question or "").strip()).rstrip(" ?!.")
+
+
+def schema_fingerprint(table_schemas: Dict[str, List[Tuple[str, str]]]) -> str:
+    """Stable hash of the (table, columns, types) a role can see."""
+    payload = json.dumps(sorted((table, [list(col) for col in cols]) for table, cols in table_schemas.items()))
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+
+def _sql_literals(sql: str) -> List[Tuple[int, int, str, str]]:
+    """Find (start, end, kind, value) of string and numeric literals in SQL."""
+    literals = []
+    masked = list(sql)
+    for match in _STRING_LITERAL.finditer(sql):
+        literals.append((match.start(), match.end(), "str", match.group(1).replace("''", "'")))
+        masked[match.start():match.end()] = " " * (match.end() - match.start())
+    for match in _NUMBER_LITERAL.finditer("".join(masked)):
+        literals.append((match.start(), match.end(), "num", match.group(0)))
+    return sorted(literals)
+
+
+def _string_slot_pattern(words: int) -> str:
+    """A string slot matches exactly as many words as the literal it replaced."""
+    return _SLOT_WORD + (r" " + _SLOT_WORD) * (max(1, words) - 1)
+
+
+def _case_style(question_value: str, sql_value: str) -> str:
+    """How the LLM changed the literal's case between the question and the SQL."""
+    if sql_value == question_value:
+        return "same"
+    if sql_value == question_value.upper():
+        return "upper"
+    if sql_value == question_value.lower():
+        return "lower"
+    if sql_value == question_value.title():
+        return "title"
+    return "same"
+
+
+def _apply_case_style(value: str, style: str) -> str:
+    return {"upper": value.upper(), "lower": value.lower(), "title": value.title()}.get(style, value)
+
+
+def build_template(question: str, sql: str) -> Optional[Dict[str, object]]:
+    """
+    Turn a (question, SQL) pair into a parameterized template.
+
+    Every SQL literal that appears exactly once in the question becomes a slot
+    in both. Returns None when no literal is shared or too little fixed text
+    would remain to identify the question.
+    """
+    question = normalize_question(question)
+    chosen = []  # (sql literal, question match)
+    taken_spans = []
+    for literal in _sql_literals(sql):
+        value = literal[3]
+        if not value.strip():
+            continue
+        pattern = re.compile(r"(?<!\w)" + re.escape(value) + r"(?!\w)", re.IGNORECASE)
+        occurrences = list(pattern.finditer(question))
+        if len(occurrences) != 1:
+            continue
+        found = occurrences[0]
+        # A string that could not be told apart from a list of values is left fixed
+        if literal[2] == "str" and not re.fullmatch(
+            _string_slot_pattern(len(found.group(0).split())), found.group(0), re.IGNORECASE
+        ):
+            continue
+        if any(found.start() < end and start < found.end() for start, end in taken_spans):
+            continue
+        taken_spans.append((found.start(), found.end()))
+        chosen.append((literal, found))
+
+    if not chosen:
+        return None
+
+    slots = []
+    for (_, _, kind, value), found in chosen:
+        slot = {"kind": kind, "case": _case_style(found.group(0), value) if kind == "str" else "same"}
+        if kind == "str":
+            slot["words"] = len(found.group(0).split())
+        slots.append(slot)
+
+    # Replace from the end so earlier offsets stay valid
+    question_template = question
+    for slot, (_, found) in sorted(enumerate(chosen), key=lambda item: item[1][1].start(), reverse=True):
+        question_template = question_template[:found.start()] + f"{{{slot}}}" + question_template[found.end():]
+    sql_template = sql
+    for slot, ((start, end, kind, _), _) in sorted(enumerate(chosen), key=lambda item: item[1][0][0], reverse=True):
+        replacement = f"'{{{slot}}}'" if kind == "str" else f"{{{slot}}}"
+        sql_template = sql_template[:start] + replacement + sql_template[end:]
+
+    fixed_words = _SLOT.sub(" ", question_template).split()
+    if len(fixed_words) < MIN_TEMPLATE_FIXED_WORDS:
+        return None
+    return {"question": question_template, "sql": sql_template, "slots": slots}
+
+
+def _template_regex(question_template: str, slots: List[Dict[str, str]]) -> re.Pattern:
+    parts = []
+    position = 0
+    for match in _SLOT.finditer(question_template):
+        parts.append(re.escape(question_template[position:match.start()]))
+        slot = slots[int(match.group(1))]
+        if slot["kind"] == "num":
+            pattern = r"-?\d+(?:\.\d+)?"
+        else:
+            # Templates stored before word counts were recorded match a single word
+            pattern = _string_slot_pattern(slot.get("words", 1))
+        parts.append(f"(?P<s{match.group(1)}>{pattern})")
+        position = match.end()
+    parts.append(re.escape(question_template[position:]))
+    return re.compile("".join(parts), re.IGNORECASE)
+
+
+def _bind_template(template: Dict[str, object], match: re.Match) -> Optional[str]:
+    sql = template["sql"]
+    for index, slot in enumerate(template["slots"]):
+        value = match.group(f"s{index}")
+        if slot["kind"] == "num":
+            if not _NUMBER_VALUE.fullmatch(value):
+                return None
+            sql = sql.replace(f"{{{index}}}", value)
+        else:
+            value = _apply_case_style(value, slot["case"]).replace("'", "''")
+            sql = sql.replace(f"'{{{index}}}'", f"'{value}'")
+    return sql
+
+
+class SQLTranslationCache:
+    """
+    Exact and template-based cache of generated SQL, persisted in DuckDB.
+
+    Rows for a schema fingerprint are loaded into memory on first use, so
+    lookups after that do not touch the database.
+    """
+
+    def __init__(self):
+        self._exact: Dict[Tuple[str, str], str] = {}
+        self._templates: Dict[str, List[Tuple[re.Pattern, Dict[str, object]]]] = {}
+        self._loaded: set = set()
+        # Bumped by forget() so a load that raced with a purge is not kept
+        self._epoch = 0
+        self._lock = threading.Lock()
+        self._stats = {"exact_hits": 0, "template_hits": 0, "misses": 0, "stores": 0}
+
+    def _ensure_loaded(self, fingerprint: str):
+        with self._lock:
+            if fingerprint in self._loaded:
+                return
+            epoch = self._epoch
+        rows = get_db_manager().execute_query(
+            "SELECT kind, question_key, sql_text, slots FROM sql_translation_cache WHERE schema_fingerprint = ?",
+            [fingerprint],
+        )
+        with self._lock:
+            if epoch != self._epoch:
+                return
+            for kind, question_key, sql_text, slots in rows:
+                self._add_to_memory(kind, question_key, fingerprint, sql_text, json.loads(slots) if slots else None)
+            self._loaded.add(fingerprint)
+
+    def _add_to_memory(self, kind: str, question_key: str, fingerprint: str, sql_text: str, slots):
+        if kind == "exact":
+            self._exact[(question_key, fingerprint)] = sql_text
+        else:
+            template = {"question": question_key, "sql": sql_text, "slots": slots}
+            templates = self._templates.setdefault(fingerprint, [])
+            if all(existing["question"] != question_key for _, existing in templates):
+                templates.append((_template_regex(question_key, slots), template))
+
+    def lookup(self, question: str, fingerprint: str) -> Optional[str]:
+        """
+        Return cached SQL for the question under this schema fingerprint, or None.
+        """
+        try:
+            self._ensure_loaded(fingerprint)
+        except Exception as e:
+            logger.warning("SQL translation cache unavailable: %s", e)
+            return None
+
+        question_key = normalize_question(question)
+        with self._lock:
+            sql = self._exact.get((question_key.lower(), fingerprint))
+            if sql is not None:
+                self._stats["exact_hits"] += 1
+                return sql
+            for regex, template in self._templates.get(fingerprint, []):
+                match = regex.fullmatch(question_key)
+                if match:
+                    sql = _bind_template(template, match)
+                    if sql is not None:
+                        self._stats["template_hits"] += 1
+                        logger.info("SQL template hit for question: %s", question)
+                        return sql
+            self._stats["misses"] += 1
+            return None
+
+    def store(self, question: str, fingerprint: str, sql: str, tables: List[str]):
+        """
+        Persist SQL that executed successfully, plus its template when one can be derived.
+        """
+        question_key = normalize_question(question)
+        entries = [("exact", question_key.lower(), sql, None)]
+        template = build_template(question_key, sql)
+        if template is not None:
+            entries.append(("template", template["question"], template["sql"], template["slots"]))
+
+        db_manager = get_db_manager()
+        for kind, key, sql_text, slots in entries:
+            try:
+                db_manager.execute_write("""
+                    INSERT OR REPLACE INTO sql_translation_cache
+                        (kind, question_key, schema_fingerprint, sql_text, slots, tables)
+                    VALUES (?, ?, ?, ?, ?, ?)
+                """, [kind, key, fingerprint, sql_text, json.dumps(slots) if slots else None, tables])
+            except Exception as e:
+                logger.warning("Failed to persist SQL translation: %s", e)
+            with self._lock:
+                self._add_to_memory(kind, key, fingerprint, sql_text, slots)
+        with self._lock:
+            self._stats["stores"] += 1
+
+    def forget(self, fingerprints: Iterable[str]):
+        """
+        Drop the in-memory entries of these schema fingerprints; they are reloaded on next use.
+        """
+        fingerprints = set(fingerprints)
+        with self._lock:
+            self._epoch += 1
+            for key in [key for key in self._exact if key[1] in fingerprints]:
+                del self._exact[key]
+            for fingerprint in fingerprints:
+                self._templates.pop(fingerprint, None)
+            self._loaded -= fingerprints
+
+    def stats(self) -> Dict[str, float]:
+        with self._lock:
+            lookups = self._stats["exact_hits"] + self._stats["template_hits"] + self._stats["misses"]
+            hits = self._stats["exact_hits"] + self._stats["template_hits"]
+            return {**self._stats, "hit_rate": hits / lookups if lookups else 0.0}
+
+
+# Global translation cache instance
+sql_translation_cache = SQLTranslationCache()
@@ -0,0 +1,203 @@
+"""
+Parser-based validation of LLM-generated SQL.
+
+DuckDB parses the statement with ``json_serialize_sql``, which only accepts
+SELECT statements, and the syntax tree is walked for the tables the query
+really reads: CTE bodies, subqueries in any clause, comma joins and set
+operations included. Names that resolve to a CTE in scope are not tables.
+Table functions such as ``read_csv`` reach files outside the role's tables
+and are rejected. Parse results are cached by SQL hash, so checking a repeated
+query against a role's allow-list is a set lookup.
+"""
+
+import hashlib
+import json
+import logging
+import threading
+from collections import OrderedDict
+from typing import FrozenSet, Iterable, List, Optional, Tuple
+
+from app.config import SQL_VALIDATION_CACHE_SIZE
+
+logger = logging.getLogger(__name__)
+
+# Table functions that generate rows instead of reading files or other databases
+ALLOWED_TABLE_FUNCTIONS = frozenset({"range", "generate_series", "unnest"})
+# Unqualified names and the default schema are the only ones tables live in
+_DEFAULT_SCHEMAS = ("", "main")
+
+
+class SQLValidation:
+    """
+    Outcome of validating one SQL statement for a role.
+    """
+
+    __slots__ = ("allowed", "tables", "reason")
+
+    def __init__(self, allowed: bool, tables: List[str], reason: Optional[str] = None):
+        self.allowed = allowed
+        self.tables = tables
+        self.reason = reason
+
+    def __repr__(self):
+        return f"SQLValidation(allowed={self.allowed}, tables={self.tables}, reason={self.reason!r})"
+
+
+class _ParsedSQL:
+    __slots__ = ("tables", "error")
+
+    def __init__(self, tables: Tuple[str, ...] = (), error: Optional[str] = None):
+        self.tables = tables
+        self.error = error
+
+
+def _table_reference(ref: dict) -> str:
+    name = ref.get("table_name", "")
+    schema = ref.get("schema_name", "")
+    catalog = ref.get("catalog_name", "")
+    if catalog or schema.lower() not in _DEFAULT_SCHEMAS:
+        return ".".join(part for part in (catalog, schema, name) if part)
+    return name
+
+
+def _cte_definitions(node: dict) -> List[Tuple[str, dict]]:
+    cte_map = node.get("cte_map") or {}
+    return [(entry["key"], entry["value"]) for entry in cte_map.get("map", [])]
+
+
+def _walk(value, ctes: FrozenSet[str], tables: List[str]):
+    """
+    Collect base tables below ``value``; ``ctes`` holds the lowercased CTE names in scope.
+
+    Raises ValueError for references that are never allowed.
+    """
+    if isinstance(value, list):
+        for item in value:
+            _walk(item, ctes, tables)
+        return
+    if not isinstance(value, dict):
+        return
+
+    node_type = value.get("type")
+    if node_type == "BASE_TABLE":
+        name = _table_reference(value)
+        if name.lower() not in ctes:
+            tables.append(name)
+    elif node_type == "TABLE_FUNCTION":
+        function_name = (value.get("function") or {}).get("function_name", "")
+        if function_name.lower() not in ALLOWED_TABLE_FUNCTIONS:
+            raise ValueError(f"Table function not allowed: {function_name}")
+    elif node_type == "SHOW_REF":
+        raise ValueError("DESCRIBE/SHOW queries are not allowed")
+
+    definitions = _cte_definitions(value)
+    if definitions:
+        # A CTE sees the CTEs defined before it, and itself only when recursive
+        visible = set(ctes)
+        for name, definition in definitions:
+            body = (definition.get("query") or {}).get("node") or {}
+            own = {name.lower()} if body.get("type") == "RECURSIVE_CTE_NODE" else set()
+            _walk(definition, frozenset(visible | own), tables)
+            visible.add(name.lower())
+        ctes = frozenset(visible)
+
+    for key, child in value.items():
+        if key != "cte_map" and isinstance(child, (dict, list)):
+            _walk(child, ctes, tables)
+
+
+def extract_tables(tree: dict) -> List[str]:
+    """
+    Tables read by a serialized statement, in first-reference order without duplicates.
+
+    Raises ValueError if the statement uses a disallowed table function or SHOW/DESCRIBE.
+    """
+    tables: List[str] = []
+    _walk(tree, frozenset(), tables)
+    return list(dict.fromkeys(tables))
+
+
+class SQLValidator:
+    """
+    Validates LLM-generated SQL against a role's tables using DuckDB's parser.
+
+    Parsing runs on a private in-memory DuckDB connection (one cursor per
+    thread), so it never competes with queries for the shared database.
+    """
+
+    def __init__(self, cache_size: int = SQL_VALIDATION_CACHE_SIZE):
+        self.cache_size = cache_size
+        self._cache: "OrderedDict[str, _ParsedSQL]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._local = threading.local()
+        self._connection = None
+        self.stats = {"hits": 0, "misses": 0, "rejected": 0}
+
+    def _cursor(self):
+        cursor = getattr(self._local, "cursor", None)
+        if cursor is None:
+            with self._lock:
+                if self._connection is None:
+                    import duckdb
+                    self._connection = duckdb.connect(":memory:")
+                cursor = self._connection.cursor()
+            self._local.cursor = cursor
+        return cursor
+
+    def _parse(self, sql: str) -> _ParsedSQL:
+        row = self._cursor().execute("SELECT json_serialize_sql(?)", [sql]).fetchone()
+        result = json.loads(row[0])
+        if result.get("error"):
+            message = result.get("error_message", "")
+            if result.get("error_type") == "not implemented":
+                return _ParsedSQL(error="Only SELECT queries are allowed.")
+            return _ParsedSQL(error=f"Invalid SQL: {message}")
+        statements = result.get("statements", [])
+        if len(statements) != 1:
+            return _ParsedSQL(error="Exactly one SELECT statement is allowed.")
+        try:
+            return _ParsedSQL(tables=tuple(extract_tables(statements[0])))
+        except ValueError as e:
+            return _ParsedSQL(error=str(e))
+
+    def parse(self, sql: str) -> _ParsedSQL:
+        """Parse ``sql`` once per distinct text; later calls are served from the cache."""
+        key = hashlib.sha256(sql.strip().encode("utf-8")).hexdigest()
+        with self._lock:
+            parsed = self._cache.get(key)
+            if parsed is not None:
+                self._cache.move_to_end(key)
+                self.stats["hits"] += 1
+                return parsed
+            self.stats["misses"] += 1
+
+        parsed = self._parse(sql.strip())
+        with self._lock:
+            self._cache[key] = parsed
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+        return parsed
+
+    def validate(self, sql: str, allowed_tables: Iterable[str]) -> SQLValidation:
+        """
+        Check that ``sql`` is a single SELECT reading only ``allowed_tables``.
+
+        Table names are matched case-insensitively, as DuckDB resolves them;
+        the returned tables use the allow-list's spelling.
+        """
+        parsed = self.parse(sql)
+        if parsed.error:
+            self.stats["rejected"] += 1
+            return SQLValidation(False, [], parsed.error)
+
+        allowed = {table.lower(): table for table in allowed_tables}
+        tables = []
+        for table in parsed.tables:
+            if table.lower() not in allowed:
+                self.stats["rejected"] += 1
+                return SQLValidation(False, list(parsed.tables), f"Access denied to table: {table}")
+            tables.append(allowed[table.lower()])
+        return SQLValidation(True, tables)
+
+
+sql_validator = SQLValidator()
@@ -2,13 +2,16 @@
 Role-based access validation module.
 """
 
+from typing import FrozenSet
+
 from fastapi import HTTPException
-from app.backend.constants import (
-    FINANCE_BLOCKING_PATTERNS,
-    MARKET_BLOCKING_PATTERNS,
-    HR_BLOCKING_PATTERNS,
-    SUPPLY_CHAIN_BLOCKING_PATTERNS,
-    AGRICULTURE_CONTEXT_INDICATORS,
+from app.backend.pattern_matcher import (
+    FINANCE,
+    MARKET,
+    HR,
+    SUPPLY_CHAIN,
+    AGRICULTURE_CONTEXT,
+    question_categories,
 )
 
 
@@ -22,14 +25,15 @@ def validate_role_access(question: str, role: str, username: str, db_manager) ->
     allowed_roles = ROLE_DOCS_MAPPING.get(role, [])
     
     # Only block access if the question is clearly trying to access information
-    # that is completely outside the user's role domain
-    question_lower = question.lower()
+    # that is completely outside the user's role domain.
+    # One automaton pass finds every pattern category the question touches
+    categories = question_categories(question)
     
     # Define clear cross-role access patterns that should be blocked
     # These are more specific patterns that indicate intentional cross-role access attempts
     
     # Finance-specific queries (blocked for non-finance roles unless they're agriculture-related)
-    has_agriculture_context = any(indicator in question_lower for indicator in AGRICULTURE_CONTEXT_INDICATORS)
+    has_agriculture_context = AGRICULTURE_CONTEXT in categories
     
     # HR users should NOT be able to ask agricultural questions
     if role == "HR" and has_agriculture_context:
@@ -41,16 +45,16 @@ def validate_role_access(question: str, role: str, username: str, db_manager) ->
     
     # Only block if there's a clear cross-role access attempt without agriculture context
     if not has_agriculture_context:
-        _check_finance_access(question_lower, role, username, question, db_manager)
-        _check_market_analysis_access(question_lower, role, username, question, db_manager)
-        _check_hr_access(question_lower, role, username, question, db_manager)
-        _check_supply_chain_access(question_lower, role, username, question, db_manager)
+        _check_finance_access(categories, role, username, question, db_manager)
+        _check_market_analysis_access(categories, role, username, question, db_manager)
+        _check_hr_access(categories, role, username, question, db_manager)
+        _check_supply_chain_access(categories, role, username, question, db_manager)
 
 
-def _check_finance_access(question_lower: str, role: str, username: str, question: str, db_manager) -> None:
+def _check_finance_access(categories: FrozenSet[str], role: str, username: str, question: str, db_manager) -> None:
     """Check if user is trying to access finance-related information without permission."""
     if role not in ["Finance Officer", "Admin"]:
-        if any(pattern in question_lower for pattern in FINANCE_BLOCKING_PATTERNS):
+        if FINANCE in categories:
             db_manager.log_query(username, role, "BLOCKED", question, False, "Finance access denied")
             raise HTTPException(
                 status_code=403, 
@@ -58,10 +62,10 @@ def _check_finance_access(question_lower: str, role: str, username: str, questio
             )
 
 
-def _check_market_analysis_access(question_lower: str, role: str, username: str, question: str, db_manager) -> None:
+def _check_market_analysis_access(categories: FrozenSet[str], role: str, username: str, question: str, db_manager) -> None:
     """Check if user is trying to access market analysis information without permission."""
     if role not in ["Market Analysis", "Admin"]:
-        if any(pattern in question_lower for pattern in MARKET_BLOCKING_PATTERNS):
+        if MARKET in categories:
             db_manager.log_query(username, role, "BLOCKED", question, False, "Market analysis access denied")
             raise HTTPException(
                 status_code=403, 
@@ -69,10 +73,10 @@ def _check_market_analysis_access(question_lower: str, role: str, username: str,
             )
 
 
-def _check_hr_access(question_lower: str, role: str, username: str, question: str, db_manager) -> None:
+def _check_hr_access(categories: FrozenSet[str], role: str, username: str, question: str, db_manager) -> None:
     """Check if user is trying to access HR information without permission."""
     if role not in ["HR", "Admin"]:
-        if any(pattern in question_lower for pattern in HR_BLOCKING_PATTERNS):
+        if HR in categories:
             db_manager.log_query(username, role, "BLOCKED", question, False, "HR access denied")
             raise HTTPException(
                 status_code=403, 
@@ -80,10 +84,10 @@ def _check_hr_access(question_lower: str, role: str, username: str, question: st
             )
 
 
-def _check_supply_chain_access(question_lower: str, role: str, username: str, question: str, db_manager) -> None:
+def _check_supply_chain_access(categories: FrozenSet[str], role: str, username: str, question: str, db_manager) -> None:
     """Check if user is trying to access supply chain information without permission."""
     if role not in ["Supply Chain Manager", "Admin"]:
-        if any(pattern in question_lower for pattern in SUPPLY_CHAIN_BLOCKING_PATTERNS):
+        if SUPPLY_CHAIN in categories:
             db_manager.log_query(username, role, "BLOCKED", question, False, "Supply chain access denied")
             raise HTTPException(
                 status_code=403, 
@@ -95,8 +99,7 @@ def is_agriculture_context(question: str) -> bool:
     """
     Check if a question has agriculture-related context.
     """
-    question_lower = question.lower()
-    return any(indicator in question_lower for indicator in AGRICULTURE_CONTEXT_INDICATORS)
+    return AGRICULTURE_CONTEXT in question_categories(question)
 
 
 def get_allowed_roles_for_user(role: str) -> list:
@@ -23,6 +23,21 @@ CHROMA_DIR = BASE_DIR / "chroma_db"
 # Database configuration
 DUCKDB_DIR = STATIC_DIR / "data"
 DUCKDB_PATH = DUCKDB_DIR / "structured_queries.duckdb"
+# Worker threads used to run blocking DuckDB calls off the event loop
+DB_EXECUTOR_MAX_WORKERS = int(os.getenv("DB_EXECUTOR_MAX_WORKERS", "4"))
+# DuckDB applies these instance-wide (they cannot be set per cursor); unset keeps DuckDB defaults
+DUCKDB_MEMORY_LIMIT = os.getenv("DUCKDB_MEMORY_LIMIT")  # e.g. "2GB"
+DUCKDB_THREADS = int(os.getenv("DUCKDB_THREADS")) if os.getenv("DUCKDB_THREADS") else None
+# Pooled read-only cursors for SELECTs; all writes share one serialized writer cursor
+DB_READ_POOL_SIZE = int(os.getenv("DB_READ_POOL_SIZE", str(DB_EXECUTOR_MAX_WORKERS)))
+DB_POOL_CHECKOUT_TIMEOUT_SECONDS = float(os.getenv("DB_POOL_CHECKOUT_TIMEOUT_SECONDS", "10"))
+DB_POOL_MAX_IDLE_SECONDS = float(os.getenv("DB_POOL_MAX_IDLE_SECONDS", "300"))
+# Audit rows are written to query_log in batches by a background thread
+AUDIT_LOG_BATCH_SIZE = int(os.getenv("AUDIT_LOG_BATCH_SIZE", "256"))
+AUDIT_LOG_FLUSH_INTERVAL_SECONDS = float(os.getenv("AUDIT_LOG_FLUSH_INTERVAL_SECONDS", "1.0"))
+AUDIT_LOG_QUEUE_MAX_SIZE = int(os.getenv("AUDIT_LOG_QUEUE_MAX_SIZE", "10000"))
+# How long a request may wait for queue space before the row goes to the application log
+AUDIT_LOG_ENQUEUE_TIMEOUT_SECONDS = float(os.getenv("AUDIT_LOG_ENQUEUE_TIMEOUT_SECONDS", "0.1"))
 
 # API configuration
 API_HOST = os.getenv("API_HOST", "localhost")
@@ -106,6 +121,10 @@ STATIC_USERS = {
     }
 }
 
+# Cache of successful password verifications so bcrypt does not run on every request
+AUTH_CACHE_TTL_SECONDS = float(os.getenv("AUTH_CACHE_TTL_SECONDS", "300"))
+AUTH_CACHE_MAX_ENTRIES = int(os.getenv("AUTH_CACHE_MAX_ENTRIES", "1024"))  # 0 disables the cache
+
 # Role configuration - Updated for agriculture roles
 AVAILABLE_ROLES = [
     "Admin", 
@@ -140,6 +159,89 @@ MAX_FILE_SIZE = 50 * 1024 * 1024  # 50MB
 CHUNK_SIZE = 1000
 CHUNK_OVERLAP = 200
 EMBEDDING_MODEL = os.getenv("EMBEDDING_MODEL", "text-embedding-ada-002")
+COHERE_RERANK_MODEL = os.getenv("COHERE_RERANK_MODEL", "rerank-english-v3.0")
+# Rerank /chat retrieval through Cohere with COHERE_API_KEY; COHERE_BASE_URL overrides the API host
+COHERE_RERANK_ENABLED = os.getenv("COHERE_RERANK_ENABLED", "false").lower() == "true"
+COHERE_BASE_URL = os.getenv("COHERE_BASE_URL")
+# Hybrid retrieval: vector and BM25 rankings of HYBRID_FETCH_K chunks each, merged by
+# reciprocal rank fusion with constant HYBRID_RRF_K
+HYBRID_RETRIEVAL_ENABLED = os.getenv("HYBRID_RETRIEVAL_ENABLED", "true").lower() == "true"
+HYBRID_FETCH_K = int(os.getenv("HYBRID_FETCH_K", "20"))
+HYBRID_RRF_K = int(os.getenv("HYBRID_RRF_K", "60"))
+# sentence-transformers cross-encoder reranking the fused chunks when no Cohere key is
+# given (e.g. "cross-encoder/ms-marco-MiniLM-L-6-v2"); unset disables it
+LOCAL_RERANKER_MODEL = os.getenv("LOCAL_RERANKER_MODEL", "")
+
+# Embedding backend: "openai" (text-embedding-3-small) or "local" (sentence-transformers on
+# LOCAL_EMBEDDING_DEVICE). Document vectors are cached in DuckDB by content hash unless disabled;
+# question vectors only in an in-memory LRU of EMBEDDING_QUERY_CACHE_SIZE entries
+EMBEDDING_BACKEND = os.getenv("EMBEDDING_BACKEND", "openai").lower()
+LOCAL_EMBEDDING_MODEL = os.getenv("LOCAL_EMBEDDING_MODEL", "all-MiniLM-L6-v2")
+LOCAL_EMBEDDING_DEVICE = os.getenv("LOCAL_EMBEDDING_DEVICE", "cpu")
+EMBEDDING_CACHE_ENABLED = os.getenv("EMBEDDING_CACHE_ENABLED", "true").lower() == "true"
+EMBEDDING_QUERY_CACHE_SIZE = int(os.getenv("EMBEDDING_QUERY_CACHE_SIZE", "1024"))
+
+# Indexer embedding pipeline; request pacing comes from OPENAI_RATE_LIMIT (requests/minute)
+EMBEDDING_BATCH_SIZE = int(os.getenv("EMBEDDING_BATCH_SIZE", "100"))
+EMBEDDING_MAX_CONCURRENCY = int(os.getenv("EMBEDDING_MAX_CONCURRENCY", "4"))
+EMBEDDING_MAX_RETRIES = int(os.getenv("EMBEDDING_MAX_RETRIES", "5"))
+
+# CSV ingestion for RAG: "grouped" packs rows into token-budgeted chunks with a
+# repeated header, "rows" keeps the old one-document-per-row behavior
+CSV_INGESTION_MODE = os.getenv("CSV_INGESTION_MODE", "grouped").lower()
+CSV_CHUNK_TOKEN_BUDGET = int(os.getenv("CSV_CHUNK_TOKEN_BUDGET", "500"))
+CSV_READ_CHUNK_ROWS = int(os.getenv("CSV_READ_CHUNK_ROWS", "10000"))
+# Skip embedding CSVs whose table is already queryable through DuckDB (SQL path)
+CSV_SKIP_RAG_FOR_SQL_TABLES = os.getenv("CSV_SKIP_RAG_FOR_SQL_TABLES", "false").lower() == "true"
+
+# Storage for CSV tables: "table" copies the rows into the DuckDB file, "parquet" keeps them as
+# compressed Parquet under PARQUET_DIR/<role>/<table>/ (optionally hive-partitioned) behind a view
+CSV_TABLE_STORAGE = os.getenv("CSV_TABLE_STORAGE", "table").lower()
+PARQUET_DIR = Path(os.getenv("PARQUET_DIR", str(DUCKDB_DIR)))
+PARQUET_COMPRESSION = os.getenv("PARQUET_COMPRESSION", "zstd")
+PARQUET_ROW_GROUP_SIZE = int(os.getenv("PARQUET_ROW_GROUP_SIZE", "122880"))
+
+# Startup sync of the role CSVs shipped in resources_2 into DuckDB. Files unchanged since the
+# last sync (same size and mtime, or same content hash) are skipped; changed files are parsed
+# by CSV_BOOTSTRAP_WORKERS threads. CSV_BOOTSTRAP_PARQUET stores them in the Parquet tier
+CSV_BOOTSTRAP_ENABLED = os.getenv("CSV_BOOTSTRAP_ENABLED", "true").lower() == "true"
+CSV_BOOTSTRAP_WORKERS = int(os.getenv("CSV_BOOTSTRAP_WORKERS", "4"))
+CSV_BOOTSTRAP_PARQUET = os.getenv("CSV_BOOTSTRAP_PARQUET", str(CSV_TABLE_STORAGE == "parquet")).lower() == "true"
+
+# Answer cache for /chat, keyed by question, role and data version
+ANSWER_CACHE_ENABLED = os.getenv("ANSWER_CACHE_ENABLED", "true").lower() == "true"
+ANSWER_CACHE_MAX_BYTES = int(os.getenv("ANSWER_CACHE_MAX_BYTES", str(64 * 1024 * 1024)))
+ANSWER_CACHE_TTL_SECONDS = float(os.getenv("ANSWER_CACHE_TTL_SECONDS", "3600"))
+# Cosine similarity for near-duplicate questions (e.g. 0.95); unset disables the semantic tier
+ANSWER_CACHE_SEMANTIC_THRESHOLD = (
+    float(os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD"))
+    if os.getenv("ANSWER_CACHE_SEMANTIC_THRESHOLD") else None
+)
+
+# Local SQL/RAG classifier (TF-IDF + logistic regression). Its verdict is final at or above
+# this confidence, otherwise the LLM classifier is asked (1.0 always asks, 0.5 never does)
+LOCAL_CLASSIFIER_ENABLED = os.getenv("LOCAL_CLASSIFIER_ENABLED", "true").lower() == "true"
+LOCAL_CLASSIFIER_PATH = Path(os.getenv("LOCAL_CLASSIFIER_PATH", str(DUCKDB_DIR / "query_classifier.npz")))
+LOCAL_CLASSIFIER_CONFIDENCE = float(os.getenv("LOCAL_CLASSIFIER_CONFIDENCE", "0.7"))
+
+# Speculative execution: when the keyword heuristic and the LLM classifier disagree (or the
+# LLM gives no verdict), SQL and RAG run concurrently. "first" keeps the first valid answer,
+# "preferred" keeps the classified mode's answer unless it fails
+SPECULATIVE_EXECUTION_ENABLED = os.getenv("SPECULATIVE_EXECUTION_ENABLED", "true").lower() == "true"
+SPECULATIVE_POLICY = os.getenv("SPECULATIVE_POLICY", "first").lower()
+
+# Request metrics and per-stage latency histograms exported on /metrics; requests slower
+# than METRICS_SLOW_REQUEST_SECONDS are logged with their stage breakdown
+METRICS_ENABLED = os.getenv("METRICS_ENABLED", "true").lower() == "true"
+METRICS_SLOW_REQUEST_SECONDS = float(os.getenv("METRICS_SLOW_REQUEST_SECONDS", "5"))
+
+# Logging: records go through a queue to a background writer. LOG_FORMAT is "json" (one
+# object per line, with the request ID) or "text"; LOG_DEBUG_SAMPLE_RATE keeps that fraction
+# of DEBUG records per call site so debug logging stays affordable under load
+LOG_LEVEL = os.getenv("LOG_LEVEL", "INFO").upper()
+LOG_FORMAT = os.getenv("LOG_FORMAT", "json").lower()
+LOG_DEBUG_SAMPLE_RATE = float(os.getenv("LOG_DEBUG_SAMPLE_RATE", "1.0"))
+LOG_QUEUE_MAX_SIZE = int(os.getenv("LOG_QUEUE_MAX_SIZE", "10000"))
 
 # LangSmith configuration for tracing
 LANGSMITH_TRACING_V2 = LANGSMITH_TRACING_V2
@@ -147,7 +249,12 @@ LANGSMITH_ENDPOINT = LANGSMITH_ENDPOINT
 LANGSMITH_PROJECT = LANGSMITH_PROJECT
 
 # SQL query configuration
-FORBIDDEN_SQL_KEYWORDS = ["insert", "update", "delete", "drop", "alter", "create", "truncate"]
+# Parsed validations of generated SQL kept in memory, keyed by SQL hash
+SQL_VALIDATION_CACHE_SIZE = int(os.getenv("SQL_VALIDATION_CACHE_SIZE", "1024"))
+# Limits for LLM-generated SQL: rows per result page, result size and run time
+SQL_RESULT_PAGE_SIZE = int(os.getenv("SQL_RESULT_PAGE_SIZE", "100"))
+SQL_MAX_RESULT_BYTES = int(os.getenv("SQL_MAX_RESULT_BYTES", str(1024 * 1024)))
+SQL_QUERY_TIMEOUT_SECONDS = float(os.getenv("SQL_QUERY_TIMEOUT_SECONDS", "15"))
 
 # Ensure directories exist
 def ensure_directories():
@@ -1,3 +1,5 @@
+import json
+
 import streamlit as st
 import requests
 from requests.auth import HTTPBasicAuth
@@ -7,7 +9,7 @@ from app.config import API_URL
 from app.frontend.ui_components import (
     load_custom_css, render_hero_section, render_login_form,
     render_user_header, render_chat_interface, render_upload_interface,
-    render_ai_response, render_loading_indicator, show_toast
+    render_streaming_response, show_toast
 )
 
 # Page configuration
@@ -58,6 +60,26 @@ def fetch_roles():
     except:
         return []
 
+def stream_chat(question: str):
+    """Ask /chat/stream and render the answer while it is generated."""
+    try:
+        with requests.post(
+            f"{API_URL}/chat/stream",
+            json={"question": question},
+            auth=HTTPBasicAuth(*st.session_state.auth),
+            timeout=(10, 60),
+            stream=True,
+        ) as res:
+            if res.status_code != 200:
+                show_toast("Something went wrong while processing your agriculture question.", variant="error", duration=3)
+                return
+            events = (json.loads(line) for line in res.iter_lines() if line)
+            final = render_streaming_response(events)
+        if final.get("event") == "error":
+            show_toast("Something went wrong while processing your agriculture question.", variant="error", duration=3)
+    except requests.exceptions.RequestException:
+        show_toast("Connection error. Please check if the server is running.", variant="error", duration=3)
+
 # -------------------------
 # LOGIN PAGE
 # -------------------------
@@ -128,28 +150,7 @@ if st.session_state.page == "main":
             question, submit_button = render_chat_interface()
             
             if submit_button and question:
-                try:
-                    loader = render_loading_indicator()
-                    res = requests.post(
-                        f"{API_URL}/chat",
-                        json={"question": question, "role": st.session_state.role},
-                        auth=HTTPBasicAuth(*st.session_state.auth),
-                        timeout=60,
-                    )
-                    
-                    if res.status_code == 200:
-                        response_data = res.json()
-                        loader.empty()
-                        render_ai_response(response_data["answer"], response_data.get("sql"))
-                    else:
-                        loader.empty()
-                        show_toast("Something went wrong while processing your agriculture question.", variant="error", duration=3)
-                except requests.exceptions.RequestException:
-                    try:
-                        loader.empty()
-                    except Exception:
-                        pass
-                    show_toast("Connection error. Please check if the server is running.", variant="error", duration=3)
+                stream_chat(question)
             elif submit_button and not question:
                 show_toast("Please enter a question first.", variant="error", duration=3)
         
@@ -192,28 +193,7 @@ if st.session_state.page == "main":
             question, submit_button = render_chat_interface()
             
             if submit_button and question:
-                try:
-                    loader = render_loading_indicator()
-                    res = requests.post(
-                        f"{API_URL}/chat",
-                        json={"question": question, "role": st.session_state.role},
-                        auth=HTTPBasicAuth(*st.session_state.auth),
-                        timeout=60,
-                    )
-                    
-                    if res.status_code == 200:
-                        response_data = res.json()
-                        loader.empty()
-                        render_ai_response(response_data["answer"], response_data.get("sql"))
-                    else:
-                        loader.empty()
-                        show_toast("Something went wrong while processing your agriculture question.", variant="error", duration=3)
-                except requests.exceptions.RequestException:
-                    try:
-                        loader.empty()
-                    except Exception:
-                        pass
-                    show_toast("Connection error. Please check if the server is running.", variant="error", duration=3)
+                stream_chat(question)
             elif submit_button and not question:
                 show_toast("Please enter your question.", variant="error", duration=3)
 
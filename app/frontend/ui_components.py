@@ -3,7 +3,7 @@ This code contain reusable UI components, styling, and layout functions
 """
 
 import streamlit as st
-from typing import List, Dict, Any, Optional
+from typing import List, Dict, Any, Iterable, Optional
 import time
 import html
 import re
@@ -147,20 +147,23 @@ def show_toast(message: str, variant: str = "error", duration: float = 3.0):
         time.sleep(3)
     placeholder.empty()
 
-def render_loading_indicator(message: str = "Generating AI response..."):
-    """Render a compact loader card and return its placeholder for later clearing."""
-    placeholder = st.empty()
+def _show_loader(placeholder, message: str):
     placeholder.markdown(
         f"""
         <div class="ai-loader">
             <div class="ai-dot"></div>
             <div class="ai-dot"></div>
             <div class="ai-dot"></div>
-            <div class="ai-loader-text">{message}</div>
+            <div class="ai-loader-text">{html.escape(message)}</div>
         </div>
         """,
         unsafe_allow_html=True,
     )
+
+def render_loading_indicator(message: str = "Generating AI response..."):
+    """Render a compact loader card and return its placeholder for later clearing."""
+    placeholder = st.empty()
+    _show_loader(placeholder, message)
     return placeholder
 
 def render_ai_response(answer: str, sql: Optional[str] = None):
@@ -178,12 +181,57 @@ def render_ai_response(answer: str, sql: Optional[str] = None):
             time.sleep(0.01)
     placeholder.markdown(full_markdown)
     if sql:
-        st.markdown(
-            """
-            <div style="background: rgba(17, 24, 39, 0.9); border-radius: 12px; padding: 16px; margin-top: 12px; border: 1px solid rgba(0, 212, 170, 0.2);">
-                <h4 style="color: #00d4aa; margin: 0 0 10px 0;">🔍 Generated SQL Query</h4>
-            </div>
-            """,
-            unsafe_allow_html=True,
-        )
-        st.code(sql, language="sql")
+        _render_sql_block(sql)
+
+def _render_sql_block(sql: str):
+    st.markdown(
+        """
+        <div style="background: rgba(17, 24, 39, 0.9); border-radius: 12px; padding: 16px; margin-top: 12px; border: 1px solid rgba(0, 212, 170, 0.2);">
+            <h4 style="color: #00d4aa; margin: 0 0 10px 0;">🔍 Generated SQL Query</h4>
+        </div>
+        """,
+        unsafe_allow_html=True,
+    )
+    st.code(sql, language="sql")
+
+_PROGRESS_MESSAGES = {
+    "SQL": "Answering from structured data...",
+    "RAG": "Searching agriculture documents...",
+}
+
+def render_streaming_response(events: Iterable[Dict[str, Any]]) -> Dict[str, Any]:
+    """
+    Render a /chat/stream response as it arrives and return the final "done" event.
+
+    Progress events update the loader text; answer tokens are written
+    incrementally with st.write_stream. An "error" event is returned as-is.
+    """
+    st.markdown('<div class="ai-response-anchor"></div>', unsafe_allow_html=True)
+    st.markdown("#### 🤖 AI Response")
+    status = render_loading_indicator("Understanding your question...")
+    final: Dict[str, Any] = {}
+
+    def tokens():
+        for event in events:
+            kind = event.get("event")
+            if kind == "token":
+                status.empty()
+                yield event["text"]
+            elif kind == "mode":
+                _show_loader(status, _PROGRESS_MESSAGES.get(event.get("mode"), "Working on your question..."))
+            elif kind == "fallback":
+                _show_loader(status, "No table answers this, searching documents instead...")
+            elif kind == "sql":
+                _show_loader(status, "Running the generated SQL query...")
+            elif kind == "rows":
+                _show_loader(status, f"Fetched {event.get('row_count', 0)} rows")
+            elif kind == "retrieved":
+                _show_loader(status, f"Found {event.get('documents', 0)} relevant passages, writing the answer...")
+            elif kind in ("done", "error"):
+                final.update(event)
+        status.empty()
+
+    st.write_stream(tokens())
+    if final.get("sql"):
+        _render_sql_block(final["sql"])
+    return final
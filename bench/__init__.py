@@ -0,0 +1,6 @@
+"""
+Offline benchmarks and load tests for the Agriculture RBAC-Project backend.
+
+Scripts in this package are run from the project root, for example:
+    python -m bench.chat_concurrency
+"""
@@ -0,0 +1,87 @@
+"""
+Caller-side cost of audit logging.
+
+Compares the old synchronous pattern (health-check ``SELECT 1`` plus a
+single-row INSERT on the shared connection per call) with
+``DatabaseManager.log_query``, which queues the row for the background
+batch writer. Reports per-call latency percentiles and total throughput, then
+flushes and checks that every row reached query_log.
+
+Usage:
+    python -m bench.audit_log --calls 20000
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+
+def _percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] * 1e6
+
+
+def _sync_log(conn, i):
+    conn.execute("SELECT 1")
+    conn.execute("""
+        INSERT INTO query_log (username, role, query_type, query_text, success, error_message)
+        VALUES (?, ?, ?, ?, ?, ?)
+    """, ["bench", "Admin", "SQL", f"question {i}", True, None])
+
+
+def run(calls: int) -> list:
+    from app.backend.database import DatabaseManager
+
+    results = []
+    with tempfile.TemporaryDirectory(prefix="agri-audit-") as workdir:
+        db_manager = DatabaseManager(Path(workdir) / "audit.duckdb")
+        conn = db_manager.get_connection()
+
+        for mode in ("sync_insert", "batched_queue"):
+            latencies = []
+            start = time.perf_counter()
+            for i in range(calls):
+                t0 = time.perf_counter()
+                if mode == "sync_insert":
+                    _sync_log(conn, i)
+                else:
+                    db_manager.log_query("bench", "Admin", "SQL", f"question {i}", True)
+                latencies.append(time.perf_counter() - t0)
+            enqueue_s = time.perf_counter() - start
+            db_manager.flush_query_log()
+            total_s = time.perf_counter() - start
+            results.append({
+                "mode": mode,
+                "p50_us": _percentile(latencies, 50),
+                "p99_us": _percentile(latencies, 99),
+                "caller_s": enqueue_s,
+                "total_s": total_s,
+                "rows_per_s": calls / total_s,
+            })
+
+        stored = conn.execute("SELECT COUNT(*) FROM query_log").fetchone()[0]
+        writer_stats = db_manager._query_log_writer.stats
+        db_manager.close_connection()
+    print(f"query_log rows: {stored} (expected {2 * calls}); writer stats: {writer_stats}")
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--calls", type=int, default=20000)
+    args = parser.parse_args()
+
+    results = run(args.calls)
+    print(f"{'mode':>14} {'p50_us':>8} {'p99_us':>8} {'caller_s':>9} {'total_s':>8} {'rows/s':>9}")
+    for r in results:
+        print(
+            f"{r['mode']:>14} {r['p50_us']:>8.1f} {r['p99_us']:>8.1f} {r['caller_s']:>9.3f} "
+            f"{r['total_s']:>8.3f} {r['rows_per_s']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,72 @@
+"""
+Authentication throughput benchmark for the verified-credential cache.
+
+Measures requests/sec on /login and /roles (the routes the Streamlit UI hits
+with HTTP Basic credentials) with the cache disabled and enabled. A bench
+user with a cost-12 bcrypt hash, matching STATIC_USERS, is registered for
+the run.
+
+Usage:
+    python -m bench.auth_throughput --requests 20 --concurrency 4
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from bench.backend import load_backend
+
+BENCH_USER = "bench_farmer"
+BENCH_PASSWORD = "bench-password"
+
+
+async def _measure(app, route: str, requests: int, concurrency: int) -> float:
+    transport = httpx.ASGITransport(app=app)
+    semaphore = asyncio.Semaphore(concurrency)
+    async with httpx.AsyncClient(transport=transport, base_url="http://bench", auth=(BENCH_USER, BENCH_PASSWORD)) as client:
+        async def one():
+            async with semaphore:
+                res = await client.get(route)
+                res.raise_for_status()
+
+        # Warm-up so the cached mode is measured in steady state
+        await one()
+        start = time.perf_counter()
+        await asyncio.gather(*(one() for _ in range(requests)))
+        return requests / (time.perf_counter() - start)
+
+
+def run(requests: int, concurrency: int) -> list:
+    main = load_backend(override_auth=False)
+
+    from passlib.hash import bcrypt
+    from app.backend import auth
+    from app.config import STATIC_USERS
+
+    STATIC_USERS[BENCH_USER] = {"password": bcrypt.using(rounds=12).hash(BENCH_PASSWORD), "role": "Farmer"}
+
+    results = []
+    for label, max_entries in (("no cache", 0), ("cache", 1024)):
+        auth.credential_cache = auth.VerifiedCredentialCache(max_entries=max_entries)
+        for route in ("/login", "/roles"):
+            rps = asyncio.run(_measure(main.app, route, requests, concurrency))
+            results.append({"mode": label, "route": route, "requests_per_s": rps})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=4)
+    args = parser.parse_args()
+
+    results = run(args.requests, args.concurrency)
+    print(f"{'mode':>9} {'route':>8} {'req/s':>10}")
+    for r in results:
+        print(f"{r['mode']:>9} {r['route']:>8} {r['requests_per_s']:>10.1f}")
+
+
+if __name__ == "__main__":
+    main()
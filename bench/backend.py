@@ -0,0 +1,67 @@
+"""
+Helpers for running the FastAPI backend in-process against the fake OpenAI server.
+
+The backend is imported from an isolated working directory so the benchmark
+never touches the project's chroma_db or structured_queries.duckdb.
+"""
+
+import os
+import shutil
+import sys
+import tempfile
+from pathlib import Path
+
+REPO_ROOT = Path(__file__).resolve().parents[1]
+if str(REPO_ROOT) not in sys.path:
+    sys.path.insert(0, str(REPO_ROOT))
+
+BENCH_USERNAME = "admin"
+BENCH_ROLE = "Admin"
+
+
+def load_backend(openai_base_url: str = None, workdir: Path = None, override_auth: bool = True,
+                 cohere_base_url: str = None):
+    """
+    Import app.backend.main wired to the fake OpenAI server and a scratch DuckDB.
+
+    Returns the imported ``main`` module. Unless ``override_auth`` is False,
+    authentication is overridden so the benchmark measures the /chat pipeline
+    rather than bcrypt. With ``cohere_base_url``, RAG answers are reranked
+    through the fake Cohere server.
+    """
+    workdir = Path(workdir or tempfile.mkdtemp(prefix="agri-bench-"))
+    shutil.copytree(REPO_ROOT / "resources_2", workdir / "resources_2", dirs_exist_ok=True)
+    os.environ["OPENAI_API_KEY"] = "bench-key"
+    if openai_base_url:
+        os.environ["OPENAI_BASE_URL"] = openai_base_url
+    if cohere_base_url:
+        os.environ["COHERE_API_KEY"] = "bench-key"
+        os.environ["COHERE_BASE_URL"] = cohere_base_url
+        os.environ["COHERE_RERANK_ENABLED"] = "true"
+    else:
+        os.environ.pop("COHERE_API_KEY", None)
+    os.chdir(workdir)
+
+    from app.backend import main
+    from app.backend import database
+    from app.backend.rag_utils import rag_module
+    from app.backend.auth import authenticate_user
+    from app.backend.models import UserInfo
+    from app.backend.csv_bootstrap import sync_resource_csvs
+
+    # rag_module enables LangSmith tracing on import; benchmarks must stay offline
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    # Send raw text to the stub instead of tiktoken IDs (tiktoken downloads its vocabulary)
+    embeddings = rag_module.rag_service.embeddings
+    # The OpenAI client sits inside the embedding cache wrapper
+    getattr(embeddings, "embeddings", embeddings).check_embedding_ctx_length = False
+
+    database._db_manager = database.DatabaseManager(workdir / "bench.duckdb")
+    # httpx's ASGITransport does not run the lifespan, so load the role CSVs here
+    sync_resource_csvs(database._db_manager, workdir / "resources_2")
+
+    if override_auth:
+        main.app.dependency_overrides[authenticate_user] = lambda: UserInfo(
+            username=BENCH_USERNAME, role=BENCH_ROLE, password_hash=""
+        )
+    return main
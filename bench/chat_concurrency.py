@@ -0,0 +1,83 @@
+"""
+Concurrency load test for the /chat pipeline.
+
+Starts the fake OpenAI server with an injected per-call delay and fires
+batches of concurrent /chat requests at the in-process FastAPI app. With a
+non-blocking pipeline the wall time of a batch stays close to the latency of
+a single request as concurrency grows, instead of growing linearly.
+
+Usage:
+    python -m bench.chat_concurrency --latency 0.2 --concurrency 1 4 16 32
+"""
+
+import argparse
+import asyncio
+import time
+
+import httpx
+
+from bench.backend import load_backend
+from bench.fake_openai import FakeOpenAIServer
+
+QUESTIONS = [
+    "What are the best practices for rice irrigation?",
+    "How many employees are listed in the HR dataset?",
+    "Explain crop rotation for small farms",
+    "What is the total number of records in the table?",
+]
+
+
+async def _run_batch(client: httpx.AsyncClient, concurrency: int) -> list:
+    async def one(i: int) -> float:
+        start = time.perf_counter()
+        res = await client.post("/chat", json={"question": QUESTIONS[i % len(QUESTIONS)]})
+        res.raise_for_status()
+        return time.perf_counter() - start
+
+    return await asyncio.gather(*(one(i) for i in range(concurrency)))
+
+
+async def run(latency: float, levels: list) -> list:
+    results = []
+    with FakeOpenAIServer(latency=latency) as server:
+        main = load_backend(server.base_url)
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            # Warm-up request so imports and connections are not measured
+            await _run_batch(client, 1)
+            baseline = None
+            for concurrency in levels:
+                start = time.perf_counter()
+                latencies = await _run_batch(client, concurrency)
+                wall = time.perf_counter() - start
+                mean_latency = sum(latencies) / len(latencies)
+                if baseline is None:
+                    baseline = mean_latency
+                results.append({
+                    "concurrency": concurrency,
+                    "wall_s": wall,
+                    "throughput_rps": concurrency / wall,
+                    "mean_latency_s": mean_latency,
+                    # Speedup over running the same requests one after another
+                    "speedup_vs_serial": (baseline * concurrency) / wall,
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="Injected LLM latency in seconds")
+    parser.add_argument("--concurrency", type=int, nargs="+", default=[1, 4, 16, 32])
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args.latency, args.concurrency))
+    print(f"{'concurrency':>11} {'wall_s':>8} {'req/s':>8} {'mean_lat_s':>11} {'speedup':>8}")
+    for r in results:
+        print(
+            f"{r['concurrency']:>11} {r['wall_s']:>8.3f} {r['throughput_rps']:>8.2f} "
+            f"{r['mean_latency_s']:>11.3f} {r['speedup_vs_serial']:>8.1f}x"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,112 @@
+"""
+Time to first token of /chat/stream against the full /chat latency.
+
+Runs the backend under uvicorn (so the NDJSON stream really is incremental)
+against the fake OpenAI server streaming one word per ``--token-latency``.
+For each question it measures the /chat response time, and for
+/chat/stream the client-side time to the first progress event, the first
+token and the final "done" event, and checks the event order. The answer
+cache is disabled so every request runs the pipeline.
+
+Usage:
+    python -m bench.chat_stream --latency 0.3 --token-latency 0.03 --rounds 5
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import threading
+import time
+
+import httpx
+import uvicorn
+
+from bench.backend import load_backend
+from bench.fake_openai import FakeOpenAIServer, _free_port
+
+QUESTIONS = [
+    "What are the best practices for rice irrigation?",
+    "How many employees are listed in the HR dataset?",
+    "Explain crop rotation for small farms",
+]
+
+
+def _stream(client: httpx.Client, question: str) -> dict:
+    start = time.perf_counter()
+    first_event = first_token = None
+    kinds, done = [], {}
+    with client.stream("POST", "/chat/stream", json={"question": question}) as res:
+        res.raise_for_status()
+        for line in res.iter_lines():
+            if not line:
+                continue
+            event = json.loads(line)
+            now = time.perf_counter() - start
+            first_event = first_event if first_event is not None else now
+            if event["event"] == "token" and first_token is None:
+                first_token = now
+            if not kinds or kinds[-1] != event["event"]:
+                kinds.append(event["event"])
+            if event["event"] in ("done", "error"):
+                done = event
+    return {
+        "first_event_s": first_event,
+        "ttft_s": first_token,
+        "total_s": time.perf_counter() - start,
+        "events": kinds,
+        "done": done,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.3, help="LLM time to first token in seconds")
+    parser.add_argument("--token-latency", type=float, default=0.03, help="seconds per further streamed word")
+    parser.add_argument("--rounds", type=int, default=5)
+    args = parser.parse_args()
+
+    with FakeOpenAIServer(latency=args.latency, token_latency=args.token_latency) as fake:
+        main_module = load_backend(fake.base_url)
+        main_module.answer_cache = None
+        port = _free_port()
+        server = uvicorn.Server(uvicorn.Config(main_module.app, host="127.0.0.1", port=port, log_level="warning"))
+        thread = threading.Thread(target=server.run, daemon=True)
+        thread.start()
+        while not server.started:
+            time.sleep(0.01)
+
+        failures = []
+        print(f"{'question':<52} {'chat_s':>7} {'first_evt_s':>11} {'ttft_s':>7} {'stream_s':>8}  events")
+        with httpx.Client(base_url=f"http://127.0.0.1:{port}", timeout=120) as client:
+            for question in QUESTIONS:
+                client.post("/chat", json={"question": question}).raise_for_status()  # warm-up
+                chat_times, streams = [], []
+                for _ in range(args.rounds):
+                    start = time.perf_counter()
+                    answer = client.post("/chat", json={"question": question}).json()["answer"]
+                    chat_times.append(time.perf_counter() - start)
+                    streams.append(_stream(client, question))
+                last = streams[-1]
+                if last["done"].get("event") != "done" or last["events"][-2:] != ["token", "done"]:
+                    failures.append(f"{question}: unexpected events {last['events']}")
+                elif last["done"]["answer"] != answer:
+                    failures.append(f"{question}: streamed answer differs from /chat")
+                print(
+                    f"{question[:52]:<52} {statistics.median(chat_times):>7.3f} "
+                    f"{statistics.median(s['first_event_s'] for s in streams):>11.3f} "
+                    f"{statistics.median(s['ttft_s'] for s in streams):>7.3f} "
+                    f"{statistics.median(s['total_s'] for s in streams):>8.3f}  {' > '.join(last['events'])}"
+                )
+        server.should_exit = True
+        thread.join(timeout=5)
+
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
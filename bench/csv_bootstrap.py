@@ -0,0 +1,108 @@
+"""
+Cold-start cost of loading the role CSVs into DuckDB at startup.
+
+Generates ``--files`` CSVs of ``--rows`` rows spread over the role folders of
+a scratch resources directory, then for each storage mode (native tables and
+Parquet views) and worker count measures:
+
+- cold: the first sync into an empty database
+- warm: a restart with every file unchanged (stat check only)
+- touched: a restart after every file's mtime changed (content hash only)
+- first query: median latency of the first ``count(*)`` on each table
+
+Usage:
+    python -m bench.csv_bootstrap --files 8 --rows 200000 --workers 1 4
+"""
+
+import argparse
+import csv
+import os
+import random
+import shutil
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+CROPS = ["rice", "wheat", "maize", "sugarcane", "cotton", "groundnut", "millet", "pulses"]
+DISTRICTS = ["Chennai", "Madurai", "Coimbatore", "Salem", "Tiruchirappalli", "Thanjavur", "Erode", "Vellore"]
+
+
+def generate_resources(root: Path, files: int, rows: int, seed: int = 7) -> Path:
+    from app.backend.constants import ROLE_FOLDER_MAPPING
+
+    rng = random.Random(seed)
+    folders = list(ROLE_FOLDER_MAPPING.values())
+    for i in range(files):
+        folder = root / folders[i % len(folders)]
+        folder.mkdir(parents=True, exist_ok=True)
+        with open(folder / f"bench_dataset_{i}.csv", "w", newline="") as f:
+            writer = csv.writer(f)
+            writer.writerow(["record_id", "district", "crop", "season", "area_hectares", "yield_tonnes", "price_per_quintal"])
+            for row in range(rows):
+                writer.writerow([
+                    row, rng.choice(DISTRICTS), rng.choice(CROPS), rng.choice(["kharif", "rabi", "zaid"]),
+                    round(rng.uniform(0.5, 40), 2), round(rng.uniform(1, 200), 2), rng.randint(1200, 4800),
+                ])
+    return root
+
+
+def run_mode(resources: Path, db_path: Path, workers: int, parquet: bool) -> dict:
+    from app.backend.csv_bootstrap import sync_resource_csvs
+    from app.backend.database import DatabaseManager
+
+    db_manager = DatabaseManager(db_path)
+    try:
+        cold = sync_resource_csvs(db_manager, resources, workers=workers, parquet=parquet)
+        warm = sync_resource_csvs(db_manager, resources, workers=workers, parquet=parquet)
+        now = time.time()
+        for path in resources.rglob("*.csv"):
+            os.utime(path, (now, now))
+        touched = sync_resource_csvs(db_manager, resources, workers=workers, parquet=parquet)
+    finally:
+        db_manager.close_connection()
+    return {
+        "cold_s": cold["seconds"],
+        "warm_s": warm["seconds"],
+        "touched_s": touched["seconds"],
+        "loaded": len(cold["loaded"]),
+        "failed": len(cold["failed"]),
+        "first_query_ms": statistics.median(cold["first_query_seconds"].values()) * 1000
+        if cold["first_query_seconds"] else float("nan"),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--files", type=int, default=8)
+    parser.add_argument("--rows", type=int, default=200000, help="Rows per generated CSV")
+    parser.add_argument("--workers", type=int, nargs="+", default=[1, 4])
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="agri-bench-") as tmp:
+        tmp = Path(tmp)
+        # Kept Parquet files must land in the scratch directory, not static/data
+        os.environ["PARQUET_DIR"] = str(tmp / "parquet")
+        resources = generate_resources(tmp / "resources_2", args.files, args.rows)
+        size_mb = sum(path.stat().st_size for path in resources.rglob("*.csv")) / 1e6
+        print(f"{args.files} CSVs x {args.rows} rows ({size_mb:.1f} MB)")
+        print(f"  {'storage':<8} {'workers':>7} {'cold s':>8} {'warm s':>8} {'touched s':>10} {'1st query ms':>13} {'db MB':>8}")
+        for parquet in (False, True):
+            for workers in args.workers:
+                db_path = tmp / f"bench-{int(parquet)}-{workers}.duckdb"
+                result = run_mode(resources, db_path, workers, parquet)
+                on_disk = db_path.stat().st_size
+                if parquet:
+                    on_disk += sum(path.stat().st_size for path in (tmp / "parquet").rglob("*.parquet"))
+                storage = "parquet" if parquet else "table"
+                print(f"  {storage:<8} {workers:>7} {result['cold_s']:8.2f} {result['warm_s']:8.3f} "
+                      f"{result['touched_s']:10.3f} {result['first_query_ms']:13.2f} {on_disk / 1e6:8.1f}")
+                if result["failed"]:
+                    print(f"  ({result['failed']} files failed to load)")
+                shutil.rmtree(tmp / "parquet", ignore_errors=True)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Indexing benchmark for CSV ingestion modes.
+
+Generates a large agriculture CSV and indexes it through the real
+load_file/embed_documents_to_vectorstore path against the fake OpenAI server,
+once per ingestion mode:
+
+- rows:    one Document per row (the original behavior)
+- grouped: token-budgeted row groups with a repeated header
+- skip:    the CSV is already a DuckDB table and CSV_SKIP_RAG_FOR_SQL_TABLES is on
+
+Reports indexing time, chunks in the collection, embedding requests and the
+on-disk size of the Chroma directory.
+
+Usage:
+    python -m bench.csv_ingestion --rows 100000 --modes rows grouped skip
+"""
+
+import argparse
+import csv
+import random
+import shutil
+import time
+from pathlib import Path
+
+from bench.backend import load_backend
+from bench.fake_openai import FakeOpenAIServer
+
+CROPS = ["rice", "wheat", "maize", "sugarcane", "cotton", "groundnut", "millet", "pulses"]
+DISTRICTS = ["Chennai", "Madurai", "Coimbatore", "Salem", "Trichy", "Erode", "Vellore", "Thanjavur"]
+
+
+def generate_csv(path: Path, rows: int, seed: int = 7):
+    rng = random.Random(seed)
+    with open(path, "w", newline="", encoding="utf-8") as f:
+        writer = csv.writer(f)
+        writer.writerow(["record_id", "district", "crop", "season", "area_ha", "yield_kg_per_ha", "irrigation", "farmer_count"])
+        for i in range(rows):
+            writer.writerow([
+                i + 1,
+                rng.choice(DISTRICTS),
+                rng.choice(CROPS),
+                rng.choice(["kharif", "rabi", "zaid"]),
+                round(rng.uniform(0.5, 120.0), 2),
+                rng.randint(800, 6500),
+                rng.choice(["drip", "canal", "borewell", "rainfed"]),
+                rng.randint(1, 400),
+            ])
+
+
+def _dir_size(path: Path) -> int:
+    return sum(p.stat().st_size for p in path.rglob("*") if p.is_file()) if path.exists() else 0
+
+
+def run_mode(mode: str, csv_path: Path, server, rag_module, database) -> dict:
+    # A fresh persist directory per mode keeps collection sizes comparable
+    persist_directory = Path(f"chroma_{mode}")
+    shutil.rmtree(persist_directory, ignore_errors=True)
+    rag_module.rag_service.shutdown()
+    rag_module.CHROMA_PERSIST_DIRECTORY = str(persist_directory)
+    embeddings = rag_module.rag_service.embeddings
+    # The OpenAI client sits inside the embedding cache wrapper
+    getattr(embeddings, "embeddings", embeddings).check_embedding_ctx_length = False
+
+    rag_module.CSV_SKIP_RAG_FOR_SQL_TABLES = mode == "skip"
+    rag_module.CSV_INGESTION_MODE = "rows" if mode == "rows" else "grouped"
+    if mode == "skip":
+        database.get_db_manager().create_table_from_csv_path(
+            database.csv_table_name(csv_path.name), str(csv_path), "Farmer"
+        )
+
+    requests_before = server.stats["embeddings"]
+    start = time.perf_counter()
+    docs = rag_module.load_file(csv_path, "farmer")
+    chunk_ids = rag_module.embed_documents_to_vectorstore(docs) if docs else []
+    elapsed = time.perf_counter() - start
+    return {
+        "mode": mode,
+        "seconds": elapsed,
+        "chunks": len(chunk_ids),
+        "collection_count": rag_module.rag_service.collection.count(),
+        "embedding_requests": server.stats["embeddings"] - requests_before,
+        "chroma_mb": _dir_size(persist_directory) / 1e6,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=100000)
+    parser.add_argument("--modes", nargs="+", default=["rows", "grouped", "skip"], choices=["rows", "grouped", "skip"])
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    args = parser.parse_args()
+
+    results = []
+    with FakeOpenAIServer(embedding_latency=args.embedding_latency) as server:
+        load_backend(server.base_url)
+        from app.backend import database
+        from app.backend.rag_utils import rag_module
+
+        csv_path = Path("bench_crop_records.csv").resolve()
+        generate_csv(csv_path, args.rows)
+        print(f"Generated {csv_path.name}: {args.rows} rows, {csv_path.stat().st_size / 1e6:.1f} MB")
+        for mode in args.modes:
+            results.append(run_mode(mode, csv_path, server, rag_module, database))
+
+    print(f"{'mode':>8} {'seconds':>9} {'chunks':>8} {'in_coll':>8} {'requests':>9} {'chroma_mb':>10}")
+    for r in results:
+        print(
+            f"{r['mode']:>8} {r['seconds']:>9.2f} {r['chunks']:>8} {r['collection_count']:>8} "
+            f"{r['embedding_requests']:>9} {r['chroma_mb']:>10.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
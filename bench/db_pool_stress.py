@@ -0,0 +1,153 @@
+"""
+Concurrency stress test for the DuckDB cursor pool.
+
+Many threads run LLM-style SELECTs through ``execute_query_with_columns``
+(the read-only pool) while other threads replace tables with
+``create_table_from_csv_path`` and write audit rows through ``log_query``
+(the serialized writer). The run fails if any read or write errors, if a
+write statement gets through the read-only pool, or if audit rows are lost.
+
+Usage:
+    python -m bench.db_pool_stress --readers 16 --writers 2 --seconds 10 --pool-size 4
+"""
+
+import argparse
+import csv
+import random
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from pathlib import Path
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+READ_QUERIES = [
+    "SELECT COUNT(*) AS total_rows FROM crop_yields",
+    "SELECT district, AVG(yield_kg) AS avg_yield FROM crop_yields GROUP BY district ORDER BY avg_yield DESC",
+    "SELECT crop, SUM(area_ha) AS area FROM crop_yields WHERE season = 'kharif' GROUP BY crop",
+    "SELECT * FROM crop_yields ORDER BY yield_kg DESC LIMIT 20",
+]
+
+
+def _write_csv(path: Path, rows: int, seed: int):
+    rng = random.Random(seed)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["district", "crop", "season", "area_ha", "yield_kg"])
+        for _ in range(rows):
+            writer.writerow([
+                rng.choice(["Chennai", "Madurai", "Salem", "Erode"]),
+                rng.choice(["rice", "wheat", "maize", "cotton"]),
+                rng.choice(["kharif", "rabi"]),
+                round(rng.uniform(1, 50), 2),
+                rng.randint(800, 6000),
+            ])
+
+
+def run(args) -> dict:
+    from app.backend.database import DatabaseManager
+
+    workdir = Path(tempfile.mkdtemp(prefix="agri-pool-"))
+    csv_path = workdir / "crop_yields.csv"
+    _write_csv(csv_path, args.rows, seed=1)
+
+    db_manager = DatabaseManager(workdir / "stress.duckdb")
+    db_manager._read_pool.size = args.pool_size
+    db_manager._read_pool._available = threading.Semaphore(args.pool_size)
+    assert db_manager.create_table_from_csv_path("crop_yields", str(csv_path), "Farmer")
+
+    stop = threading.Event()
+    errors = []
+    read_latencies = []
+    counts = {"reads": 0, "table_replacements": 0, "audit_rows": 0}
+    lock = threading.Lock()
+
+    def reader(index: int):
+        rng = random.Random(index)
+        while not stop.is_set():
+            query = rng.choice(READ_QUERIES)
+            start = time.perf_counter()
+            try:
+                result = db_manager.execute_query_with_columns(query)
+                assert result["columns"]
+            except Exception as e:
+                errors.append(f"read: {e}")
+                continue
+            db_manager.log_query(f"reader{index}", "Farmer", "SQL", query, True)
+            with lock:
+                read_latencies.append(time.perf_counter() - start)
+                counts["reads"] += 1
+                counts["audit_rows"] += 1
+
+    def writer(index: int):
+        while not stop.is_set():
+            if not db_manager.create_table_from_csv_path("crop_yields", str(csv_path), "Farmer"):
+                errors.append("write: create_table_from_csv_path failed")
+            with lock:
+                counts["table_replacements"] += 1
+            time.sleep(args.write_interval)
+
+    threads = [threading.Thread(target=reader, args=(i,)) for i in range(args.readers)]
+    threads += [threading.Thread(target=writer, args=(i,)) for i in range(args.writers)]
+    start = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    time.sleep(args.seconds)
+    stop.set()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - start
+
+    # Writes must never get through the read-only pool
+    try:
+        db_manager.execute_query("DELETE FROM crop_yields")
+        errors.append("read-only pool accepted a DELETE")
+    except Exception:
+        pass
+
+    db_manager.flush_query_log()
+    logged = db_manager.execute_query("SELECT COUNT(*) FROM query_log")[0][0]
+    if logged != counts["audit_rows"]:
+        errors.append(f"audit rows lost: {logged} stored, {counts['audit_rows']} logged")
+    stats = db_manager.pool_stats()
+    db_manager.close_connection()
+
+    return {
+        **counts,
+        "seconds": elapsed,
+        "reads_per_s": counts["reads"] / elapsed,
+        "read_p50_ms": statistics.median(read_latencies) * 1000 if read_latencies else 0.0,
+        "read_p99_ms": statistics.quantiles(read_latencies, n=100)[98] * 1000 if len(read_latencies) > 1 else 0.0,
+        "pool": stats,
+        "errors": errors,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--readers", type=int, default=16)
+    parser.add_argument("--writers", type=int, default=2)
+    parser.add_argument("--seconds", type=float, default=10.0)
+    parser.add_argument("--pool-size", type=int, default=4)
+    parser.add_argument("--rows", type=int, default=20000)
+    parser.add_argument("--write-interval", type=float, default=0.2)
+    args = parser.parse_args()
+
+    result = run(args)
+    print(
+        f"{result['reads']} reads ({result['reads_per_s']:.0f}/s, p50 {result['read_p50_ms']:.2f} ms, "
+        f"p99 {result['read_p99_ms']:.2f} ms), {result['table_replacements']} table replacements, "
+        f"{result['audit_rows']} audit rows in {result['seconds']:.1f}s"
+    )
+    for name, stats in result["pool"].items():
+        print(f"{name:>5} pool: {stats}")
+    if result["errors"]:
+        print(f"FAIL: {len(result['errors'])} errors, first: {result['errors'][:3]}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,325 @@
+"""
+Offline end-to-end benchmark: replay a question workload against the full app.
+
+Starts the FastAPI app in-process (lifespan included) against the fake OpenAI
+server and the fake Cohere rerank server, indexes resources_2 with stub
+embeddings, and replays one or more workload files through /chat and
+/chat/stream with real HTTP Basic authentication for each of the nine
+STATIC_USERS (their password hashes are replaced with a benchmark password).
+
+A workload file has one JSON object per line, like requests.jsonl:
+
+    {"request_id": "w-001", "username": "farmer", "question": "...", "endpoint": "/chat"}
+
+``endpoint`` defaults to /chat and ``page`` to 1. The report covers
+throughput, client latency (p50/p95/p99, overall, per endpoint and per role),
+per-stage p50/p95/p99 from the app's stage timers, and process CPU time and
+RSS sampled with psutil. The stub servers run in the same process, so their
+(small) CPU cost is included.
+
+Results are written as JSON; ``--baseline`` compares against an earlier
+result and exits non-zero when throughput or p95 latency regress by more
+than ``--tolerance``.
+
+Usage:
+    python -m bench.e2e --concurrency 8 --repeat 3 --output e2e.json
+    python -m bench.e2e --baseline e2e.json
+"""
+
+import argparse
+import asyncio
+import json
+import os
+import sys
+import threading
+import time
+from collections import defaultdict
+from datetime import datetime, timezone
+from pathlib import Path
+
+import httpx
+import psutil
+
+from bench.backend import REPO_ROOT, load_backend
+from bench.fake_cohere import FakeCohereServer
+from bench.fake_openai import FakeOpenAIServer
+
+DEFAULT_WORKLOAD = REPO_ROOT / "bench" / "workloads" / "default.jsonl"
+BENCH_PASSWORD = "bench-password"
+
+
+def load_workload(paths) -> list:
+    items = []
+    for path in paths:
+        with open(path, encoding="utf-8") as f:
+            for line_number, line in enumerate(f, start=1):
+                if not line.strip():
+                    continue
+                item = json.loads(line)
+                item.setdefault("request_id", f"{Path(path).stem}-{line_number}")
+                item.setdefault("endpoint", "/chat")
+                item.setdefault("page", 1)
+                items.append(item)
+    return items
+
+
+def percentiles(values) -> dict:
+    """Nearest-rank p50/p95/p99 and mean, in milliseconds."""
+    if not values:
+        return {"count": 0}
+    ordered = sorted(values)
+
+    def rank(p):
+        return ordered[min(len(ordered) - 1, max(0, int(round(p / 100 * len(ordered))) - 1))] * 1000
+
+    return {
+        "count": len(ordered),
+        "mean_ms": sum(ordered) / len(ordered) * 1000,
+        "p50_ms": rank(50),
+        "p95_ms": rank(95),
+        "p99_ms": rank(99),
+    }
+
+
+class ResourceSampler:
+    """Samples process RSS in a background thread and CPU time around a run."""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.process = psutil.Process()
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self.peak_rss = 0
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_rss = max(self.peak_rss, self.process.memory_info().rss)
+            self._stop.wait(self.interval)
+
+    def __enter__(self):
+        self.start_rss = self.process.memory_info().rss
+        self.start_cpu = self.process.cpu_times()
+        self.start_time = time.perf_counter()
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        elapsed = time.perf_counter() - self.start_time
+        cpu = self.process.cpu_times()
+        cpu_seconds = (cpu.user - self.start_cpu.user) + (cpu.system - self.start_cpu.system)
+        end_rss = self.process.memory_info().rss
+        self.report = {
+            "cpu_seconds": cpu_seconds,
+            "cpu_percent": 100 * cpu_seconds / elapsed if elapsed else 0.0,
+            "rss_start_mb": self.start_rss / 1e6,
+            "rss_end_mb": end_rss / 1e6,
+            "rss_peak_mb": max(self.peak_rss, end_rss) / 1e6,
+        }
+
+
+def _set_bench_passwords(usernames) -> None:
+    from passlib.hash import bcrypt
+    from app.config import STATIC_USERS
+    password_hash = bcrypt.hash(BENCH_PASSWORD)
+    for username in usernames:
+        STATIC_USERS[username]["password"] = password_hash
+
+
+async def _replay(client: httpx.AsyncClient, items: list, concurrency: int, roles: dict) -> list:
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def one(item: dict, request_id: str) -> dict:
+        async with semaphore:
+            start = time.perf_counter()
+            error = None
+            try:
+                res = await client.post(
+                    item["endpoint"],
+                    json={"question": item["question"], "page": item["page"]},
+                    auth=(item["username"], BENCH_PASSWORD),
+                    headers={"X-Request-ID": request_id},
+                )
+                if res.status_code != 200:
+                    error = f"HTTP {res.status_code}"
+                elif item["endpoint"] == "/chat/stream":
+                    last = json.loads(res.text.strip().splitlines()[-1])
+                    if last.get("event") != "done":
+                        error = last.get("detail", "stream did not finish")
+            except Exception as e:
+                error = f"{type(e).__name__}: {e}"
+            return {
+                "request_id": request_id,
+                "endpoint": item["endpoint"],
+                "role": roles[item["username"]],
+                "seconds": time.perf_counter() - start,
+                "error": error,
+            }
+
+    return await asyncio.gather(*(one(item, f"{item['request_id']}#{i}") for i, item in enumerate(items)))
+
+
+async def run(args) -> dict:
+    workload = load_workload(args.workload)
+    with FakeOpenAIServer(latency=args.latency, latency_jitter=args.latency_jitter,
+                          embedding_latency=args.embedding_latency, token_latency=args.token_latency) as openai_server, \
+            FakeCohereServer(latency=args.rerank_latency) as cohere_server:
+        main = load_backend(openai_server.base_url, override_auth=False,
+                            cohere_base_url=None if args.no_cohere else cohere_server.base_url)
+        from app.backend import metrics
+        from app.backend.rag_utils import rag_module
+        from app.config import STATIC_USERS
+
+        unknown = sorted({item["username"] for item in workload} - set(STATIC_USERS))
+        if unknown:
+            raise SystemExit(f"Workload names unknown users: {', '.join(unknown)}")
+        _set_bench_passwords(STATIC_USERS)
+        roles = {username: user["role"] for username, user in STATIC_USERS.items()}
+        if args.no_answer_cache:
+            main.answer_cache = None
+
+        if not args.no_index:
+            start = time.perf_counter()
+            report = await asyncio.to_thread(rag_module.run_indexer)
+            print(f"Indexed {report['collection_count']} chunks in {time.perf_counter() - start:.1f}s")
+
+        traces = {}
+
+        def on_request(request_id, method, path, status, seconds, trace):
+            traces[request_id] = list(trace)
+
+        metrics.add_request_listener(on_request)
+        items = workload * args.repeat
+        transport = httpx.ASGITransport(app=main.app)
+        try:
+            async with main.app.router.lifespan_context(main.app):
+                async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=300) as client:
+                    # One request per user warms up connections and the credential cache
+                    warm_up = [{**item, "request_id": f"warmup-{item['username']}"}
+                               for item in {item["username"]: item for item in workload}.values()]
+                    await _replay(client, warm_up, args.concurrency, roles)
+                    traces.clear()
+
+                    with ResourceSampler() as sampler:
+                        start = time.perf_counter()
+                        results = await _replay(client, items, args.concurrency, roles)
+                        wall = time.perf_counter() - start
+        finally:
+            metrics.remove_request_listener(on_request)
+
+        stub_calls = {"openai": dict(openai_server.stats), "cohere": dict(cohere_server.stats)}
+
+    stage_samples = defaultdict(list)
+    for result in results:
+        for name, seconds in traces.get(result["request_id"], ()):
+            stage_samples[name].append(seconds)
+    by_endpoint, by_role = defaultdict(list), defaultdict(list)
+    for result in results:
+        by_endpoint[result["endpoint"]].append(result["seconds"])
+        by_role[result["role"]].append(result["seconds"])
+    errors = [result for result in results if result["error"]]
+
+    return {
+        "timestamp": datetime.now(timezone.utc).isoformat(),
+        "config": {
+            "workload": [str(path) for path in args.workload],
+            "concurrency": args.concurrency,
+            "repeat": args.repeat,
+            "latency": args.latency,
+            "latency_jitter": args.latency_jitter,
+            "token_latency": args.token_latency,
+            "embedding_latency": args.embedding_latency,
+            "rerank_latency": None if args.no_cohere else args.rerank_latency,
+            "answer_cache": not args.no_answer_cache,
+        },
+        "requests": len(results),
+        "errors": len(errors),
+        "error_samples": [f"{r['request_id']}: {r['error']}" for r in errors[:5]],
+        "wall_seconds": wall,
+        "throughput_rps": len(results) / wall if wall else 0.0,
+        "latency": percentiles([r["seconds"] for r in results]),
+        "by_endpoint": {name: percentiles(values) for name, values in sorted(by_endpoint.items())},
+        "by_role": {name: percentiles(values) for name, values in sorted(by_role.items())},
+        "stages": {name: percentiles(values) for name, values in sorted(stage_samples.items())},
+        "resources": sampler.report,
+        "stub_calls": stub_calls,
+    }
+
+
+def compare(result: dict, baseline: dict, tolerance: float) -> list:
+    """Regressions beyond ``tolerance`` (a fraction) relative to ``baseline``."""
+    regressions = []
+    if result["throughput_rps"] < baseline["throughput_rps"] * (1 - tolerance):
+        regressions.append(
+            f"throughput {result['throughput_rps']:.2f} req/s vs {baseline['throughput_rps']:.2f} req/s"
+        )
+    pairs = [("latency", result["latency"], baseline["latency"])]
+    pairs += [(f"stage {name}", result["stages"][name], baseline["stages"][name])
+              for name in result["stages"] if name in baseline.get("stages", {})]
+    for label, current, previous in pairs:
+        if current.get("count") and previous.get("count") and current["p95_ms"] > previous["p95_ms"] * (1 + tolerance):
+            regressions.append(f"{label} p95 {current['p95_ms']:.1f} ms vs {previous['p95_ms']:.1f} ms")
+    return regressions
+
+
+def _print_report(result: dict):
+    latency = result["latency"]
+    print(
+        f"\n{result['requests']} requests ({result['errors']} errors) in {result['wall_seconds']:.2f}s: "
+        f"{result['throughput_rps']:.2f} req/s; latency p50 {latency['p50_ms']:.0f} ms, "
+        f"p95 {latency['p95_ms']:.0f} ms, p99 {latency['p99_ms']:.0f} ms"
+    )
+    resources = result["resources"]
+    print(
+        f"CPU {resources['cpu_seconds']:.2f}s ({resources['cpu_percent']:.0f}% of a core); "
+        f"RSS {resources['rss_start_mb']:.0f} -> {resources['rss_end_mb']:.0f} MB (peak {resources['rss_peak_mb']:.0f} MB)"
+    )
+    for title, table in (("endpoint", result["by_endpoint"]), ("role", result["by_role"]), ("stage", result["stages"])):
+        print(f"\n  {title:<22} {'count':>6} {'p50_ms':>9} {'p95_ms':>9} {'p99_ms':>9}")
+        for name, row in table.items():
+            print(f"  {name:<22} {row['count']:>6} {row['p50_ms']:>9.1f} {row['p95_ms']:>9.1f} {row['p99_ms']:>9.1f}")
+    for sample in result["error_samples"]:
+        print(f"ERROR {sample}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--workload", type=Path, nargs="+", default=[DEFAULT_WORKLOAD])
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--repeat", type=int, default=3, help="Times the workload is replayed")
+    parser.add_argument("--latency", type=float, default=0.2, help="Injected LLM latency in seconds")
+    parser.add_argument("--latency-jitter", type=float, default=0.0)
+    parser.add_argument("--token-latency", type=float, default=0.0)
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    parser.add_argument("--rerank-latency", type=float, default=0.05)
+    parser.add_argument("--no-cohere", action="store_true", help="Do not rerank through the Cohere stub")
+    parser.add_argument("--no-answer-cache", action="store_true", help="Disable the /chat answer cache")
+    parser.add_argument("--no-index", action="store_true", help="Skip indexing resources_2 before the run")
+    parser.add_argument("--output", type=Path, help="Write the result as JSON")
+    parser.add_argument("--baseline", type=Path, help="Earlier JSON result to compare against")
+    parser.add_argument("--tolerance", type=float, default=0.2, help="Allowed regression as a fraction")
+    args = parser.parse_args()
+
+    # load_backend changes the working directory; resolve paths first
+    args.workload = [path.resolve() for path in args.workload]
+    output = args.output.resolve() if args.output else None
+    baseline = json.loads(args.baseline.read_text()) if args.baseline else None
+    os.environ["ANONYMIZED_TELEMETRY"] = "False"
+
+    result = asyncio.run(run(args))
+    _print_report(result)
+    if output:
+        output.write_text(json.dumps(result, indent=2))
+        print(f"\nWrote {output}")
+    if baseline:
+        regressions = compare(result, baseline, args.tolerance)
+        for regression in regressions:
+            print(f"REGRESSION {regression}")
+        if regressions:
+            sys.exit(1)
+        print(f"\nNo regressions beyond {args.tolerance:.0%} against {args.baseline}")
+
+
+if __name__ == "__main__":
+    main()
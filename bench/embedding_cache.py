@@ -0,0 +1,139 @@
+"""
+Hit rate and throughput of the content-addressed embedding cache.
+
+Chunks the resources_2 corpus the way the indexer does and embeds it three
+times through ``CachedEmbeddings`` backed by a scratch DuckDB file: a cold
+pass (every chunk embedded), a warm pass (an unchanged re-index, served from
+the cache) and a query pass of repeated questions. Each pass reports the
+cache hit rate, chunks per second and how many embedding calls reached the
+backend.
+
+``--backend openai`` embeds through the fake OpenAI server, so the numbers
+reflect its artificial latency; ``--backend local`` runs a sentence-transformers
+model on CPU and shows real local embedding throughput.
+
+Usage:
+    python -m bench.embedding_cache --backend local --model all-MiniLM-L6-v2
+"""
+
+import argparse
+import os
+import tempfile
+import time
+from pathlib import Path
+
+from bench.backend import REPO_ROOT
+from bench.fake_openai import FakeOpenAIServer
+
+QUESTIONS = [
+    "How should urea be applied to paddy?",
+    "Which model forecasts the wheat price?",
+    "What is the status of the PM-KISAN subsidy?",
+    "How many days of sick leave do employees get?",
+]
+
+
+def _corpus_texts():
+    from app.backend.rag_utils.rag_module import _iter_chunks, load_file
+    texts = []
+    for folder in sorted((REPO_ROOT / "resources_2").iterdir()):
+        for path in sorted(folder.iterdir()):
+            docs = load_file(path, folder.name)
+            if docs:
+                texts.extend(chunk.page_content for chunk in _iter_chunks(docs))
+    return texts
+
+
+class CallCounter:
+    """Counts embed_documents calls and texts reaching the wrapped backend."""
+
+    def __init__(self, embeddings):
+        self.embeddings = embeddings
+        self.calls = 0
+        self.texts = 0
+
+    def embed_documents(self, texts):
+        self.calls += 1
+        self.texts += len(texts)
+        return self.embeddings.embed_documents(texts)
+
+    def embed_query(self, text):
+        return self.embed_documents([text])[0]
+
+
+def _run_pass(name: str, cached, counter: CallCounter, texts, batch_size: int) -> dict:
+    before = cached.stats()
+    calls, embedded = counter.calls, counter.texts
+    start = time.perf_counter()
+    for i in range(0, len(texts), batch_size):
+        cached.embed_documents(texts[i:i + batch_size])
+    elapsed = time.perf_counter() - start
+    after = cached.stats()
+    hits = after["hits"] - before["hits"]
+    return {
+        "pass": name,
+        "texts": len(texts),
+        "hit_rate": hits / len(texts) if texts else 0.0,
+        "backend_calls": counter.calls - calls,
+        "backend_texts": counter.texts - embedded,
+        "seconds": elapsed,
+        "texts_per_s": len(texts) / elapsed if elapsed else 0.0,
+    }
+
+
+def run(backend: str, args, base_url: str = None) -> list:
+    from app.backend import database
+    from app.backend.rag_utils.embedding_backend import CachedEmbeddings, LocalEmbeddings
+
+    texts = _corpus_texts()
+    if backend == "local":
+        inner, model_name = LocalEmbeddings(args.model), f"local:{args.model}"
+    else:
+        from langchain_openai import OpenAIEmbeddings
+        inner = OpenAIEmbeddings(model="text-embedding-3-small", api_key="bench-key", base_url=base_url,
+                                 check_embedding_ctx_length=False, max_retries=0)
+        model_name = "openai:text-embedding-3-small"
+    counter = CallCounter(inner)
+    cached = CachedEmbeddings(counter, model_name)
+
+    with tempfile.TemporaryDirectory(prefix="agri-embed-cache-") as workdir:
+        database._db_manager = database.DatabaseManager(Path(workdir) / "cache.duckdb")
+        try:
+            results = [
+                _run_pass("cold", cached, counter, texts, args.batch_size),
+                _run_pass("warm", cached, counter, texts, args.batch_size),
+                _run_pass("queries", cached, counter, QUESTIONS * args.query_repeats, 1),
+            ]
+        finally:
+            database._db_manager.close_connection()
+            database._db_manager = None
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--backend", choices=["openai", "local"], default="openai")
+    parser.add_argument("--model", default="all-MiniLM-L6-v2", help="sentence-transformers model for --backend local")
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--query-repeats", type=int, default=25)
+    parser.add_argument("--embedding-latency", type=float, default=0.05)
+    args = parser.parse_args()
+
+    os.environ["ANONYMIZED_TELEMETRY"] = "False"
+    if args.backend == "local":
+        results = run("local", args)
+    else:
+        with FakeOpenAIServer(embedding_latency=args.embedding_latency) as server:
+            results = run("openai", args, server.base_url)
+
+    print(f"backend={args.backend}")
+    print(f"{'pass':>8} {'texts':>6} {'hit_rate':>9} {'calls':>6} {'embedded':>9} {'seconds':>8} {'texts/s':>9}")
+    for r in results:
+        print(
+            f"{r['pass']:>8} {r['texts']:>6} {r['hit_rate']:>9.0%} {r['backend_calls']:>6} "
+            f"{r['backend_texts']:>9} {r['seconds']:>8.2f} {r['texts_per_s']:>9.0f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
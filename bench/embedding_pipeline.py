@@ -0,0 +1,141 @@
+"""
+Throughput and memory benchmark for the indexer's embedding pipeline.
+
+Streams synthetic chunks through EmbeddingPipeline into a scratch Chroma
+collection, with the fake OpenAI server rejecting a fraction of embedding
+calls with HTTP 429. For each corpus size it reports throughput, retries and
+the peak Python heap (tracemalloc), which should stay flat as the corpus grows.
+``--compare-legacy`` also runs the old path (materialize every document, then
+a single ``add_documents`` call) for comparison.
+
+Usage:
+    python -m bench.embedding_pipeline --sizes 2000 20000 --error-rate 0.1
+"""
+
+import argparse
+import os
+import tempfile
+import time
+import tracemalloc
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+from bench.fake_openai import FakeOpenAIServer
+
+COLLECTION_NAME = "bench_chunks"
+
+
+def _iter_documents(count: int):
+    from langchain_core.documents import Document
+    for i in range(count):
+        yield Document(
+            page_content=f"Row {i}: crop rice, district {i % 37}, yield {i * 7 % 1000} kg per hectare, "
+                         f"irrigation drip, season kharif, notes " + "x" * 200,
+            metadata={"role": "farmer", "source": "bench.csv", "file_type": "csv"},
+        )
+
+
+def _make_embeddings(base_url: str):
+    from langchain_openai import OpenAIEmbeddings
+    # Retries are left to the pipeline so that 429 handling is what gets measured
+    return OpenAIEmbeddings(
+        model="text-embedding-3-small",
+        api_key="bench-key",
+        base_url=base_url,
+        check_embedding_ctx_length=False,
+        max_retries=0,
+    )
+
+
+def run_pipeline(base_url: str, count: int, args) -> dict:
+    import chromadb
+    from app.backend.rag_utils.embedding_pipeline import EmbeddingPipeline
+
+    with tempfile.TemporaryDirectory(prefix="agri-embed-") as path:
+        collection = chromadb.PersistentClient(path=path).get_or_create_collection(COLLECTION_NAME)
+        pipeline = EmbeddingPipeline(
+            _make_embeddings(base_url),
+            collection,
+            batch_size=args.batch_size,
+            max_concurrency=args.concurrency,
+            requests_per_minute=args.rate_limit,
+            backoff_base=0.05,
+            backoff_max=1.0,
+        )
+        tracemalloc.start()
+        start = time.perf_counter()
+        ids = pipeline.run(_iter_documents(count), (f"chunk-{i}" for i in range(count)))
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            "mode": "pipeline",
+            "chunks": count,
+            "stored": collection.count(),
+            "returned_ids": len(ids),
+            "seconds": elapsed,
+            "chunks_per_s": count / elapsed,
+            "retries": pipeline.stats["retries"],
+            "peak_heap_mb": peak / 1e6,
+        }
+
+
+def run_legacy(base_url: str, count: int, args) -> dict:
+    from langchain_chroma import Chroma
+
+    with tempfile.TemporaryDirectory(prefix="agri-embed-") as path:
+        embeddings = _make_embeddings(base_url)
+        # The old path had no 429 handling beyond the client's own retries
+        embeddings.max_retries = args.legacy_retries
+        vectorstore = Chroma(collection_name=COLLECTION_NAME, persist_directory=path, embedding_function=embeddings)
+        tracemalloc.start()
+        start = time.perf_counter()
+        error = None
+        try:
+            vectorstore.add_documents(list(_iter_documents(count)))
+        except Exception as e:
+            error = type(e).__name__
+        elapsed = time.perf_counter() - start
+        _, peak = tracemalloc.get_traced_memory()
+        tracemalloc.stop()
+        return {
+            "mode": "legacy",
+            "chunks": count,
+            "stored": vectorstore._collection.count(),
+            "seconds": elapsed,
+            "chunks_per_s": count / elapsed,
+            "error": error,
+            "peak_heap_mb": peak / 1e6,
+        }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[2000, 20000])
+    parser.add_argument("--batch-size", type=int, default=100)
+    parser.add_argument("--concurrency", type=int, default=4)
+    parser.add_argument("--rate-limit", type=float, default=None, help="Requests per minute (default: unlimited)")
+    parser.add_argument("--error-rate", type=float, default=0.1, help="Fraction of embedding calls that return 429")
+    parser.add_argument("--embedding-latency", type=float, default=0.02)
+    parser.add_argument("--compare-legacy", action="store_true")
+    parser.add_argument("--legacy-retries", type=int, default=2)
+    args = parser.parse_args()
+
+    os.environ["ANONYMIZED_TELEMETRY"] = "False"
+    results = []
+    with FakeOpenAIServer(embedding_latency=args.embedding_latency, embedding_error_rate=args.error_rate) as server:
+        for count in args.sizes:
+            results.append(run_pipeline(server.base_url, count, args))
+            if args.compare_legacy:
+                results.append(run_legacy(server.base_url, count, args))
+
+    print(f"{'mode':>8} {'chunks':>7} {'stored':>7} {'seconds':>8} {'chunks/s':>9} {'retries':>8} {'peak_mb':>8}")
+    for r in results:
+        retries = r.get("retries", r.get("error") or "-")
+        print(
+            f"{r['mode']:>8} {r['chunks']:>7} {r['stored']:>7} {r['seconds']:>8.2f} "
+            f"{r['chunks_per_s']:>9.0f} {str(retries):>8} {r['peak_heap_mb']:>8.1f}"
+        )
+
+
+if __name__ == "__main__":
+    main()
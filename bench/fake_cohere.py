@@ -0,0 +1,55 @@
+"""
+Local Cohere-compatible rerank stub for offline benchmarks.
+
+Serves /v1/rerank and /v2/rerank with a configurable artificial latency.
+Documents are scored by the fraction of query words they contain, so the
+ranking is deterministic and roughly sensible.
+"""
+
+import asyncio
+import re
+
+from fastapi import FastAPI, Request
+
+from bench.fake_openai import StubServer
+
+_WORD = re.compile(r"[a-z0-9]+")
+
+
+def fake_relevance(query: str, document: str) -> float:
+    query_words = set(_WORD.findall(query.lower()))
+    if not query_words:
+        return 0.0
+    return len(query_words & set(_WORD.findall(document.lower()))) / len(query_words)
+
+
+def create_fake_cohere_app(latency: float = 0.05) -> FastAPI:
+    app = FastAPI()
+    app.state.stats = {"rerank": 0}
+
+    async def rerank(request: Request):
+        body = await request.json()
+        app.state.stats["rerank"] += 1
+        await asyncio.sleep(latency)
+        documents = [doc if isinstance(doc, str) else doc.get("text", "") for doc in body.get("documents", [])]
+        scores = sorted(
+            ((fake_relevance(body.get("query", ""), doc), i) for i, doc in enumerate(documents)),
+            key=lambda item: (-item[0], item[1]),
+        )
+        top_n = body.get("top_n") or len(documents)
+        return {
+            "id": "rerank-fake",
+            "results": [{"index": i, "relevance_score": score} for score, i in scores[:top_n]],
+            "meta": {"api_version": {"version": "1"}, "billed_units": {"search_units": 1}},
+        }
+
+    app.post("/v1/rerank")(rerank)
+    app.post("/v2/rerank")(rerank)
+    return app
+
+
+class FakeCohereServer(StubServer):
+    """The Cohere rerank stub served in a background thread."""
+
+    def __init__(self, latency: float = 0.05):
+        super().__init__(create_fake_cohere_app(latency))
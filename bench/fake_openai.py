@@ -0,0 +1,228 @@
+"""
+Local OpenAI-compatible stub server for offline benchmarks.
+
+Serves /v1/chat/completions and /v1/embeddings with deterministic responses
+and a configurable artificial latency (optionally with an exponential tail),
+so the backend can be exercised without network access or API keys.
+Chat completions requested with ``stream: true`` are sent as server-sent
+events, one word per chunk.
+
+The classifier stub answers SQL for data-style questions, including "which"
+questions the backend's keyword heuristic does not recognize, and the SQL stub
+declines questions about guides and manuals, so the SQL -> RAG fallback path
+can be exercised.
+"""
+
+import asyncio
+import hashlib
+import json
+import random
+import re
+import socket
+import threading
+import time
+
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import JSONResponse, StreamingResponse
+
+
+def _prompt_text(messages: list) -> str:
+    parts = []
+    for message in messages:
+        content = message.get("content", "")
+        if isinstance(content, list):
+            content = " ".join(part.get("text", "") for part in content if isinstance(part, dict))
+        parts.append(content)
+    return "\n".join(parts)
+
+
+SQL_MARKERS = ("how many", "count", "average", "total", "number of", "list all", "which")
+DOCUMENT_MARKERS = ("guide", "manual", "recommend")
+
+
+def fake_completion(prompt: str) -> str:
+    """Return a deterministic completion for the prompts the backend sends."""
+    if "Respond with only one word: either SQL or RAG" in prompt:
+        question = prompt.rsplit("Question:", 1)[-1].lower()
+        return "SQL" if any(marker in question for marker in SQL_MARKERS) else "RAG"
+
+    if "converts natural language questions into safe SQL SELECT queries" in prompt:
+        question = prompt.rsplit("Natural Language Question:", 1)[-1].lower()
+        if any(marker in question for marker in DOCUMENT_MARKERS):
+            return "This question cannot be answered from the available tables."
+        match = re.search(r"Table: (\w+)", prompt)
+        table = match.group(1) if match else "unknown_table"
+        return f"```sql\nSELECT COUNT(*) AS total_rows FROM {table}\n```"
+
+    digest = hashlib.sha1(prompt.encode("utf-8")).hexdigest()[:8]
+    return (
+        "## Answer\n"
+        "- This is a deterministic answer from the benchmark stub.\n"
+        f"- **Source**: stub-{digest}"
+    )
+
+
+def _completion_chunk(model: str, delta: dict, finish_reason=None) -> str:
+    chunk = {
+        "id": "chatcmpl-fake",
+        "object": "chat.completion.chunk",
+        "created": int(time.time()),
+        "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(chunk)}\n\n"
+
+
+def fake_embedding(item, dim: int) -> list:
+    """Deterministic unit vector derived from the input text or token IDs."""
+    seed = hashlib.sha256(json.dumps(item).encode("utf-8")).digest()
+    rng = random.Random(seed)
+    vector = [rng.gauss(0.0, 1.0) for _ in range(dim)]
+    norm = sum(v * v for v in vector) ** 0.5 or 1.0
+    return [v / norm for v in vector]
+
+
+def create_fake_openai_app(
+    latency: float = 0.2,
+    embedding_latency: float = 0.02,
+    embedding_dim: int = 64,
+    embedding_error_rate: float = 0.0,
+    latency_jitter: float = 0.0,
+    token_latency: float = 0.0,
+) -> FastAPI:
+    """
+    Build the stub app; ``latency`` is injected into every chat completion and
+    ``embedding_error_rate`` of embedding calls fail with HTTP 429.
+
+    ``latency_jitter`` adds an exponentially distributed extra delay with that
+    mean to each chat completion, giving the latency a long tail.
+    ``latency`` is the time to the first token; each further word of the
+    answer takes ``token_latency``, streamed or not.
+    """
+    app = FastAPI()
+    app.state.stats = {"chat_completions": 0, "chat_streams": 0, "embeddings": 0, "embedding_rate_limited": 0}
+
+    @app.post("/v1/chat/completions")
+    async def chat_completions(request: Request):
+        body = await request.json()
+        app.state.stats["chat_completions"] += 1
+        await asyncio.sleep(latency + (random.expovariate(1 / latency_jitter) if latency_jitter else 0.0))
+        content = fake_completion(_prompt_text(body.get("messages", [])))
+        words = re.findall(r"\S+\s*|\s+", content)
+        model = body.get("model", "fake")
+
+        if body.get("stream"):
+            app.state.stats["chat_streams"] += 1
+
+            async def events():
+                yield _completion_chunk(model, {"role": "assistant", "content": ""})
+                for i, word in enumerate(words):
+                    if i and token_latency:
+                        await asyncio.sleep(token_latency)
+                    yield _completion_chunk(model, {"content": word})
+                yield _completion_chunk(model, {}, "stop")
+                yield "data: [DONE]\n\n"
+
+            return StreamingResponse(events(), media_type="text/event-stream")
+
+        if token_latency:
+            await asyncio.sleep(token_latency * max(0, len(words) - 1))
+        return {
+            "id": "chatcmpl-fake",
+            "object": "chat.completion",
+            "created": int(time.time()),
+            "model": model,
+            "choices": [{
+                "index": 0,
+                "message": {"role": "assistant", "content": content},
+                "finish_reason": "stop",
+            }],
+            "usage": {"prompt_tokens": 0, "completion_tokens": 0, "total_tokens": 0},
+        }
+
+    @app.post("/v1/embeddings")
+    async def embeddings(request: Request):
+        body = await request.json()
+        app.state.stats["embeddings"] += 1
+        await asyncio.sleep(embedding_latency)
+        if embedding_error_rate and random.random() < embedding_error_rate:
+            app.state.stats["embedding_rate_limited"] += 1
+            return JSONResponse(
+                status_code=429,
+                content={"error": {"message": "Rate limit reached", "type": "requests", "code": "rate_limit_exceeded"}},
+            )
+        inputs = body.get("input", [])
+        if isinstance(inputs, str) or (inputs and isinstance(inputs[0], int)):
+            inputs = [inputs]
+        return {
+            "object": "list",
+            "data": [
+                {"object": "embedding", "index": i, "embedding": fake_embedding(item, embedding_dim)}
+                for i, item in enumerate(inputs)
+            ],
+            "model": body.get("model", "fake"),
+            "usage": {"prompt_tokens": 0, "total_tokens": 0},
+        }
+
+    return app
+
+
+def _free_port() -> int:
+    with socket.socket(socket.AF_INET, socket.SOCK_STREAM) as sock:
+        sock.bind(("127.0.0.1", 0))
+        return sock.getsockname()[1]
+
+
+class StubServer:
+    """Run a stub app with uvicorn in a background thread."""
+
+    def __init__(self, app: FastAPI, path_prefix: str = ""):
+        self.app = app
+        self.port = _free_port()
+        self.base_url = f"http://127.0.0.1:{self.port}{path_prefix}"
+        self._server = uvicorn.Server(uvicorn.Config(self.app, host="127.0.0.1", port=self.port, log_level="warning"))
+        self._thread = threading.Thread(target=self._server.run, daemon=True)
+
+    @property
+    def stats(self) -> dict:
+        return self.app.state.stats
+
+    def start(self) -> "StubServer":
+        self._thread.start()
+        deadline = time.time() + 10
+        while not self._server.started:
+            if time.time() > deadline:
+                raise RuntimeError(f"{type(self).__name__} did not start")
+            time.sleep(0.01)
+        return self
+
+    def stop(self):
+        self._server.should_exit = True
+        self._thread.join(timeout=5)
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.stop()
+
+
+class FakeOpenAIServer(StubServer):
+    """The OpenAI stub app served in a background thread."""
+
+    def __init__(
+        self,
+        latency: float = 0.2,
+        embedding_latency: float = 0.02,
+        embedding_dim: int = 64,
+        embedding_error_rate: float = 0.0,
+        latency_jitter: float = 0.0,
+        token_latency: float = 0.0,
+    ):
+        super().__init__(
+            create_fake_openai_app(
+                latency, embedding_latency, embedding_dim, embedding_error_rate, latency_jitter, token_latency
+            ),
+            path_prefix="/v1",
+        )
@@ -0,0 +1,238 @@
+"""
+Retrieval quality and latency of vector, BM25 and hybrid (RRF) retrieval.
+
+Chunks the resources_2 corpus the way the indexer does, streams it through
+EmbeddingPipeline into a scratch Chroma collection with the BM25 index fed by
+the pipeline's ``on_stored`` hook, and evaluates two query sets, each under
+the role filter of the chunk's owner:
+
+- exact: for sampled chunks, the chunk's rarest terms (e.g. pesticide,
+  scheme or model names) wrapped in a question;
+- agronomy: hand-written questions naming a term that must be retrieved.
+
+A query is a hit when one of the top ``k`` chunks contains the required
+term; MRR uses the rank of the first such chunk. Latency is per query,
+in-process.
+
+Embeddings default to an offline hashed bag of character trigrams, which is
+lexical rather than semantic; use ``--embeddings openai`` (needs
+OPENAI_API_KEY) or ``--embeddings local`` (sentence-transformers) for
+realistic vector numbers. ``--reranker`` adds a hybrid run with a local
+cross-encoder when sentence-transformers is installed.
+
+Usage:
+    python -m bench.hybrid_retrieval --k 4 --exact-queries 60
+"""
+
+import argparse
+import hashlib
+import os
+import random
+import re
+import statistics
+import sys
+import tempfile
+import time
+
+from bench.backend import REPO_ROOT
+
+# (question, role of the documents it is about, term a retrieved chunk must contain)
+AGRONOMY_QUESTIONS = [
+    ("How do I get rid of aphids on my crops?", "farmer", "neem"),
+    ("How can fruit borer be controlled?", "farmer", "pheromone"),
+    ("Which fertilizers give crops nitrogen?", "farmer", "urea"),
+    ("What causes chlorosis in leaves?", "agriculture expert", "chlorosis"),
+    ("Which model forecasts the wheat price?", "market analysis", "sarima"),
+    ("How is the rice price predicted with XGBoost?", "market analysis", "xgboost"),
+    ("What is the MSP?", "market analysis", "msp"),
+    ("Which competitor has the largest market share?", "market analysis", "agricorp"),
+    ("What is the status of the PM-KISAN subsidy?", "finance officer", "pm-kisan"),
+    ("At what temperature should potatoes be kept in cold storage?", "supply chain manager", "potatoes"),
+    ("How many days of sick leave do employees get?", "hr", "sick"),
+    ("Is maternity leave paid?", "hr", "maternity"),
+]
+
+_WORD = re.compile(r"[a-z][a-z0-9-]{3,}")
+
+
+class HashingEmbeddings:
+    """Offline stand-in for an embedding model: signed hashed character trigrams, L2-normalized."""
+
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+
+    def _embed(self, text: str) -> list:
+        vector = [0.0] * self.dim
+        for word in _WORD.findall(text.lower()):
+            padded = f"#{word}#"
+            for i in range(len(padded) - 2):
+                digest = hashlib.blake2b(padded[i:i + 3].encode("utf-8"), digest_size=4).digest()
+                value = int.from_bytes(digest, "little")
+                vector[value % self.dim] += 1.0 if value & 1 << 31 else -1.0
+        norm = sum(v * v for v in vector) ** 0.5 or 1.0
+        return [v / norm for v in vector]
+
+    def embed_documents(self, texts):
+        return [self._embed(text) for text in texts]
+
+    def embed_query(self, text):
+        return self._embed(text)
+
+
+def _make_embeddings(kind: str):
+    if kind == "openai":
+        from langchain_openai import OpenAIEmbeddings
+        return OpenAIEmbeddings(model="text-embedding-3-small")
+    if kind == "local":
+        from langchain_core.embeddings import Embeddings
+        from sentence_transformers import SentenceTransformer
+
+        class LocalEmbeddings(Embeddings):
+            model = SentenceTransformer("all-MiniLM-L6-v2")
+
+            def embed_documents(self, texts):
+                return self.model.encode(list(texts), normalize_embeddings=True).tolist()
+
+            def embed_query(self, text):
+                return self.embed_documents([text])[0]
+
+        return LocalEmbeddings()
+    return HashingEmbeddings()
+
+
+def _corpus_chunks():
+    from app.backend.rag_utils.rag_module import _iter_chunks, load_file
+    chunks = []
+    for folder in sorted((REPO_ROOT / "resources_2").iterdir()):
+        for path in sorted(folder.iterdir()):
+            docs = load_file(path, folder.name)
+            if docs:
+                chunks.extend(_iter_chunks(docs))
+    return chunks
+
+
+def _exact_queries(chunks, count: int, rng: random.Random):
+    """Questions about each sampled chunk's rarest term (one that occurs in at most two chunks)."""
+    from app.backend.rag_utils.keyword_index import tokenize
+    token_sets = [set(t for t in tokenize(c.page_content) if len(t) > 3 and not t.isdigit()) for c in chunks]
+    frequency = {}
+    for tokens in token_sets:
+        for token in tokens:
+            frequency[token] = frequency.get(token, 0) + 1
+    queries = []
+    for i in rng.sample(range(len(chunks)), min(count, len(chunks))):
+        rare = sorted((frequency[t], t) for t in token_sets[i] if frequency[t] <= 2)
+        if rare:
+            term = rare[0][1]
+            queries.append((f"What does the guide say about {term}?", chunks[i].metadata["role"], term))
+    return queries
+
+
+def _rank_of_term(docs, term: str):
+    for rank, doc in enumerate(docs, start=1):
+        if term in doc.page_content.lower():
+            return rank
+    return None
+
+
+def _evaluate(name: str, search, queries, k: int) -> dict:
+    ranks, latencies = [], []
+    for question, role, term in queries:
+        start = time.perf_counter()
+        docs = search(question, role)
+        latencies.append(time.perf_counter() - start)
+        ranks.append(_rank_of_term(docs[:k], term))
+    latencies.sort()
+    return {
+        "method": name,
+        "recall": sum(r is not None for r in ranks) / len(ranks),
+        "mrr": sum(1 / r for r in ranks if r) / len(ranks),
+        "p50_ms": statistics.median(latencies) * 1000,
+        "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--k", type=int, default=4)
+    parser.add_argument("--fetch-k", type=int, default=20)
+    parser.add_argument("--rrf-k", type=int, default=60)
+    parser.add_argument("--exact-queries", type=int, default=60)
+    parser.add_argument("--embeddings", choices=["hashing", "openai", "local"], default="hashing")
+    parser.add_argument("--reranker", default="cross-encoder/ms-marco-MiniLM-L-6-v2",
+                        help="cross-encoder model for the reranked run ('' to skip)")
+    args = parser.parse_args()
+
+    from langchain_core.documents import Document
+    from langchain_chroma import Chroma
+    from app.backend.rag_utils.embedding_pipeline import EmbeddingPipeline
+    from app.backend.rag_utils.hybrid_retriever import HybridRetriever, get_local_reranker
+    from app.backend.rag_utils.keyword_index import BM25Index
+    from app.backend.rag_utils.rag_module import get_role_filter
+
+    # rag_module enables LangSmith tracing on import; benchmarks must stay offline
+    os.environ["LANGCHAIN_TRACING_V2"] = "false"
+    chunks = _corpus_chunks()
+    rng = random.Random(11)
+    query_sets = {"exact": _exact_queries(chunks, args.exact_queries, rng), "agronomy": AGRONOMY_QUESTIONS}
+
+    with tempfile.TemporaryDirectory(prefix="agri-hybrid-") as path:
+        embeddings = _make_embeddings(args.embeddings)
+        vectorstore = Chroma(collection_name="bench_hybrid", persist_directory=path, embedding_function=embeddings)
+        index = BM25Index()
+        start = time.perf_counter()
+        pipeline = EmbeddingPipeline(embeddings, vectorstore._collection, requests_per_minute=None,
+                                     on_stored=index.add)
+        pipeline.run(iter(chunks), (f"chunk-{i}" for i in range(len(chunks))))
+        index_s = time.perf_counter() - start
+        start = time.perf_counter()
+        rebuilt = BM25Index().rebuild_from_collection(vectorstore._collection)
+        rebuild_ms = (time.perf_counter() - start) * 1000
+        print(f"corpus: {len(chunks)} chunks from resources_2, embeddings={args.embeddings}, "
+              f"indexed in {index_s:.2f}s; BM25 rebuild from Chroma {rebuild_ms:.1f} ms ({rebuilt} chunks)")
+        if rebuilt != len(index):
+            print(f"FAIL: rebuilt index has {rebuilt} chunks, pipeline-fed index {len(index)}")
+            sys.exit(1)
+
+        def retriever(role, reranker=None):
+            return HybridRetriever(vectorstore=vectorstore, keyword_index=index, k=args.k, fetch_k=args.fetch_k,
+                                   search_filter=get_role_filter(role), rrf_k=args.rrf_k, reranker=reranker)
+
+        def bm25(question, role):
+            hits = index.search(question, args.k, get_role_filter(role) or None)
+            return [Document(page_content=text, metadata=meta)
+                    for _, text, meta in index.get_documents(chunk_id for chunk_id, _ in hits)]
+
+        methods = {
+            "vector": lambda q, role: vectorstore.similarity_search(q, k=args.k, filter=get_role_filter(role) or None),
+            "bm25": bm25,
+            "hybrid": lambda q, role: retriever(role).invoke(q),
+        }
+        reranker = get_local_reranker(args.reranker)
+        if reranker is not None:
+            methods["hybrid+rerank"] = lambda q, role: retriever(role, reranker).invoke(q)
+
+        results = {}
+        for set_name, queries in query_sets.items():
+            print(f"\n{set_name}: {len(queries)} queries, recall@{args.k} and MRR by required term")
+            print(f"  {'method':<14} {'recall':>7} {'mrr':>6} {'p50_ms':>7} {'p95_ms':>7}")
+            for name, search in methods.items():
+                row = _evaluate(name, search, queries, args.k)
+                results[(set_name, name)] = row
+                print(f"  {name:<14} {row['recall']:>7.0%} {row['mrr']:>6.2f} {row['p50_ms']:>7.2f} {row['p95_ms']:>7.2f}")
+
+    failures = [
+        f"{set_name}: hybrid recall {results[(set_name, 'hybrid')]['recall']:.0%} "
+        f"below vector {results[(set_name, 'vector')]['recall']:.0%}"
+        for set_name in query_sets
+        if results[(set_name, "hybrid")]["recall"] < results[(set_name, "vector")]["recall"]
+    ]
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print("\nOK: hybrid retrieval recalls at least as many required terms as vector search")
+
+
+if __name__ == "__main__":
+    main()
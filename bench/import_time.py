@@ -0,0 +1,74 @@
+"""
+Import-time budget check for the backend.
+
+Runs ``python -X importtime -c "import app.backend.main"`` in a fresh
+interpreter, without OpenAI/Cohere keys and from an empty working directory,
+and fails when the cumulative import time exceeds the budget. Importing the
+app must not build clients, open the vector store or touch the network; those
+happen in the FastAPI lifespan. The same budget is asserted by
+``tests/test_import_time.py``.
+
+Usage:
+    python -m bench.import_time --budget-ms 1500 --top 10
+"""
+
+import argparse
+import os
+import re
+import subprocess
+import sys
+import tempfile
+
+from bench.backend import REPO_ROOT
+
+_IMPORTTIME_LINE = re.compile(r"import time:\s+(\d+) \|\s+(\d+) \|(\s*)(\S+)")
+
+
+def measure(module: str = "app.backend.main") -> list:
+    """
+    Import ``module`` in a subprocess and return (self_us, cumulative_us, depth, name) rows.
+    """
+    env = {k: v for k, v in os.environ.items() if k not in ("OPENAI_API_KEY", "COHERE_API_KEY")}
+    env["PYTHONPATH"] = str(REPO_ROOT)
+    with tempfile.TemporaryDirectory(prefix="agri-importtime-") as workdir:
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=workdir, env=env, capture_output=True, text=True,
+        )
+        if proc.returncode != 0:
+            raise RuntimeError(f"Importing {module} failed:\n{proc.stderr[-2000:]}")
+        leftovers = sorted(os.listdir(workdir))
+    if leftovers:
+        raise RuntimeError(f"Importing {module} created files in the working directory: {leftovers}")
+
+    rows = []
+    for line in proc.stderr.splitlines():
+        match = _IMPORTTIME_LINE.match(line)
+        if match:
+            self_us, cumulative_us, indent, name = match.groups()
+            rows.append((int(self_us), int(cumulative_us), len(indent) // 2, name))
+    return rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="app.backend.main")
+    parser.add_argument("--budget-ms", type=float, default=1500.0, help="Maximum cumulative import time")
+    parser.add_argument("--top", type=int, default=10, help="Number of slowest imports to show")
+    args = parser.parse_args()
+
+    rows = measure(args.module)
+    total_ms = next(cumulative for _, cumulative, _, name in rows if name == args.module) / 1000
+    print(f"{'cumulative_ms':>13} {'self_ms':>8}  module")
+    for self_us, cumulative_us, _, name in sorted(rows, key=lambda row: row[1], reverse=True)[:args.top]:
+        print(f"{cumulative_us / 1000:>13.1f} {self_us / 1000:>8.1f}  {name}")
+
+    print(f"\n{args.module}: {total_ms:.1f} ms (budget {args.budget_ms:.0f} ms)")
+    if total_ms > args.budget_ms:
+        print("FAIL: import-time budget exceeded")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
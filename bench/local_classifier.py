@@ -0,0 +1,172 @@
+"""
+Offline accuracy and latency of the local SQL/RAG query classifier.
+
+Trains the TF-IDF + logistic regression model on the seed set, then on the
+seed set plus a synthetic query_log history written to a scratch DuckDB, and
+evaluates both on held-out questions. For a range of confidence thresholds
+it reports how many questions would still be escalated to the LLM and the
+accuracy when escalated questions take the classifier stub's label (from
+bench.fake_openai). Also reports training, save/load and per-question
+prediction time, next to the keyword heuristic it replaces.
+
+Usage:
+    python -m bench.local_classifier --thresholds 0.6 0.7 0.8 0.9
+"""
+
+import argparse
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+from bench.fake_openai import fake_completion
+
+# Questions answered in the past, as (question, query_log type)
+HISTORY = [
+    ("How many farmers registered in Coimbatore?", "SQL"),
+    ("What is the average salary by department?", "SQL"),
+    ("Which warehouse has the most fertilizer stock?", "SQL"),
+    ("Show the number of complaints per dealer", "SQL"),
+    ("List all crops planted after June", "SQL"),
+    ("Total revenue from cotton sales in 2023", "SQL"),
+    ("Which field worker logged the most hours?", "SQL"),
+    ("What is the highest yield recorded for maize?", "SQL"),
+    ("Count employees by designation", "SQL"),
+    ("Average market price of tomatoes per month", "SQL"),
+    ("What does the handbook say about overtime?", "RAG_FALLBACK"),
+    ("Which seeds does the guide recommend for drought areas?", "RAG_FALLBACK"),
+    ("How do I treat leaf curl in chilli?", "RAG"),
+    ("Explain the grievance redressal process", "RAG"),
+    ("What is the role of a supply chain manager?", "RAG"),
+    ("How to store grain to prevent fungus?", "RAG"),
+    ("What are the advantages of organic farming?", "RAG"),
+    ("Describe the harvest planning workflow", "RAG"),
+    ("What is the dress code for field staff?", "RAG"),
+    ("Why is soil pH important?", "RAG"),
+]
+
+# Held-out evaluation set, (question, expected mode)
+EVAL = [
+    ("How many employees joined in 2022?", "SQL"),
+    ("What is the average yield of sugarcane per district?", "SQL"),
+    ("List all suppliers in Tamil Nadu", "SQL"),
+    ("Which crop had the highest market price last month?", "SQL"),
+    ("Show the top 3 salespeople by revenue", "SQL"),
+    ("Total quantity of pesticide purchased this year", "SQL"),
+    ("Count of shipments delivered late per route", "SQL"),
+    ("What is the minimum wage paid to field workers?", "SQL"),
+    ("Which district planted the most banana?", "SQL"),
+    ("Number of farmers with drip irrigation installed", "SQL"),
+    ("What percent of orders were returned?", "SQL"),
+    ("Give me details of employee with id 42", "SQL"),
+    ("Sum of rainfall in Madurai between June and September", "SQL"),
+    ("Show salaries greater than 40000", "SQL"),
+    ("Average loan size for small farmers", "SQL"),
+    ("How many tractors were sold in Salem?", "SQL"),
+    ("What are the best practices for storing onions?", "RAG"),
+    ("Explain the benefits of crop insurance", "RAG"),
+    ("How do I identify stem borer damage?", "RAG"),
+    ("What is the company's leave policy?", "RAG"),
+    ("Summarize the market analysis report for pulses", "RAG"),
+    ("What does the manual say about tractor maintenance?", "RAG"),
+    ("How can I improve water retention in sandy soil?", "RAG"),
+    ("Describe the process for onboarding a dealer", "RAG"),
+    ("What is precision agriculture?", "RAG"),
+    ("Why are my tomato plants wilting?", "RAG"),
+    ("Tell me about the fertilizer subsidy scheme", "RAG"),
+    ("What should a farmer do after heavy rain?", "RAG"),
+    ("How do I write a performance review?", "RAG"),
+    ("What are common diseases of banana?", "RAG"),
+    ("Explain how vermicompost is made", "RAG"),
+    ("What precautions are needed when spraying pesticides?", "RAG"),
+]
+
+
+def _llm_label(question: str) -> str:
+    from app.backend.rag_utils.query_classifier import _build_classifier_prompt
+    return fake_completion(_build_classifier_prompt(question))
+
+
+def _evaluate(classifier, thresholds) -> dict:
+    from app.backend.rag_utils.query_classifier import _heuristic_detect_query_type
+
+    predictions = [(classifier.predict(q), expected) for q, expected in EVAL]
+    report = {
+        "heuristic_acc": sum(_heuristic_detect_query_type(q).value == e for q, e in EVAL) / len(EVAL),
+        "llm_stub_acc": sum(_llm_label(q) == e for q, e in EVAL) / len(EVAL),
+        "model_acc": sum(mode.value == e for (mode, _), e in predictions) / len(EVAL),
+        "thresholds": [],
+    }
+    for threshold in thresholds:
+        escalated = correct = 0
+        for (question, expected), ((mode, confidence), _) in zip(EVAL, predictions):
+            if confidence >= threshold:
+                correct += mode.value == expected
+            else:
+                escalated += 1
+                correct += _llm_label(question) == expected
+        report["thresholds"].append((threshold, escalated / len(EVAL), correct / len(EVAL)))
+    return report
+
+
+def _print_report(name: str, report: dict):
+    print(
+        f"{name}: model {report['model_acc']:.0%}, keyword heuristic {report['heuristic_acc']:.0%}, "
+        f"LLM stub {report['llm_stub_acc']:.0%}"
+    )
+    print(f"  {'threshold':>9} {'escalated':>9} {'accuracy':>8}")
+    for threshold, escalated, accuracy in report["thresholds"]:
+        print(f"  {threshold:>9.2f} {escalated:>9.0%} {accuracy:>8.0%}")
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--thresholds", type=float, nargs="+", default=[0.6, 0.7, 0.8, 0.9])
+    parser.add_argument("--predictions", type=int, default=5000)
+    args = parser.parse_args()
+
+    from app.backend.database import DatabaseManager
+    from app.backend.rag_utils.local_classifier import (
+        LocalQueryClassifier, SEED_EXAMPLES, query_log_examples, train_classifier,
+    )
+
+    start = time.perf_counter()
+    seed_model = train_classifier()
+    print(f"seed model: {len(SEED_EXAMPLES)} examples, trained in {(time.perf_counter() - start) * 1000:.1f} ms")
+    _print_report("seed only", _evaluate(seed_model, args.thresholds))
+
+    with tempfile.TemporaryDirectory(prefix="agri-classifier-") as workdir:
+        db_manager = DatabaseManager(Path(workdir) / "history.duckdb")
+        for question, query_type in HISTORY:
+            db_manager.log_query("bench", "Admin", query_type, question, True)
+        db_manager.flush_query_log()
+        history = query_log_examples(db_manager)
+        db_manager.close_connection()
+
+        start = time.perf_counter()
+        model = train_classifier(history)
+        train_ms = (time.perf_counter() - start) * 1000
+        path = Path(workdir) / "query_classifier.npz"
+        model.save(path)
+        start = time.perf_counter()
+        model = LocalQueryClassifier.load(path)
+        load_ms = (time.perf_counter() - start) * 1000
+        size_kb = path.stat().st_size / 1024
+
+    print(f"\nseed + history: {len(history)} logged questions, trained in {train_ms:.1f} ms, "
+          f"{size_kb:.0f} KB on disk, loaded in {load_ms:.2f} ms")
+    _print_report("seed + history", _evaluate(model, args.thresholds))
+
+    latencies = []
+    for i in range(args.predictions):
+        question = EVAL[i % len(EVAL)][0]
+        t0 = time.perf_counter()
+        model.predict(question)
+        latencies.append(time.perf_counter() - t0)
+    quantiles = statistics.quantiles(latencies, n=100)
+    print(f"\nprediction latency: p50 {quantiles[49] * 1e6:.0f} us, p99 {quantiles[98] * 1e6:.0f} us")
+
+
+if __name__ == "__main__":
+    main()
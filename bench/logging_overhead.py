@@ -0,0 +1,110 @@
+"""
+/chat throughput with debug logging on versus off.
+
+Requests run against the in-process backend and the fake OpenAI server, with
+logging configured as in production (queued JSON handler) but written to a
+temporary file. Batches alternate between LOG_LEVEL=DEBUG and INFO so drift
+affects both settings equally. ``--sample-rate`` applies debug sampling to the
+DEBUG batches and ``--no-queue`` writes synchronously from the request, for
+comparison with the queued handler.
+
+Usage:
+    python -m bench.logging_overhead --requests 200 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import os
+import statistics
+import tempfile
+import time
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+QUESTIONS = [
+    "What are the best practices for rice irrigation?",
+    "How many employees are listed in the HR dataset?",
+    "Which fertilizer suits wheat in sandy soil?",
+]
+
+
+async def _batch(client, count: int, concurrency: int) -> tuple:
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies = []
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            res = await client.post("/chat", json={"question": QUESTIONS[i % len(QUESTIONS)]})
+            res.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+
+    start = time.perf_counter()
+    await asyncio.gather(*(one(i) for i in range(count)))
+    return time.perf_counter() - start, latencies
+
+
+async def run(latency: float, count: int, rounds: int, concurrency: int,
+              sample_rate: float, use_queue: bool) -> dict:
+    import httpx
+    from bench.backend import load_backend
+    from bench.fake_openai import FakeOpenAIServer
+    from app.backend.logging_config import configure_logging, stop_logging
+
+    results = {level: {"seconds": 0.0, "latencies": [], "bytes": 0} for level in ("DEBUG", "INFO")}
+    with tempfile.TemporaryDirectory() as tmp, FakeOpenAIServer(latency=latency) as server:
+        main = load_backend(server.base_url)
+        # Answers must not come from the cache, or only the cache would be measured
+        main.answer_cache = None
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            await client.post("/chat", json={"question": QUESTIONS[0]})
+            for _ in range(rounds):
+                for level in ("DEBUG", "INFO"):
+                    path = os.path.join(tmp, f"{level}.log")
+                    with open(path, "a") as stream:
+                        configure_logging(level, "json", stream=stream, use_queue=use_queue,
+                                          debug_sample_rate=sample_rate if level == "DEBUG" else 1.0)
+                        seconds, latencies = await _batch(client, count // rounds, concurrency)
+                        stop_logging()
+                    results[level]["seconds"] += seconds
+                    results[level]["latencies"].extend(latencies)
+            for level in results:
+                results[level]["bytes"] = os.path.getsize(os.path.join(tmp, f"{level}.log"))
+    configure_logging()
+
+    summary = {}
+    for level, result in results.items():
+        latencies = sorted(result["latencies"])
+        summary[level] = {
+            "rps": len(latencies) / result["seconds"],
+            "p50_ms": statistics.median(latencies) * 1000,
+            "p95_ms": latencies[int(0.95 * (len(latencies) - 1))] * 1000,
+            "log_kb": result["bytes"] / 1024,
+        }
+    return summary
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=200, help="/chat requests per log level")
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument("--latency", type=float, default=0.01, help="Injected LLM latency in seconds")
+    parser.add_argument("--sample-rate", type=float, default=1.0, help="Fraction of DEBUG records kept")
+    parser.add_argument("--no-queue", action="store_true", help="Write log records synchronously")
+    args = parser.parse_args()
+
+    summary = asyncio.run(run(args.latency, args.requests, args.rounds, args.concurrency,
+                              args.sample_rate, not args.no_queue))
+    handler = "synchronous" if args.no_queue else "queued"
+    print(f"/chat, {args.requests} requests per level, concurrency {args.concurrency}, {handler} handler")
+    print(f"  {'level':<6} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'log KB':>8}")
+    for level, row in summary.items():
+        print(f"  {level:<6} {row['rps']:8.1f} {row['p50_ms']:8.2f} {row['p95_ms']:8.2f} {row['log_kb']:8.1f}")
+    slowdown = 1 - summary["DEBUG"]["rps"] / summary["INFO"]["rps"]
+    print(f"  debug logging costs {slowdown * 100:.1f}% of throughput")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+"""
+Per-request cost of the metrics middleware and stage timers.
+
+Two measurements:
+
+- micro: a bare ASGI app versus the same app behind ``MetricsMiddleware``
+  with the ten stages a /chat request records, called directly (no HTTP).
+  The difference is the instrumentation cost per request, in microseconds.
+- chat: /chat requests against the in-process backend and the fake OpenAI
+  server, alternating batches with metrics enabled and disabled, to show the
+  overhead is lost in the noise of a real request.
+
+Usage:
+    python -m bench.metrics_overhead --requests 20000 --chat-requests 200
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+CHAT_STAGES = [
+    "auth", "role_validation", "answer_cache", "classification", "sql_generation",
+    "duckdb_execution", "retrieval", "rerank", "llm_generation", "audit_log",
+]
+
+
+async def _drive(app, count: int) -> float:
+    scope = {"type": "http", "method": "POST", "path": "/chat", "headers": []}
+
+    async def receive():
+        return {"type": "http.request", "body": b"", "more_body": False}
+
+    async def send(message):
+        pass
+
+    start = time.perf_counter()
+    for _ in range(count):
+        await app(scope, receive, send)
+    return time.perf_counter() - start
+
+
+def run_micro(count: int) -> dict:
+    from app.backend import metrics
+
+    async def bare_app(scope, receive, send):
+        await send({"type": "http.response.start", "status": 200, "headers": []})
+        await send({"type": "http.response.body", "body": b"{}"})
+
+    async def staged_app(scope, receive, send):
+        for name in CHAT_STAGES:
+            with metrics.stage(name):
+                pass
+        await bare_app(scope, receive, send)
+
+    instrumented = metrics.MetricsMiddleware(staged_app, known_paths=["/chat"])
+    # Alternate runs so that CPU frequency drift affects both equally
+    bare, timed = [], []
+    for _ in range(5):
+        bare.append(asyncio.run(_drive(bare_app, count)))
+        timed.append(asyncio.run(_drive(instrumented, count)))
+    start = time.perf_counter()
+    exposition = metrics.registry.render()
+    render_ms = (time.perf_counter() - start) * 1000
+    bare_us = min(bare) / count * 1e6
+    timed_us = min(timed) / count * 1e6
+    return {
+        "bare_us": bare_us,
+        "instrumented_us": timed_us,
+        "overhead_us": timed_us - bare_us,
+        "render_ms": render_ms,
+        "exposition_lines": exposition.count("\n"),
+    }
+
+
+async def run_chat(latency: float, count: int, rounds: int) -> dict:
+    import httpx
+    from bench.backend import load_backend
+    from bench.fake_openai import FakeOpenAIServer
+    from app.backend import metrics
+
+    questions = [
+        "What are the best practices for rice irrigation?",
+        "How many employees are listed in the HR dataset?",
+    ]
+    timings = {True: [], False: []}
+    with FakeOpenAIServer(latency=latency) as server:
+        main = load_backend(server.base_url)
+        # Answers must not come from the cache, or only the cache would be measured
+        main.answer_cache = None
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            await client.post("/chat", json={"question": questions[0]})
+            for _ in range(rounds):
+                for enabled in (True, False):
+                    metrics.METRICS_ENABLED = enabled
+                    for i in range(count // rounds):
+                        start = time.perf_counter()
+                        res = await client.post("/chat", json={"question": questions[i % len(questions)]})
+                        res.raise_for_status()
+                        timings[enabled].append(time.perf_counter() - start)
+            metrics.METRICS_ENABLED = True
+            exposition = (await client.get("/metrics")).text
+    on, off = statistics.median(timings[True]) * 1000, statistics.median(timings[False]) * 1000
+    stages = sorted({line.split('stage="')[1].split('"')[0] for line in exposition.splitlines()
+                     if line.startswith("agri_chat_stage_seconds_count")})
+    return {"on_ms": on, "off_ms": off, "overhead_ms": on - off, "stages": stages}
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--requests", type=int, default=20000, help="Requests per micro-benchmark run")
+    parser.add_argument("--chat-requests", type=int, default=0, help="End-to-end /chat requests (0 skips)")
+    parser.add_argument("--rounds", type=int, default=4)
+    parser.add_argument("--latency", type=float, default=0.01, help="Injected LLM latency in seconds")
+    args = parser.parse_args()
+
+    micro = run_micro(args.requests)
+    print(f"micro ({len(CHAT_STAGES)} stages per request, best of 5 x {args.requests} requests)")
+    print(f"  bare app:           {micro['bare_us']:8.2f} us/request")
+    print(f"  with metrics:       {micro['instrumented_us']:8.2f} us/request")
+    print(f"  overhead:           {micro['overhead_us']:8.2f} us/request")
+    print(f"  /metrics render:    {micro['render_ms']:8.2f} ms ({micro['exposition_lines']} lines)")
+
+    if args.chat_requests:
+        chat = asyncio.run(run_chat(args.latency, args.chat_requests, args.rounds))
+        print(f"\n/chat median latency over {args.chat_requests} requests per setting")
+        print(f"  metrics on:  {chat['on_ms']:8.2f} ms")
+        print(f"  metrics off: {chat['off_ms']:8.2f} ms")
+        print(f"  difference:  {chat['overhead_ms']:8.2f} ms")
+        print(f"  stages seen: {', '.join(chat['stages'])}")
+
+
+if __name__ == "__main__":
+    main()
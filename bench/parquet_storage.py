@@ -0,0 +1,137 @@
+"""
+Native DuckDB tables versus the Parquet storage tier for uploaded CSVs.
+
+Generates a wide agricultural dataset (``--rows`` rows, default two million)
+with DuckDB itself and loads it three ways: as a native table, as Parquet
+behind a view, and as Parquet hive-partitioned by district. For each it
+reports load, replace and append time, on-disk size, and median scan latency
+for a full count, a single-column projection, a selective predicate and a
+grouped aggregate.
+
+Usage:
+    python -m bench.parquet_storage --rows 2000000 --repeat 5
+"""
+
+import argparse
+import os
+import statistics
+import tempfile
+import time
+from pathlib import Path
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+ROLE = "Market Analysis"
+TABLE = "bench_crop_yields"
+
+QUERIES = {
+    "count": f"SELECT count(*) FROM {TABLE}",
+    "projection": f"SELECT avg(yield_tonnes) FROM {TABLE}",
+    "predicate": f"SELECT count(*), avg(price_per_quintal) FROM {TABLE} WHERE district = 'Madurai' AND crop = 'rice'",
+    "group_by": f"SELECT district, season, sum(area_hectares) FROM {TABLE} GROUP BY ALL",
+}
+
+MODES = [
+    ("table", "table", None),
+    ("parquet", "parquet", None),
+    ("parquet/district", "parquet", ["district"]),
+]
+
+
+def generate_csv(path: Path, rows: int, offset: int = 0):
+    """A wide CSV: a few low-cardinality dimensions and many numeric measures."""
+    import duckdb
+
+    measures = ", ".join(f"round(random() * 1000, 2) AS measure_{i}" for i in range(16))
+    duckdb.sql(f"""
+        COPY (
+            SELECT
+                range + {offset} AS record_id,
+                ['Chennai', 'Madurai', 'Coimbatore', 'Salem', 'Tiruchirappalli', 'Thanjavur', 'Erode', 'Vellore'][range % 8 + 1] AS district,
+                ['rice', 'wheat', 'maize', 'sugarcane', 'cotton', 'groundnut', 'millet', 'pulses'][(range // 8) % 8 + 1] AS crop,
+                ['kharif', 'rabi', 'zaid'][range % 3 + 1] AS season,
+                round(random() * 40, 2) AS area_hectares,
+                round(random() * 200, 2) AS yield_tonnes,
+                1200 + (range * 7919) % 3600 AS price_per_quintal,
+                {measures}
+            FROM range({rows})
+        ) TO '{path}' (HEADER, DELIMITER ',')
+    """)
+
+
+def _disk_bytes(paths) -> int:
+    total = 0
+    for path in paths:
+        if path.is_file():
+            total += path.stat().st_size
+        elif path.is_dir():
+            total += sum(child.stat().st_size for child in path.rglob("*") if child.is_file())
+    return total
+
+
+def _median_ms(db_manager, query: str, repeat: int) -> float:
+    timings = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        db_manager.execute_query(query)
+        timings.append(time.perf_counter() - start)
+    return statistics.median(timings) * 1000
+
+
+def run_mode(tmp: Path, csv_path: Path, append_path: Path, storage: str, partition_by, repeat: int) -> dict:
+    from app.backend.database import DatabaseManager
+
+    db_path = tmp / f"bench-{storage}-{bool(partition_by)}.duckdb"
+    db_manager = DatabaseManager(db_path)
+    try:
+        result = {}
+        for step, path, append in (("load", csv_path, False), ("replace", csv_path, False),
+                                   ("append", append_path, True)):
+            start = time.perf_counter()
+            if not db_manager.create_table_from_csv_path(TABLE, str(path), ROLE, storage=storage,
+                                                         partition_by=partition_by, append=append):
+                raise RuntimeError(f"{step} failed for {storage}")
+            result[f"{step}_s"] = time.perf_counter() - start
+        result["rows"] = db_manager.execute_query(QUERIES["count"])[0][0]
+        for name, query in QUERIES.items():
+            result[name] = _median_ms(db_manager, query, repeat)
+        with db_manager.write_cursor() as cursor:
+            cursor.execute("CHECKPOINT")
+        result["disk_mb"] = _disk_bytes([db_path, db_manager.parquet_table_dir(ROLE, TABLE)]) / 1e6
+        return result
+    finally:
+        db_manager.close_connection()
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=2_000_000)
+    parser.add_argument("--append-rows", type=int, default=200_000)
+    parser.add_argument("--repeat", type=int, default=5, help="Runs per query; the median is reported")
+    args = parser.parse_args()
+
+    with tempfile.TemporaryDirectory(prefix="agri-bench-") as tmp:
+        tmp = Path(tmp)
+        # Parquet tables must land in the scratch directory, not static/data
+        os.environ["PARQUET_DIR"] = str(tmp / "parquet")
+        csv_path, append_path = tmp / "crop_yields.csv", tmp / "crop_yields_more.csv"
+        generate_csv(csv_path, args.rows)
+        generate_csv(append_path, args.append_rows, offset=args.rows)
+        print(f"{args.rows} rows, 23 columns, CSV {csv_path.stat().st_size / 1e6:.1f} MB; "
+              f"append {args.append_rows} rows")
+
+        header = f"  {'storage':<17} {'load s':>7} {'replace s':>9} {'append s':>8} {'disk MB':>8}"
+        header += "".join(f" {name + ' ms':>14}" for name in QUERIES)
+        print(header)
+        for label, storage, partition_by in MODES:
+            result = run_mode(tmp, csv_path, append_path, storage, partition_by, args.repeat)
+            line = (f"  {label:<17} {result['load_s']:7.2f} {result['replace_s']:9.2f} "
+                    f"{result['append_s']:8.2f} {result['disk_mb']:8.1f}")
+            line += "".join(f" {result[name]:14.2f}" for name in QUERIES)
+            print(line)
+            if result["rows"] != args.rows + args.append_rows:
+                print(f"  ({label} holds {result['rows']} rows, expected {args.rows + args.append_rows})")
+
+
+if __name__ == "__main__":
+    main()
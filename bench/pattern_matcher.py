@@ -0,0 +1,105 @@
+"""
+Cost of the policy pattern checks as the pattern lists grow.
+
+Pads every category of the policy patterns from constants.py with synthetic
+multi-word phrases up to the requested total, then times the per-request
+work of the old linear scans (``any(p in question.lower() ...)`` for the
+agriculture indicators, the four blocking lists and the role's RAG list)
+against one Aho–Corasick pass over the same patterns. Checks that both find
+the same categories for every question, and reports build time and automaton
+size.
+
+Usage:
+    python -m bench.pattern_matcher --patterns 0 1000 5000 20000 --questions 2000
+"""
+
+import argparse
+import random
+import time
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+WORDS = (
+    "crop soil yield budget salary market supply chain pest harvest revenue invoice payroll "
+    "warehouse logistics seed fertilizer tractor loan insurance subsidy contract dealer export "
+    "import price forecast inventory audit claim wage bonus policy review report cost margin"
+).split()
+
+QUESTIONS = [
+    "What is the employee salary structure for field staff?",
+    "How do I improve soil fertility before sowing rice?",
+    "Show the quarterly financial report for 2023",
+    "Explain crop rotation for small farms",
+    "What are the warehouse inventory levels this week?",
+    "Give me the competitive pricing analysis for pulses",
+    "How many employees joined last year?",
+    "What is the best pest control method for aphids?",
+]
+
+
+def _padded_patterns(base: dict, total: int, rng: random.Random) -> dict:
+    patterns = {category: list(values) for category, values in base.items()}
+    categories = list(patterns)
+    existing = sum(len(values) for values in patterns.values())
+    for i in range(max(0, total - existing)):
+        phrase = " ".join(rng.sample(WORDS, 3)) + f" {i}"
+        patterns[categories[i % len(categories)]].append(phrase)
+    return patterns
+
+
+def _linear_categories(patterns: dict, question: str, role_category: str) -> frozenset:
+    """What the old code computed, one scan per list it consulted."""
+    from app.backend.pattern_matcher import FINANCE, MARKET, HR, SUPPLY_CHAIN, AGRICULTURE_CONTEXT
+
+    question_lower = question.lower()
+    found = set()
+    for category in (AGRICULTURE_CONTEXT, FINANCE, MARKET, HR, SUPPLY_CHAIN, role_category):
+        if any(pattern in question_lower for pattern in patterns[category]):
+            found.add(category)
+    return frozenset(found)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--patterns", type=int, nargs="+", default=[0, 1000, 5000, 20000],
+                        help="total pattern counts (0 = only the patterns in constants.py)")
+    parser.add_argument("--questions", type=int, default=2000)
+    parser.add_argument("--role", default="Farmer")
+    args = parser.parse_args()
+
+    from app.backend.pattern_matcher import AhoCorasickMatcher, policy_patterns, role_blocking_category
+
+    role_category = role_blocking_category(args.role)
+    checked = {role_category}
+    rng = random.Random(7)
+    print(f"{'patterns':>8} {'states':>8} {'build_ms':>9} {'linear_us':>10} {'automaton_us':>13} {'speedup':>8}")
+    for total in args.patterns:
+        patterns = _padded_patterns(policy_patterns(), total, rng)
+        start = time.perf_counter()
+        matcher = AhoCorasickMatcher(patterns)
+        build_ms = (time.perf_counter() - start) * 1000
+
+        questions = [QUESTIONS[i % len(QUESTIONS)] for i in range(args.questions)]
+        start = time.perf_counter()
+        linear = [_linear_categories(patterns, q, role_category) for q in questions]
+        linear_us = (time.perf_counter() - start) * 1e6 / len(questions)
+        start = time.perf_counter()
+        automaton = [matcher.match(q) for q in questions]
+        automaton_us = (time.perf_counter() - start) * 1e6 / len(questions)
+
+        # The automaton reports every category; compare those the linear path looks at
+        base_categories = {"agriculture_context", "finance", "market", "hr", "supply_chain"} | checked
+        for question, expected, got in zip(questions, linear, automaton):
+            got = frozenset(c for c in got if c in base_categories)
+            if got != expected:
+                raise SystemExit(f"FAIL: mismatch for {question!r}: linear {sorted(expected)}, automaton {sorted(got)}")
+
+        print(
+            f"{matcher.pattern_count:>8} {matcher.state_count:>8} {build_ms:>9.1f} {linear_us:>10.1f} "
+            f"{automaton_us:>13.1f} {linear_us / automaton_us:>7.1f}x"
+        )
+    print("OK: automaton and linear scans agree")
+
+
+if __name__ == "__main__":
+    main()
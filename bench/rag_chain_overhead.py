@@ -0,0 +1,58 @@
+"""
+Micro-benchmark of per-request RAG chain setup overhead.
+
+Compares building the retriever, reranker and chain closure on every request
+(the previous get_rag_chain behaviour) with fetching the shared chain from the
+per-role registry. No network calls are made.
+
+Usage:
+    python -m bench.rag_chain_overhead --iterations 2000
+"""
+
+import argparse
+import time
+
+from bench.backend import load_backend
+
+ROLES = ["Admin", "Farmer", "HR", "Sales Person"]
+FAKE_COHERE_KEY = "bench-cohere-key"
+
+
+def _time_per_call(func, iterations: int) -> float:
+    start = time.perf_counter()
+    for i in range(iterations):
+        func(ROLES[i % len(ROLES)])
+    return (time.perf_counter() - start) / iterations * 1e6
+
+
+def run(iterations: int) -> list:
+    load_backend()
+    from app.backend.rag_utils import rag_module
+
+    results = []
+    for label, cohere_key in (("no reranker", None), ("cohere reranker", FAKE_COHERE_KEY)):
+        rebuild_us = _time_per_call(
+            lambda role: rag_module._build_rag_chain(rag_module.get_role_filter(role), cohere_key),
+            iterations,
+        )
+        rag_module.warm_up_rag_chains(ROLES, cohere_api_key=cohere_key)
+        registry_us = _time_per_call(
+            lambda role: rag_module.get_rag_chain(role, cohere_api_key=cohere_key),
+            iterations,
+        )
+        results.append({"config": label, "rebuild_us": rebuild_us, "registry_us": registry_us})
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--iterations", type=int, default=2000)
+    args = parser.parse_args()
+
+    print(f"{'config':>16} {'rebuild_us':>11} {'registry_us':>12} {'speedup':>8}")
+    for r in run(args.iterations):
+        print(f"{r['config']:>16} {r['rebuild_us']:>11.1f} {r['registry_us']:>12.2f} {r['rebuild_us'] / r['registry_us']:>7.0f}x")
+
+
+if __name__ == "__main__":
+    main()
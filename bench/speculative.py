@@ -0,0 +1,117 @@
+"""
+Tail latency of /chat with and without speculative SQL + RAG execution.
+
+Replays a mix of clear SQL, clear RAG and ambiguous questions against the
+in-process app and the fake OpenAI server (fixed latency plus an exponential
+tail). Ambiguous questions are ones where the keyword heuristic and the
+classifier stub disagree; for some of them the SQL stub declines, which
+sends the sequential pipeline through the SQL -> RAG fallback. Reports
+p50/p95/p99 latency, LLM calls per request and which mode answered, for the
+sequential pipeline and both speculative policies. The answer cache is
+disabled so every request runs the pipeline.
+
+Usage:
+    python -m bench.speculative --latency 0.2 --jitter 0.1 --requests 200 --concurrency 8
+"""
+
+import argparse
+import asyncio
+import statistics
+import time
+from collections import Counter
+
+import httpx
+
+from bench.backend import load_backend
+from bench.fake_openai import FakeOpenAIServer
+
+QUESTIONS = [
+    # Heuristic and classifier agree
+    "How many employees are listed in the HR dataset?",
+    "What is the total number of records in the table?",
+    "Explain crop rotation for small farms",
+    "What are the best practices for rice irrigation?",
+    # Heuristic says RAG, classifier says SQL, SQL works
+    "Which district has the most employees?",
+    # Heuristic says RAG, classifier says SQL, SQL stub declines -> fallback
+    "Which fertilizer does the guide recommend for paddy?",
+    "Which pests does the field manual describe for cotton?",
+    # Heuristic says SQL, classifier says RAG
+    "Show the top practices from the irrigation guide",
+]
+
+MODES = {
+    "sequential": (False, "first"),
+    "speculative_first": (True, "first"),
+    "speculative_preferred": (True, "preferred"),
+}
+
+
+def _percentile(values, q):
+    return statistics.quantiles(values, n=100)[q - 1] * 1000
+
+
+async def _replay(client: httpx.AsyncClient, requests: int, concurrency: int):
+    semaphore = asyncio.Semaphore(concurrency)
+    latencies, answered_by = [], Counter()
+
+    async def one(i: int):
+        async with semaphore:
+            start = time.perf_counter()
+            res = await client.post("/chat", json={"question": QUESTIONS[i % len(QUESTIONS)]})
+            res.raise_for_status()
+            latencies.append(time.perf_counter() - start)
+            body = res.json()
+            answered_by["fallback" if body["fallback"] else body["mode"]] += 1
+
+    await asyncio.gather(*(one(i) for i in range(requests)))
+    return latencies, answered_by
+
+
+async def run(args) -> list:
+    results = []
+    with FakeOpenAIServer(latency=args.latency, latency_jitter=args.jitter) as server:
+        main = load_backend(server.base_url)
+        main.answer_cache = None
+        transport = httpx.ASGITransport(app=main.app)
+        async with httpx.AsyncClient(transport=transport, base_url="http://bench", timeout=120) as client:
+            for name, (enabled, policy) in MODES.items():
+                main.SPECULATIVE_EXECUTION_ENABLED = enabled
+                main.SPECULATIVE_POLICY = policy
+                # Warm-up so imports, chains and connections are not measured
+                await _replay(client, len(QUESTIONS), len(QUESTIONS))
+                calls_before = server.stats["chat_completions"]
+                start = time.perf_counter()
+                latencies, answered_by = await _replay(client, args.requests, args.concurrency)
+                wall = time.perf_counter() - start
+                results.append({
+                    "mode": name,
+                    "p50_ms": _percentile(latencies, 50),
+                    "p95_ms": _percentile(latencies, 95),
+                    "p99_ms": _percentile(latencies, 99),
+                    "req_per_s": args.requests / wall,
+                    "llm_calls_per_req": (server.stats["chat_completions"] - calls_before) / args.requests,
+                    "answered_by": dict(answered_by),
+                })
+    return results
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--latency", type=float, default=0.2, help="fixed LLM latency in seconds")
+    parser.add_argument("--jitter", type=float, default=0.1, help="mean of the exponential extra LLM latency")
+    parser.add_argument("--requests", type=int, default=200)
+    parser.add_argument("--concurrency", type=int, default=8)
+    args = parser.parse_args()
+
+    results = asyncio.run(run(args))
+    print(f"{'mode':>22} {'p50_ms':>8} {'p95_ms':>8} {'p99_ms':>8} {'req/s':>7} {'llm/req':>8}  answered_by")
+    for r in results:
+        print(
+            f"{r['mode']:>22} {r['p50_ms']:>8.0f} {r['p95_ms']:>8.0f} {r['p99_ms']:>8.0f} "
+            f"{r['req_per_s']:>7.1f} {r['llm_calls_per_req']:>8.2f}  {r['answered_by']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,79 @@
+"""
+Cost of an unbounded LLM-style ``SELECT *`` with and without result limits.
+
+Creates a large table in a scratch DuckDB and runs ``SELECT * FROM big``
+through the old path (``execute_query_with_columns`` + tabulate of every row)
+and through ``execute_limited_query`` + one rendered page. Reports wall time,
+peak Python heap and the size of the rendered answer, then checks that a
+runaway cross join is interrupted by the timeout.
+
+Usage:
+    python -m bench.sql_limits --rows 200000 --timeout 1
+"""
+
+import argparse
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+
+def _measure(func):
+    tracemalloc.start()
+    start = time.perf_counter()
+    answer = func()
+    elapsed = time.perf_counter() - start
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return elapsed, peak, answer
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=200000)
+    parser.add_argument("--timeout", type=float, default=1.0)
+    args = parser.parse_args()
+
+    import tabulate
+    from app.config import SQL_RESULT_PAGE_SIZE
+    from app.backend.database import DatabaseManager, QueryTimeoutError
+    from app.backend.rag_utils.csv_query import _render_result_page
+
+    with tempfile.TemporaryDirectory(prefix="agri-sqllimits-") as workdir:
+        db_manager = DatabaseManager(Path(workdir) / "limits.duckdb")
+        db_manager.execute_write(f"""
+            CREATE TABLE big AS
+            SELECT i AS record_id, 'district_' || (i % 38) AS district, 'crop_' || (i % 12) AS crop,
+                   (i * 7) % 6000 AS yield_kg, random() * 100 AS area_ha
+            FROM range({args.rows}) t(i)
+        """)
+        sql = "SELECT * FROM big"
+
+        def unbounded():
+            result = db_manager.execute_query_with_columns(sql)
+            return tabulate.tabulate([list(row) for row in result["data"]], headers=result["columns"], tablefmt="github")
+
+        def limited():
+            result = db_manager.execute_limited_query(sql, SQL_RESULT_PAGE_SIZE)
+            return _render_result_page(result, 1, SQL_RESULT_PAGE_SIZE)
+
+        print(f"{'path':>10} {'seconds':>8} {'peak_mb':>8} {'answer_kb':>10}")
+        for name, func in (("limited", limited), ("unbounded", unbounded)):
+            elapsed, peak, answer = _measure(func)
+            print(f"{name:>10} {elapsed:>8.2f} {peak / 1e6:>8.1f} {len(answer) / 1e3:>10.1f}")
+
+        start = time.perf_counter()
+        try:
+            db_manager.execute_limited_query(
+                "SELECT COUNT(*) FROM big a, big b WHERE a.yield_kg + b.yield_kg < 0", 10, timeout=args.timeout
+            )
+            print("FAIL: runaway query was not interrupted")
+        except QueryTimeoutError as e:
+            print(f"runaway cross join interrupted after {time.perf_counter() - start:.2f}s: {e}")
+        db_manager.close_connection()
+
+
+if __name__ == "__main__":
+    main()
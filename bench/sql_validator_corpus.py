@@ -0,0 +1,159 @@
+"""
+Corpus of tricky LLM-style SQL checked against the parser-based validator.
+
+Each case says whether a role that can read ``crop_yields``, ``market_prices``
+and ``Farm_Inputs`` (but not ``hr_salaries``) should be allowed to run it, and
+which tables the query reads. The old checks (``FROM|JOIN`` regex plus
+substring keyword matching) run on the same corpus for comparison: a valid
+query they reject is a wasted RAG fallback, an unsafe query they accept is a
+leak. Allowed queries must also still parse once wrapped by
+``execute_limited_query``. The run fails if any expectation is not met.
+The same corpus runs as assertions in ``tests/test_sql_validator.py``.
+
+Usage:
+    python -m bench.sql_validator_corpus --repeat 2000
+"""
+
+import argparse
+import re
+import sys
+import time
+
+from bench.backend import REPO_ROOT  # noqa: F401  (puts the repo on sys.path)
+
+ALLOWED_TABLES = ["crop_yields", "market_prices", "Farm_Inputs"]
+
+# (sql, allowed, tables read)
+CORPUS = [
+    # Valid queries the substring/regex checks got wrong
+    ("SELECT district, created_at FROM crop_yields ORDER BY created_at DESC LIMIT 5", True, ["crop_yields"]),
+    ("SELECT updated_by, COUNT(*) FROM market_prices GROUP BY updated_by", True, ["market_prices"]),
+    ("SELECT crop FROM crop_yields WHERE notes LIKE '%drop in yield%'", True, ["crop_yields"]),
+    ("SELECT deleted_flag, dropout_rate FROM crop_yields", True, ["crop_yields"]),
+    ("select * from crop_yields where season = 'rabi'", True, ["crop_yields"]),
+    ("WITH top AS (SELECT district, SUM(yield_kg) AS total FROM crop_yields GROUP BY district) "
+     "SELECT * FROM top ORDER BY total DESC LIMIT 3", True, ["crop_yields"]),
+    ("WITH a AS (SELECT * FROM crop_yields), b AS (SELECT * FROM a WHERE yield_kg > 100) SELECT COUNT(*) FROM b",
+     True, ["crop_yields"]),
+    ("SELECT c.crop, m.price FROM crop_yields c, market_prices m WHERE c.crop = m.crop", True,
+     ["crop_yields", "market_prices"]),
+    ("SELECT * FROM (SELECT crop, AVG(yield_kg) AS y FROM crop_yields GROUP BY crop) AS t WHERE y > 1000", True,
+     ["crop_yields"]),
+    ("SELECT crop FROM crop_yields WHERE crop IN (SELECT crop FROM market_prices WHERE price > 20)", True,
+     ["crop_yields", "market_prices"]),
+    ("SELECT crop, (SELECT MAX(price) FROM market_prices m WHERE m.crop = c.crop) FROM crop_yields c", True,
+     ["crop_yields", "market_prices"]),
+    ("SELECT crop FROM crop_yields UNION SELECT crop FROM market_prices", True, ["crop_yields", "market_prices"]),
+    ("SELECT * FROM crop_yields c LEFT JOIN farm_inputs f ON c.crop = f.crop", True, ["crop_yields", "Farm_Inputs"]),
+    ('SELECT "full-name" FROM "Farm_Inputs";', True, ["Farm_Inputs"]),
+    ("SELECT * FROM main.crop_yields", True, ["crop_yields"]),
+    ("WITH RECURSIVE n(i) AS (SELECT 1 UNION ALL SELECT i + 1 FROM n WHERE i < 5) "
+     "SELECT n.i, c.crop FROM n, crop_yields c", True, ["crop_yields"]),
+    ("SELECT i FROM range(10) t(i)", True, []),
+    ("SELECT 'insert' AS verb, 42 AS answer", True, []),
+    # Trailing comments and semicolons must survive being wrapped in a subquery
+    ("SELECT crop FROM crop_yields -- top crops", True, ["crop_yields"]),
+    ("SELECT crop FROM crop_yields; -- done", True, ["crop_yields"]),
+    ("SELECT crop FROM crop_yields /* note */ ;", True, ["crop_yields"]),
+    ("SELECT ';' AS s, crop FROM crop_yields -- a\n-- b\n;", True, ["crop_yields"]),
+    # Disallowed tables hidden where the regex does not look
+    ("SELECT * FROM crop_yields, hr_salaries", False, ["crop_yields", "hr_salaries"]),
+    ("SELECT * FROM crop_yields WHERE district IN (SELECT district FROM hr_salaries)", False,
+     ["crop_yields", "hr_salaries"]),
+    ("WITH x AS (SELECT * FROM hr_salaries) SELECT * FROM x", False, ["hr_salaries"]),
+    ("SELECT (SELECT MAX(salary) FROM hr_salaries) AS m FROM crop_yields", False, ["hr_salaries", "crop_yields"]),
+    # A CTE only shadows a table inside its own scope
+    ("SELECT * FROM hr_salaries, (WITH hr_salaries AS (SELECT 1 AS x) SELECT * FROM hr_salaries) AS s", False,
+     ["hr_salaries"]),
+    ("WITH a AS (SELECT * FROM hr_salaries), hr_salaries AS (SELECT 1 AS x) SELECT * FROM a", False,
+     ["hr_salaries"]),
+    ("WITH hr_salaries AS (SELECT * FROM hr_salaries) SELECT * FROM hr_salaries", False, ["hr_salaries"]),
+    # Files, catalogs and other databases
+    ("SELECT * FROM read_csv('/etc/passwd')", False, []),
+    ("SELECT * FROM crop_yields c JOIN read_parquet('s3://bucket/x.parquet') p ON true", False, []),
+    ("SELECT * FROM '/root/secrets.csv'", False, ["/root/secrets.csv"]),
+    ("SELECT * FROM information_schema.tables", False, ["information_schema.tables"]),
+    ("SELECT * FROM duckdb_tables()", False, []),
+    ("SELECT * FROM query('SELECT * FROM hr_salaries')", False, []),
+    ("DESCRIBE crop_yields", False, []),
+    # Not a single SELECT
+    ("DELETE FROM crop_yields", False, []),
+    ("DROP TABLE crop_yields", False, []),
+    ("SELECT * FROM crop_yields; DROP TABLE crop_yields", False, []),
+    ("SELECT 1; SELECT 2", False, []),
+    ("INSERT INTO crop_yields SELECT * FROM crop_yields", False, []),
+    ("CREATE TABLE t AS SELECT * FROM crop_yields", False, []),
+    ("COPY crop_yields TO '/tmp/out.csv'", False, []),
+    ("ATTACH '/tmp/other.duckdb' AS other", False, []),
+    ("PRAGMA database_list", False, []),
+    ("Error generating SQL", False, []),
+]
+
+_LEGACY_FORBIDDEN = ["insert", "update", "delete", "drop", "alter", "create", "truncate"]
+
+
+def legacy_allowed(sql: str, allowed_tables) -> bool:
+    """The checks this validator replaced: SELECT prefix, keyword substrings, FROM/JOIN regex."""
+    lowered = sql.strip().lower().rstrip(";")
+    if not lowered.startswith("select") or any(word in lowered for word in _LEGACY_FORBIDDEN):
+        return False
+    matches = re.findall(r'FROM\s+(\w+)|JOIN\s+(\w+)', sql, flags=re.IGNORECASE)
+    return all(item in allowed_tables for tup in matches for item in tup if item)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--repeat", type=int, default=2000, help="cached validations per query for the timing")
+    args = parser.parse_args()
+
+    from app.backend.database import wrap_limited_query
+    from app.backend.rag_utils.sql_validator import SQLValidator
+
+    validator = SQLValidator()
+    failures = []
+    legacy_wasted = legacy_leaks = 0
+    start = time.perf_counter()
+    for sql, expected_allowed, expected_tables in CORPUS:
+        result = validator.validate(sql, ALLOWED_TABLES)
+        parsed_tables = list(validator.parse(sql).tables)
+        if result.allowed != expected_allowed:
+            failures.append(f"{'rejected' if expected_allowed else 'accepted'}: {sql} ({result.reason})")
+        elif sorted(t.lower() for t in parsed_tables) != sorted(t.lower() for t in expected_tables):
+            failures.append(f"tables {parsed_tables} != {expected_tables}: {sql}")
+        elif expected_allowed and validator.parse(wrap_limited_query(sql, 100, 0)).error:
+            failures.append(f"breaks when wrapped for execution: {sql}")
+
+        legacy = legacy_allowed(sql, ALLOWED_TABLES)
+        if expected_allowed and not legacy:
+            legacy_wasted += 1
+        elif legacy and not expected_allowed:
+            legacy_leaks += 1
+    cold_ms = (time.perf_counter() - start) * 1000 / len(CORPUS)
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for sql, _, _ in CORPUS:
+            validator.validate(sql, ALLOWED_TABLES)
+    cached_us = (time.perf_counter() - start) * 1e6 / (args.repeat * len(CORPUS))
+
+    start = time.perf_counter()
+    for _ in range(args.repeat):
+        for sql, _, _ in CORPUS:
+            legacy_allowed(sql, ALLOWED_TABLES)
+    legacy_us = (time.perf_counter() - start) * 1e6 / (args.repeat * len(CORPUS))
+
+    valid = sum(1 for _, allowed, _ in CORPUS if allowed)
+    print(f"{len(CORPUS)} queries ({valid} valid, {len(CORPUS) - valid} unsafe)")
+    print(f"legacy checks: {legacy_wasted} valid queries rejected (wasted fallbacks), {legacy_leaks} unsafe accepted")
+    print(f"validator:     {len(failures)} mismatches")
+    print(f"latency: parse {cold_ms:.3f} ms/query, cached {cached_us:.1f} us/query, legacy {legacy_us:.1f} us/query")
+    print(f"cache stats: {validator.stats}")
+    if failures:
+        for failure in failures:
+            print(f"FAIL {failure}")
+        sys.exit(1)
+    print("OK")
+
+
+if __name__ == "__main__":
+    main()
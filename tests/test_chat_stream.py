@@ -0,0 +1,106 @@
+"""
+Event order and time to first token of /chat/stream, and speculative routing.
+"""
+
+import asyncio
+import json
+
+import pytest
+
+pytest.importorskip("fastapi")
+
+from app.backend import main  # noqa: E402
+from app.backend.metrics import time_to_first_token_seconds  # noqa: E402
+from app.backend.models import ChatRequest, QueryType  # noqa: E402
+
+
+class _StubDatabase:
+    def __init__(self):
+        self.logged = []
+
+    def get_table_version(self) -> int:
+        return 0
+
+    def log_query(self, username, role, query_type, question, success, error_message=None):
+        self.logged.append((query_type, success))
+
+
+async def _fake_stream_rag(question, role):
+    yield {"event": "retrieval", "documents": 2}
+    for word in ("Rotate ", "legumes ", "yearly."):
+        await asyncio.sleep(0)
+        yield {"event": "token", "text": word, "query_type": QueryType.RAG}
+
+
+@pytest.fixture
+def stub_pipeline(monkeypatch):
+    db = _StubDatabase()
+    monkeypatch.setattr(main, "get_db_manager", lambda: db)
+    monkeypatch.setattr(main, "validate_role_access", lambda *args: None)
+    monkeypatch.setattr(main, "answer_cache", None)
+    monkeypatch.setattr(main, "astream_rag", _fake_stream_rag)
+    return db
+
+
+def _events(question: str):
+    async def collect():
+        return [json.loads(line) async for line in main._chat_events(ChatRequest(question=question), "alice", "HR")]
+    return asyncio.run(collect())
+
+
+def test_rag_stream_event_order_and_ttft(monkeypatch, stub_pipeline):
+    async def classify(question):
+        return QueryType.RAG, True
+    monkeypatch.setattr(main, "aclassify_query", classify)
+    before = time_to_first_token_seconds.snapshot().get(("RAG",), {"count": 0})["count"]
+
+    events = _events("Explain crop rotation")
+
+    kinds = [event["event"] for event in events]
+    assert kinds == ["mode", "retrieval", "token", "token", "token", "done"]
+    assert events[0]["mode"] == "RAG"
+    done = events[-1]
+    assert done["answer"] == "Rotate legumes yearly."
+    assert done["mode"] == "RAG"
+    assert 0 <= done["ttft_ms"] <= done["total_ms"]
+    assert time_to_first_token_seconds.snapshot()[("RAG",)]["count"] == before + 1
+    assert "agri_chat_time_to_first_token_seconds_count" in main.registry.render()
+    assert stub_pipeline.logged == [("RAG", True)]
+
+
+def test_sql_stream_sends_rows_before_the_answer(monkeypatch, stub_pipeline):
+    async def classify(question):
+        return QueryType.SQL, True
+
+    async def ask_csv(question, role, username, return_sql=False, page=1):
+        return {"answer": "| n |\n|---|\n| 3 |", "query_type": QueryType.SQL, "sql": "SELECT 3 AS n",
+                "columns": ["n"], "data": [[3]], "page": page, "has_more": False}
+    monkeypatch.setattr(main, "aclassify_query", classify)
+    monkeypatch.setattr(main, "ask_csv", ask_csv)
+
+    events = _events("How many employees are there?")
+
+    assert [event["event"] for event in events] == ["mode", "sql", "rows", "token", "done"]
+    assert events[2]["row_count"] == 1
+    assert events[-1]["sql"] == "SELECT 3 AS n"
+    assert events[-1]["ttft_ms"] is not None
+
+
+def test_speculative_win_is_logged_apart_from_classifier_outcomes(monkeypatch, stub_pipeline):
+    async def ask_csv(question, role, username, return_sql=False, page=1):
+        await asyncio.sleep(0.05)
+        return {"answer": "", "error": True, "query_type": QueryType.UNKNOWN}
+
+    async def ask_rag(question, role):
+        return {"answer": "Rotate legumes yearly.", "query_type": QueryType.RAG}
+    monkeypatch.setattr(main, "ask_csv", ask_csv)
+    monkeypatch.setattr(main, "ask_rag", ask_rag)
+    monkeypatch.setattr(main, "SPECULATIVE_POLICY", "first")
+
+    result, mode, fallback_used = asyncio.run(main._route_speculatively(
+        "Explain crop rotation", "HR", "alice", 1, QueryType.SQL, stub_pipeline
+    ))
+
+    assert (mode, fallback_used) == (QueryType.RAG, False)
+    assert result["log_type"] == "RAG_SPECULATIVE"
+    assert stub_pipeline.logged == [("RAG_SPECULATIVE", True)]
@@ -0,0 +1,39 @@
+"""
+Token-budgeted CSV chunks for RAG ingestion.
+"""
+
+import csv
+
+import pytest
+
+pytest.importorskip("pandas")
+pytest.importorskip("langchain_core")
+pytest.importorskip("langchain_text_splitters")
+
+from app.backend.rag_utils import rag_module  # noqa: E402
+
+
+@pytest.fixture
+def csv_path(tmp_path):
+    path = tmp_path / "crop_yields.csv"
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["record_id", "district", "crop", "notes"])
+        for i in range(2000):
+            writer.writerow([i, ["Madurai", "Salem", "Erode"][i % 3], "rice", "x" * (5 + i % 60)])
+        # One row wider than the whole budget
+        writer.writerow([2000, "Salem", "rice", "y" * 5000])
+    return path
+
+
+def test_every_csv_chunk_fits_the_budget_and_starts_with_the_header(csv_path):
+    budget = rag_module.CSV_CHUNK_TOKEN_BUDGET * rag_module.CSV_CHARS_PER_TOKEN
+    groups = list(rag_module._iter_csv_grouped_documents(csv_path, "HR"))
+    assert all(len(doc.page_content) <= budget for doc in groups[:-1])
+
+    chunks = list(rag_module._iter_chunks(groups))
+    assert len(chunks) > len(groups)
+    for chunk in chunks:
+        source_line, header = chunk.page_content.split("\n")[:2]
+        assert source_line.startswith("Source: crop_yields.csv (rows ")
+        assert header == "Columns: record_id | district | crop | notes"
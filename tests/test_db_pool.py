@@ -0,0 +1,98 @@
+"""
+CursorPool and WriterCursor under concurrent use against a DuckDB file.
+"""
+
+import threading
+
+import duckdb
+import pytest
+
+from app.backend.db_pool import CursorPool, PoolTimeoutError, WriterCursor
+
+THREADS = 8
+WRITES_PER_THREAD = 50
+
+
+@pytest.fixture
+def connection(tmp_path):
+    connection = duckdb.connect(str(tmp_path / "pool.duckdb"))
+    connection.execute("CREATE TABLE events (thread INTEGER, seq INTEGER)")
+    yield connection
+    connection.close()
+
+
+def _run_threads(target, count=THREADS):
+    errors = []
+
+    def run(index):
+        try:
+            target(index)
+        except BaseException as e:
+            errors.append(e)
+
+    threads = [threading.Thread(target=run, args=(i,)) for i in range(count)]
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return errors
+
+
+def test_concurrent_writes_and_reads_lose_nothing(connection):
+    writer = WriterCursor(lambda: connection, checkout_timeout=30)
+    readers = CursorPool(lambda: connection, size=3, checkout_timeout=30, read_only=True)
+
+    def work(index):
+        for seq in range(WRITES_PER_THREAD):
+            with writer.checkout() as cursor:
+                cursor.execute("INSERT INTO events VALUES (?, ?)", [index, seq])
+            with readers.checkout() as cursor:
+                cursor.execute("SELECT count(*) FROM events").fetchone()
+
+    assert _run_threads(work) == []
+    rows = connection.execute("SELECT thread, count(DISTINCT seq) FROM events GROUP BY thread").fetchall()
+    assert sorted(rows) == [(i, WRITES_PER_THREAD) for i in range(THREADS)]
+
+    read_stats, write_stats = readers.stats_snapshot(), writer.stats_snapshot()
+    assert read_stats["checkouts"] == write_stats["checkouts"] == THREADS * WRITES_PER_THREAD
+    assert read_stats["created"] <= readers.size
+    assert read_stats["timeouts"] == write_stats["timeouts"] == 0
+
+
+def test_checkout_timeouts_raise(connection):
+    readers = CursorPool(lambda: connection, size=1, checkout_timeout=0.05)
+    writer = WriterCursor(lambda: connection, checkout_timeout=0.05)
+    outcomes = []
+
+    def contend(index):
+        try:
+            with readers.checkout() if index == 0 else writer.checkout():
+                pass
+        except PoolTimeoutError:
+            outcomes.append(index)
+
+    with readers.checkout(), writer.checkout():
+        assert _run_threads(contend, count=2) == []
+    assert sorted(outcomes) == [0, 1]
+    assert readers.stats_snapshot()["timeouts"] == writer.stats_snapshot()["timeouts"] == 1
+
+
+def test_failed_block_discards_its_cursor(connection):
+    readers = CursorPool(lambda: connection, size=1, checkout_timeout=1)
+    with pytest.raises(duckdb.Error):
+        with readers.checkout() as cursor:
+            failed = cursor
+            cursor.execute("SELECT * FROM missing_table")
+    with readers.checkout() as cursor:
+        assert cursor is not failed
+        assert cursor.execute("SELECT 1").fetchone() == (1,)
+    assert readers.stats_snapshot()["discarded"] == 1
+
+    writer = WriterCursor(lambda: connection, checkout_timeout=1)
+    with pytest.raises(duckdb.Error):
+        with writer.checkout() as cursor:
+            failed = cursor
+            cursor.execute("INSERT INTO missing_table VALUES (1)")
+    with writer.checkout() as cursor:
+        assert cursor is not failed
+    assert writer.stats_snapshot()["discarded"] == 1
@@ -0,0 +1,20 @@
+"""
+Import-time budget of the backend, measured in a fresh interpreter.
+"""
+
+from bench.import_time import measure
+
+# Same default as bench/import_time.py
+IMPORT_BUDGET_MS = 1500.0
+# Heavy clients are built in the FastAPI lifespan, never at import
+DEFERRED_MODULES = ("langchain", "langchain_openai", "langchain_chroma", "chromadb", "openai", "cohere",
+                    "sentence_transformers", "torch")
+
+
+def test_backend_import_stays_within_budget():
+    rows = measure("app.backend.main")
+    total_ms = next(cumulative for _, cumulative, _, name in rows if name == "app.backend.main") / 1000
+    assert total_ms <= IMPORT_BUDGET_MS, f"importing app.backend.main took {total_ms:.0f} ms"
+
+    imported = {name.split(".")[0] for _, _, _, name in rows}
+    assert not imported.intersection(DEFERRED_MODULES)
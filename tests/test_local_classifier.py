@@ -0,0 +1,27 @@
+"""
+Training examples the local query classifier takes from query_log.
+"""
+
+from app.backend.database import DatabaseManager
+from app.backend.rag_utils.local_classifier import query_log_examples
+
+
+def test_speculative_wins_are_not_training_examples(tmp_path):
+    db_manager = DatabaseManager(tmp_path / "test.duckdb")
+    try:
+        for query_type, question, success in [
+            ("SQL", "How many employees joined in 2023?", True),
+            ("RAG_FALLBACK", "List the leave policy rules", True),
+            ("RAG_SPECULATIVE", "Total rice yield by district", True),
+            ("SQL_SPECULATIVE", "Average price of wheat", True),
+            ("RAG", "Explain crop rotation", False),
+        ]:
+            db_manager.log_query("alice", "HR", query_type, question, success)
+        assert db_manager.flush_query_log(timeout=10)
+
+        assert sorted(query_log_examples(db_manager)) == [
+            ("How many employees joined in 2023?", "SQL"),
+            ("List the leave policy rules", "RAG"),
+        ]
+    finally:
+        db_manager.close_connection()
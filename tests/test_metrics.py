@@ -0,0 +1,27 @@
+"""
+Per-request stage traces across threads.
+"""
+
+import asyncio
+
+from app.backend.database import run_db
+from app.backend.metrics import _trace_var, stage
+
+
+def _blocking_call():
+    with stage("duckdb_execution"):
+        return 42
+
+
+def test_stages_recorded_in_run_db_reach_the_request_trace():
+    async def handle_request():
+        trace = []
+        token = _trace_var.set(trace)
+        try:
+            assert await run_db(_blocking_call) == 42
+        finally:
+            _trace_var.reset(token)
+        return trace
+
+    trace = asyncio.run(handle_request())
+    assert [name for name, _ in trace] == ["duckdb_execution"]
@@ -0,0 +1,57 @@
+"""
+LLM label parsing in the query classifier.
+"""
+
+import asyncio
+from types import SimpleNamespace
+
+import pytest
+
+from app.backend.models import QueryType
+from app.backend.rag_utils import query_classifier
+
+
+class _StubCompletions:
+    def __init__(self, content):
+        self.content = content
+
+    async def create(self, **kwargs):
+        message = SimpleNamespace(content=self.content)
+        return SimpleNamespace(choices=[SimpleNamespace(message=message)])
+
+
+def _classify(monkeypatch, content, local=QueryType.RAG):
+    client = SimpleNamespace(chat=SimpleNamespace(completions=_StubCompletions(content)))
+    monkeypatch.setattr(query_classifier, "OPENAI_API_KEY", "test-key")
+    monkeypatch.setattr(query_classifier, "get_async_openai_client", lambda: client)
+    monkeypatch.setattr(query_classifier, "_local_verdict", lambda question: (local, False))
+    return asyncio.run(query_classifier.aclassify_query("How many employees are there?"))
+
+
+@pytest.mark.parametrize("content, expected", [
+    ("SQL", QueryType.SQL),
+    ("SQL.", QueryType.SQL),
+    ("sql\n", QueryType.SQL),
+    (' "RAG" ', QueryType.RAG),
+    ("rag!", QueryType.RAG),
+])
+def test_parse_label_tolerates_formatting(content, expected):
+    assert query_classifier._parse_label(content, None) is expected
+
+
+@pytest.mark.parametrize("content", ["Neither", "", None, "SQL or RAG"])
+def test_parse_label_falls_back_for_unusable_labels(content):
+    assert query_classifier._parse_label(content, None) is None
+    assert query_classifier._parse_label(content, QueryType.RAG) is QueryType.RAG
+
+
+def test_non_exact_label_is_used(monkeypatch):
+    assert _classify(monkeypatch, "SQL.", local=QueryType.SQL) == (QueryType.SQL, True)
+
+
+def test_disagreeing_label_is_uncertain(monkeypatch):
+    assert _classify(monkeypatch, "sql\n", local=QueryType.RAG) == (QueryType.SQL, False)
+
+
+def test_unusable_label_keeps_local_verdict(monkeypatch):
+    assert _classify(monkeypatch, "Neither", local=QueryType.RAG) == (QueryType.RAG, False)
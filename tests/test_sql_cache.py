@@ -0,0 +1,47 @@
+"""
+Template matching in the NL-to-SQL translation cache.
+"""
+
+import pytest
+
+from app.backend.rag_utils.sql_cache import _bind_template, _template_regex, build_template
+
+
+def _bind(template, question):
+    match = _template_regex(template["question"], template["slots"]).fullmatch(question)
+    return _bind_template(template, match) if match else None
+
+
+@pytest.fixture
+def template():
+    return build_template(
+        "How many farmers grow rice in Madurai district?",
+        "SELECT count(*) FROM farmers WHERE crop = 'rice' AND district = 'Madurai'",
+    )
+
+
+def test_template_binds_same_shaped_values(template):
+    assert _bind(template, "How many farmers grow wheat in Salem district") == (
+        "SELECT count(*) FROM farmers WHERE crop = 'wheat' AND district = 'Salem'"
+    )
+
+
+@pytest.mark.parametrize("question", [
+    "How many farmers grow rice and wheat in Madurai or Salem district",
+    "How many farmers grow rice, wheat in Salem district",
+    "How many farmers grow wheat in Tamil Nadu district",
+    "How many farmers grow not rice in Salem district",
+])
+def test_template_rejects_lists_and_longer_values(template, question):
+    assert _bind(template, question) is None
+
+
+def test_multi_word_slot_keeps_its_word_count():
+    template = build_template(
+        "Average price of green gram in Salem",
+        "SELECT avg(price) FROM market_prices WHERE crop = 'green gram' AND district = 'Salem'",
+    )
+    assert _bind(template, "Average price of black gram in Erode") == (
+        "SELECT avg(price) FROM market_prices WHERE crop = 'black gram' AND district = 'Erode'"
+    )
+    assert _bind(template, "Average price of rice in Erode") is None
@@ -0,0 +1,65 @@
+"""
+Parser-based SQL validation against the corpus in bench.sql_validator_corpus.
+"""
+
+import pytest
+
+from app.backend.database import DatabaseManager, strip_trailing_semicolons, wrap_limited_query
+from app.backend.rag_utils.sql_validator import SQLValidator
+from bench.sql_validator_corpus import ALLOWED_TABLES, CORPUS
+
+
+@pytest.fixture(scope="module")
+def validator():
+    return SQLValidator()
+
+
+@pytest.mark.parametrize("sql, allowed, tables", CORPUS, ids=[sql[:60] for sql, _, _ in CORPUS])
+def test_corpus_verdict(validator, sql, allowed, tables):
+    result = validator.validate(sql, ALLOWED_TABLES)
+    assert result.allowed is allowed, result.reason
+    assert sorted(t.lower() for t in validator.parse(sql).tables) == sorted(t.lower() for t in tables)
+
+
+@pytest.mark.parametrize("sql", [sql for sql, allowed, _ in CORPUS if allowed], ids=lambda sql: sql[:60])
+def test_allowed_queries_parse_once_wrapped(validator, sql):
+    assert validator.parse(wrap_limited_query(sql, 100, 0)).error is None
+
+
+def test_cached_verdict_is_stable(validator):
+    sql = "SELECT * FROM crop_yields, hr_salaries"
+    first = validator.validate(sql, ALLOWED_TABLES)
+    second = validator.validate(sql, ALLOWED_TABLES)
+    assert (first.allowed, first.tables) == (second.allowed, second.tables)
+    assert validator.validate(sql, ALLOWED_TABLES + ["hr_salaries"]).allowed
+
+
+@pytest.mark.parametrize("sql, expected", [
+    ("SELECT 1;", "SELECT 1"),
+    ("SELECT 1; -- done", "SELECT 1"),
+    ("SELECT 1 /* note */ ;;", "SELECT 1 /* note */"),
+    ("SELECT ';' AS s", "SELECT ';' AS s"),
+    ("SELECT 1 -- keep", "SELECT 1 -- keep"),
+])
+def test_strip_trailing_semicolons(sql, expected):
+    assert strip_trailing_semicolons(sql) == expected
+
+
+@pytest.fixture
+def db_manager(tmp_path):
+    db_manager = DatabaseManager(tmp_path / "test.duckdb")
+    db_manager.execute_write("CREATE TABLE crop_yields AS SELECT range AS id, 'rice' AS crop FROM range(5)")
+    yield db_manager
+    db_manager.close_connection()
+
+
+@pytest.mark.parametrize("sql", [
+    "SELECT crop FROM crop_yields -- top crops",
+    "SELECT crop FROM crop_yields; -- done",
+    "SELECT crop FROM crop_yields -- a\n-- b\n;",
+])
+def test_limited_query_with_trailing_comment(db_manager, sql):
+    result = db_manager.execute_limited_query(sql, limit=3)
+    assert [row[0] for row in result["data"]] == ["rice"] * 3
+    assert result["columns"] == ["crop"]
+    assert result["has_more"]